@@ -1,16 +1,26 @@
 #!/usr/bin/env python3
 
-import smbus
-import time
+import os
 import sys
 import tty
 import termios
-import threading
+import selectors
+
+from autonomous_racecar.core.pca9685 import PCA9685
+from autonomous_racecar.core.actuator import ActuatorMailbox
+from autonomous_racecar.core.i2c import open_bus
+from autonomous_racecar.core.esc import ESCStateMachine
+from autonomous_racecar.core.scheduler import PeriodicScheduler
 
 class ServoController:
-    def __init__(self):
-        self.bus = smbus.SMBus(7)
+    def __init__(self, bus=None):
+        # real smbus unless a backend is passed in (e.g. open_bus('sim'))
+        self.bus = bus if bus is not None else open_bus('smbus', 7)
         self.address = 0x40
+        self.pwm = PCA9685(self.bus, self.address, frequency=50)
+        
+        # setters deposit here, one flusher thread writes the bus
+        self.actuator = ActuatorMailbox(self.pwm)
         
         # channels
         self.steering_channel = 0
@@ -35,14 +45,14 @@ class ServoController:
         
         # terminal stuff
         self.old_settings = None
+        self.keys = None
         
-        # refresh thread
-        self.keep_refreshing = False
-        self.refresh_thread = None
+        # status line refresh cap
+        self.status_hz = 10
+        self._last_status = None
         
-        # esc state
-        self.esc_armed = False
-        self.last_direction = "neutral"
+        # esc state machine, advanced on every actuator flush
+        self.esc = ESCStateMachine(center=self.center_pulse, arm_pulse=1480)
         
         self.init_pca()
         self.init_esc()
@@ -50,117 +60,121 @@ class ServoController:
         print("servo controller ready")
 
     def init_pca(self):
-        # basic pca9685 setup
-        self.bus.write_byte_data(self.address, 0x00, 0x10)
-        time.sleep(0.005)
-        
-        prescale = int(25000000 / (4096 * 50) - 1)
-        self.bus.write_byte_data(self.address, 0xFE, prescale)
-        
-        self.bus.write_byte_data(self.address, 0x00, 0x20)
-        time.sleep(0.005)
-        
-        self.bus.write_byte_data(self.address, 0x01, 0x04)
+        # basic pca9685 setup (auto-increment on)
+        self.pwm.init()
         
         # enable outputs
-        self.bus.write_byte_data(self.address, 0xFA, 0x00)
-        self.bus.write_byte_data(self.address, 0xFB, 0x00)
-        self.bus.write_byte_data(self.address, 0xFC, 0x00)
-        self.bus.write_byte_data(self.address, 0xFD, 0x00)
+        self.pwm.enable_outputs()
         
         # center steering
         self.set_servo(self.steering_channel, self.center_pulse)
+        self.actuator.flush()
+        
+        # flusher pushes changed values every pwm period
+        self.actuator.start()
 
     def init_esc(self):
-        # esc startup sequence
-        print("arming esc...")
-        
-        # neutral first
-        self.set_servo(self.throttle_channel, self.center_pulse)
-        time.sleep(1.0)
-        
-        # slight forward to arm
-        self.set_servo(self.throttle_channel, 1480)
-        time.sleep(0.5)
-        
-        # back to neutral
-        self.set_servo(self.throttle_channel, self.center_pulse)
-        time.sleep(0.5)
-        
-        self.esc_armed = True
-        print("esc armed")
+        # esc startup sequence: neutral -> 1480 -> neutral, without blocking
+        print("arming esc (steering stays live)...")
+        self.esc.attach(self.actuator, self.throttle_channel)
+        self.esc.arm()
+
+    @property
+    def esc_armed(self):
+        return self.esc.armed
 
     def set_servo(self, channel, pulse_us):
-        pulse_us = max(self.min_pulse, min(self.max_pulse, pulse_us))
-        pwm_val = int((pulse_us * 4096) / 20000)
-        base_reg = 0x06 + 4 * channel
-        
-        try:
-            self.bus.write_byte_data(self.address, base_reg, 0)
-            self.bus.write_byte_data(self.address, base_reg + 1, 0)
-            self.bus.write_byte_data(self.address, base_reg + 2, pwm_val & 0xFF)
-            self.bus.write_byte_data(self.address, base_reg + 3, (pwm_val >> 8) & 0xFF)
-        except Exception as e:
-            print(f"servo error: {e}")
+        self.set_servos({channel: pulse_us})
+
+    def set_servos(self, pulses):
+        # latest wins, flushed as one block write for contiguous channels
+        pulses = {channel: max(self.min_pulse, min(self.max_pulse, pulse_us))
+                  for channel, pulse_us in pulses.items()}
+        self.actuator.put_pulses(pulses)
 
     def reset_esc(self):
-        print("resetting esc...")
-        
-        # neutral for reset
-        self.set_servo(self.throttle_channel, self.center_pulse)
-        time.sleep(0.3)
-        
-        # quick rearm
-        self.set_servo(self.throttle_channel, 1480)
-        time.sleep(0.2)
-        
-        # back to current position
-        self.set_servo(self.throttle_channel, self.current_throttle)
-        print("esc reset done")
+        # neutral -> 1480 -> current throttle, walked by the flusher
+        self.esc.rearm()
 
-    def check_direction_change(self, new_throttle):
-        # figure out directions
-        current_dir = "forward" if self.current_throttle < self.center_pulse else "reverse" if self.current_throttle > self.center_pulse else "neutral"
-        new_dir = "forward" if new_throttle < self.center_pulse else "reverse" if new_throttle > self.center_pulse else "neutral"
-        
-        # reset on direction change
-        if (current_dir == "forward" and new_dir == "reverse") or (current_dir == "reverse" and new_dir == "forward"):
-            print(f"direction change: {current_dir} -> {new_dir}")
-            self.reset_esc()
+    def set_throttle(self, pulse_us):
+        # esc rearms by itself on forward <-> reverse
+        self.current_throttle = pulse_us
+        self.esc.request(self.current_throttle)
 
     def start_refresh(self):
-        self.keep_refreshing = True
-        def refresh_loop():
-            while self.keep_refreshing:
-                self.set_servo(self.throttle_channel, self.current_throttle)
-                self.set_servo(self.steering_channel, self.current_steering)
-                time.sleep(0.02)
-        
-        self.refresh_thread = threading.Thread(target=refresh_loop, daemon=True)
-        self.refresh_thread.start()
+        self.actuator.start()
 
     def stop_refresh(self):
-        self.keep_refreshing = False
+        # final flush so the stop command reaches the chip
+        self.actuator.stop()
 
     def setup_terminal(self):
         self.old_settings = termios.tcgetattr(sys.stdin)
         tty.setraw(sys.stdin.fileno())
+        self.keys = KeyReader(sys.stdin)
 
     def restore_terminal(self):
+        if self.keys:
+            self.keys.close()
+            self.keys = None
         if self.old_settings:
             termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.old_settings)
 
-    def get_key(self):
-        return sys.stdin.read(1).lower()
-
     def stop_all(self):
         self.current_steering = self.center_pulse
-        self.current_throttle = self.center_pulse
         self.set_servo(self.steering_channel, self.current_steering)
-        self.set_servo(self.throttle_channel, self.current_throttle)
-        print("stopped - all centered")
+        self.set_throttle(self.center_pulse)
 
-    def show_status(self):
+    def apply_keys(self, keys):
+        # walk every pending key on local values, then deposit once
+        steering = self.current_steering
+        throttle = self.current_throttle
+        rearm = False
+        running = True
+        
+        for key in keys:
+            if key in ('q', '\x03'):
+                # quit (ctrl+c arrives as a key in raw mode)
+                steering = throttle = self.center_pulse
+                running = False
+                break
+            elif key == 'w':
+                # forward
+                throttle = max(self.max_forward, throttle - self.throttle_step)
+            elif key == 's':
+                # reverse
+                throttle = min(self.max_reverse, throttle + self.throttle_step)
+            elif key == 'a':
+                # left
+                steering = max(self.min_pulse, steering - self.steering_step)
+            elif key == 'd':
+                # right
+                steering = min(self.max_pulse, steering + self.steering_step)
+            elif key == ' ':
+                # stop
+                steering = throttle = self.center_pulse
+            elif key == 'r':
+                # manual esc reset
+                rearm = True
+            elif key in ('+', '='):
+                # bigger steps
+                self.steering_step = min(100, self.steering_step + 5)
+                self.throttle_step = min(100, self.throttle_step + 5)
+            elif key == '-':
+                # smaller steps
+                self.steering_step = max(5, self.steering_step - 5)
+                self.throttle_step = max(5, self.throttle_step - 5)
+        
+        if steering != self.current_steering:
+            self.current_steering = steering
+            self.set_servo(self.steering_channel, steering)
+        if throttle != self.current_throttle:
+            self.set_throttle(throttle)
+        if rearm:
+            self.reset_esc()
+        return running
+
+    def status_line(self):
         # calc percentages
         steering_pct = ((self.current_steering - self.center_pulse) / 500) * 100
         throttle_pct = ((self.current_throttle - self.center_pulse) / 500) * 100
@@ -169,9 +183,16 @@ class ServoController:
         steer_dir = "LEFT" if steering_pct < -5 else "RIGHT" if steering_pct > 5 else "CENTER"
         throttle_dir = "FORWARD" if throttle_pct < -5 else "REVERSE" if throttle_pct > 5 else "NEUTRAL"
         
-        print(f"\rsteering: {self.current_steering}us ({steering_pct:+5.1f}% {steer_dir}) | "
-              f"throttle: {self.current_throttle}us ({throttle_pct:+5.1f}% {throttle_dir})",
-              end="", flush=True)
+        return (f"\rsteering: {self.current_steering}us ({steering_pct:+5.1f}% {steer_dir}) | "
+                f"throttle: {self.current_throttle}us ({throttle_pct:+5.1f}% {throttle_dir}) | "
+                f"step: {self.steering_step}us | esc: {self.esc.state}")
+
+    def show_status(self):
+        # only print when something changed
+        line = self.status_line()
+        if line != self._last_status:
+            self._last_status = line
+            print(line, end="", flush=True)
 
     def run_control(self):
         print("\nwasd control active")
@@ -179,65 +200,20 @@ class ServoController:
         print("space = stop, r = reset esc, q = quit")
         print("make sure car has room to move")
         
+        # status prints live on their own capped-rate thread
+        status = PeriodicScheduler(rate_hz=self.status_hz)
+        
         try:
             self.setup_terminal()
             self.start_refresh()
+            status.start(self.show_status)
             
             while True:
-                key = self.get_key()
-                
-                if key == 'q':
-                    print("\nquitting...")
-                    self.stop_all()
+                # wakes on the first key, then drains everything pending
+                keys = self.keys.read_keys(timeout=0.1)
+                if keys and not self.apply_keys(keys):
+                    print("\r\nquitting...")
                     break
-                
-                elif key == 'w':
-                    # forward
-                    new_throttle = self.current_throttle - self.throttle_step
-                    new_throttle = max(self.max_forward, new_throttle)
-                    self.check_direction_change(new_throttle)
-                    self.current_throttle = new_throttle
-                    self.set_servo(self.throttle_channel, self.current_throttle)
-                
-                elif key == 's':
-                    # reverse
-                    new_throttle = self.current_throttle + self.throttle_step
-                    new_throttle = min(self.max_reverse, new_throttle)
-                    self.check_direction_change(new_throttle)
-                    self.current_throttle = new_throttle
-                    self.set_servo(self.throttle_channel, self.current_throttle)
-                
-                elif key == 'a':
-                    # left
-                    self.current_steering = max(self.min_pulse, self.current_steering - self.steering_step)
-                    self.set_servo(self.steering_channel, self.current_steering)
-                
-                elif key == 'd':
-                    # right
-                    self.current_steering = min(self.max_pulse, self.current_steering + self.steering_step)
-                    self.set_servo(self.steering_channel, self.current_steering)
-                
-                elif key == ' ':
-                    # stop
-                    self.stop_all()
-                
-                elif key == 'r':
-                    # manual esc reset
-                    self.reset_esc()
-                
-                elif key == '+' or key == '=':
-                    # bigger steps
-                    self.steering_step = min(100, self.steering_step + 5)
-                    self.throttle_step = min(100, self.throttle_step + 5)
-                    print(f"\nstep size: {self.steering_step}us")
-                
-                elif key == '-':
-                    # smaller steps
-                    self.steering_step = max(5, self.steering_step - 5)
-                    self.throttle_step = max(5, self.throttle_step - 5)
-                    print(f"\nstep size: {self.steering_step}us")
-                
-                self.show_status()
         
         except KeyboardInterrupt:
             print("\nctrl+c pressed")
@@ -248,20 +224,52 @@ class ServoController:
             self.stop_all()
         
         finally:
+            status.stop()
             self.stop_refresh()
             self.restore_terminal()
-            print("\ncontrol ended")
+            print("\nstopped - all centered")
+            print("control ended")
+
+
+class KeyReader:
+    # selector-based stdin reader, returns every key pending per call
+    def __init__(self, stream):
+        self.fd = stream.fileno()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.fd, selectors.EVENT_READ)
+
+    def read_keys(self, timeout=None):
+        if not self.selector.select(timeout):
+            return ""
+        chunks = []
+        # keep reading while more bytes are ready (held keys, bursts)
+        while True:
+            data = os.read(self.fd, 1024)
+            if not data:
+                break
+            chunks.append(data)
+            if not self.selector.select(0):
+                break
+        return b"".join(chunks).decode(errors="ignore").lower()
+
+    def close(self):
+        self.selector.close()
 
 def main():
     print("wasd servo controller")
     
+    # --sim drives a simulated pca9685 instead of the i2c bus
+    sim = '--sim' in sys.argv[1:]
+    if sim:
+        print("using simulated pca9685")
+    
     response = input("car has space to move? (y/N): ")
     if response.lower() != 'y':
         print("cancelled")
         return
     
     try:
-        controller = ServoController()
+        controller = ServoController(bus=open_bus('sim') if sim else None)
         controller.run_control()
     except Exception as e:
         print(f"init failed: {e}")
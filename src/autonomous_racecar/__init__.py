@@ -28,13 +28,23 @@ __version__ = "1.0.0"
 __author__ = "Rishan Checker"
 __email__ = "rishanchecker@gmail.com"
 
-#imports - only existing modules for now
-from .core.hardware import AutonomousRacecar
-from .core.camera import AutonomousRacecarCamera, create_inference_camera, create_training_camera
-#from .data.collection import RapidDataCollector, create_rapid_collector
-#from .models.networks import SteeringModel
-#from .training.trainer import ModelTrainer
-#from .autonomous.driver import AutonomousDriver
+import importlib as _importlib
+
+#lazy imports (PEP 562) - submodules and their heavy deps (torch, cv2,
+#jetcam, smbus) load on first attribute access, not at package import
+_LAZY_ATTRS = {
+    'AutonomousRacecar': '.core.hardware',
+    'AutonomousRacecarCamera': '.core.camera',
+    'create_inference_camera': '.core.camera',
+    'create_training_camera': '.core.camera',
+    #'RapidDataCollector': '.data.collection',
+    #'create_rapid_collector': '.data.collection',
+    'SteeringModel': '.models.networks',
+    #'ModelTrainer': '.training.trainer',
+    'AutonomousDriver': '.autonomous.driver',
+}
+
+_SUBMODULES = ('autonomous', 'core', 'data', 'models', 'training', 'utils')
 
 #metadata
 __all__ = [
@@ -44,11 +54,25 @@ __all__ = [
     'create_training_camera',
     #'DataCollector',
     #'create_collector',
-    #'SteeringModel',
+    'SteeringModel',
     #'ModelTrainer',
-    #'AutonomousDriver'
+    'AutonomousDriver',
 ]
 
+def __getattr__(name):
+    """resolve lazy attributes and submodules on first access"""
+    if name in _LAZY_ATTRS:
+        module = _importlib.import_module(_LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return _importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRS) | set(_SUBMODULES))
+
 VERSION_INFO = {
     'major': 1,
     'minor': 0,
@@ -78,5 +102,3 @@ def print_banner():
     print(f"""
 Autonomous Racecar Pro v{__version__}
     """)
-
-print_banner()
@@ -0,0 +1,404 @@
+#src/autonomous_racecar/autonomous/driver.py
+#pipelined autonomous driving loop: capture, inference and actuation stages
+
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import torch
+
+from ..core.frame import Frame, FrameSlot
+from ..core.trace import TraceRecorder
+from ..models.preprocess import Preprocessor
+from ..utils.stats import summarize
+
+
+class Command:
+    """
+    one model prediction on its way to the actuators
+
+    seq counts predictions (gaps are superseded commands), frame_seq and
+    capture_ns identify the camera frame it was made from
+    """
+
+    __slots__ = ('seq', 'frame_seq', 'steering', 'throttle', 'capture_ns', 'trace')
+
+    def __init__(self, seq: int, frame_seq: int, steering: float, throttle: float,
+                 capture_ns: int, trace=None):
+        self.seq = seq
+        self.frame_seq = frame_seq
+        self.steering = steering
+        self.throttle = throttle
+        self.capture_ns = capture_ns
+        self.trace = trace
+
+    def __repr__(self):
+        return f"Command(seq={self.seq}, steering={self.steering:.3f}, throttle={self.throttle:.3f})"
+
+
+class AutonomousDriver:
+    """
+    drives the car from camera frames with a steering model
+
+    three concurrent stages connected by size-1 latest-wins slots
+    (core.frame.FrameSlot), so camera i/o overlaps with the model and a slow
+    stage never queues up stale work:
+
+        capture    - the camera's own capture thread (read_next) when the
+                     camera declares blocking_reads, otherwise a thread
+                     polling read()
+        inference  - newest frame -> Preprocessor -> model -> Command
+        actuation  - newest Command -> car.set_controls
+
+    frames that arrive while the model is busy are skipped, commands that
+    are replaced before the actuation stage picks them up are superseded.
+    model is anything mapping the 1x3xHxW preprocessed tensor to a 1xN
+    output, column 0 is steering and column 1 (if present) throttle. a
+    fixed `throttle` overrides the model's. if no command arrives for
+    `watchdog` seconds the throttle is cut. if no frame arrives within
+    `startup_timeout` seconds of start, or a stage raises, the driver stops
+    the car and itself and keeps the reason in `error`
+    (start_autonomous raises it as a RuntimeError)
+    """
+
+    def __init__(self,
+                 car,
+                 camera,
+                 model: Callable[[torch.Tensor], torch.Tensor],
+                 throttle: Optional[float] = None,
+                 max_throttle: float = 0.3,
+                 watchdog: float = 0.25,
+                 startup_timeout: float = 5.0,
+                 device: str = 'cpu',
+                 preprocess: Optional[Preprocessor] = None,
+                 recorder: Optional[TraceRecorder] = None,
+                 history: int = 2000):
+        self.car = car
+        self.camera = camera
+        self.model = model
+        self.throttle = throttle
+        self.max_throttle = max_throttle
+        self.watchdog = watchdog
+        self.startup_timeout = startup_timeout
+        self.device = torch.device(device)
+        if isinstance(model, torch.nn.Module):
+            model.eval().to(self.device)
+
+        target_size = getattr(camera, 'target_size', None) or (224, 224)
+        self.preprocess = preprocess or Preprocessor(target_size)
+        self.recorder = recorder if recorder is not None else TraceRecorder(history)
+
+        #capture -> inference, inference -> actuation
+        self._frames = FrameSlot()
+        self._commands = FrameSlot()
+        self._threads = []
+        #no usable blocking read_next, frames come from _capture_loop
+        self._poll_camera = False
+        self._running = False
+        self._owns_camera = False
+        self._started = None
+        self._stopped = None
+        self.error = None
+
+        #stats
+        self.frames_inferred = 0
+        self.frames_skipped = 0
+        self.commands_applied = 0
+        self.commands_superseded = 0
+        self.watchdog_trips = 0
+        self._latency_ms = deque(maxlen=history)
+        self._inference_ms = deque(maxlen=history)
+
+    @classmethod
+    def from_config(cls, car, camera, model, config: Optional[Dict] = None, **kwargs) -> 'AutonomousDriver':
+        """device from the training section of training_config.yaml"""
+        if config is None:
+            from ..utils.config import load_training_config
+            config = load_training_config()
+        kwargs.setdefault('device', config.get('training', {}).get('device', 'cpu'))
+        return cls(car, camera, model, **kwargs)
+
+    #stages
+
+    def _run_stage(self, name: str, loop: Callable[[], None]):
+        #a dead stage must not leave the others driving
+        try:
+            loop()
+        except Exception as e:
+            traceback.print_exc()
+            self._fail(f"{name} stage died: {e!r}")
+
+    def _fail(self, reason: str):
+        #called from a stage thread: stop everything that moves, stop()
+        #joins the threads and releases the camera
+        self.error = reason
+        print(f"autonomous driving failed: {reason}")
+        self._running = False
+        self._frames.close()
+        self._commands.close()
+        try:
+            self.car.stop()
+        except Exception as e:
+            print(f"car stop failed: {e}")
+
+    def _capture_loop(self):
+        #only for cameras without a working blocking read_next
+        period = 1.0 / getattr(self.camera, 'fps', 30)
+        seq = 0
+        last = None
+        while self._running:
+            image = self.camera.read()
+            if image is not None and image is not last:
+                last = image
+                seq += 1
+                self._frames.publish(Frame(image, seq, time.monotonic_ns()))
+            time.sleep(period / 2)
+        self._frames.close()
+
+    def _next_frame(self, after_seq: int) -> Optional[Frame]:
+        if not self._poll_camera:
+            return self.camera.read_next(after_seq=after_seq, timeout=0.5)
+        return self._frames.wait_next(after_seq, timeout=0.5)
+
+    @torch.inference_mode()
+    def _inference_loop(self):
+        last_seq = 0
+        while self._running:
+            frame = self._next_frame(last_seq)
+            if frame is None:
+                waited = time.monotonic() - self._started
+                if self._running and not last_seq and waited > self.startup_timeout:
+                    self._fail(f"no camera frame within {self.startup_timeout}s of start")
+                continue
+            if last_seq:
+                self.frames_skipped += frame.seq - last_seq - 1
+            last_seq = frame.seq
+
+            t0 = time.perf_counter()
+            trace = self.recorder.begin(frame)
+            x = self.preprocess(frame.image)
+            trace.mark('preprocess')
+            output = self.model(x.to(self.device, non_blocking=True))
+            output = output.reshape(-1).float().cpu()
+            trace.mark('inference')
+            self._inference_ms.append((time.perf_counter() - t0) * 1000)
+
+            steering = float(output[0])
+            if self.throttle is not None or len(output) < 2:
+                throttle = self.throttle or 0.0
+            else:
+                throttle = float(output[1])
+            throttle = max(-self.max_throttle, min(self.max_throttle, throttle))
+
+            self.frames_inferred += 1
+            self._commands.publish(Command(self.frames_inferred, frame.seq, steering, throttle,
+                                           frame.timestamp_ns, trace))
+        self._commands.close()
+
+    def _actuation_loop(self):
+        last_seq = 0
+        tripped = False
+        while self._running:
+            command = self._commands.wait_next(last_seq, timeout=self.watchdog)
+            if command is None:
+                #armed once the first prediction has been applied
+                if self._running and last_seq and not tripped:
+                    #no fresh prediction, keep steering but cut throttle
+                    self.car.set_controls(self.car.steering, 0.0)
+                    self.watchdog_trips += 1
+                    tripped = True
+                    print(f"watchdog: no command for {self.watchdog}s, throttle cut")
+                continue
+            tripped = False
+            self.commands_superseded += command.seq - last_seq - 1
+            last_seq = command.seq
+
+            self.car.set_controls(command.steering, command.throttle, trace=command.trace)
+            self.commands_applied += 1
+            self._latency_ms.append((time.monotonic_ns() - command.capture_ns) / 1e6)
+
+    #control
+
+    def start(self) -> bool:
+        """start the stages (and the camera if it is not running), returns immediately"""
+        if self._running:
+            return True
+        #clean up after a failed run
+        self.stop()
+        self.error = None
+        if not self.camera.running:
+            if not self.camera.start():
+                print("camera failed to start")
+                return False
+            self._owns_camera = True
+
+        self._frames.reset()
+        self._commands.reset()
+        self._running = True
+        self._started = time.monotonic()
+        self._stopped = None
+
+        #e.g. OpenCVCamera without its grabber has read_next but nothing feeding it
+        self._poll_camera = not (hasattr(self.camera, 'read_next') and
+                                 getattr(self.camera, 'blocking_reads', False))
+        stages = [('inference', self._inference_loop), ('actuation', self._actuation_loop)]
+        if self._poll_camera:
+            stages.insert(0, ('capture', self._capture_loop))
+        self._threads = [threading.Thread(target=self._run_stage, args=stage, daemon=True)
+                         for stage in stages]
+        for thread in self._threads:
+            thread.start()
+        print("autonomous driving started")
+        return True
+
+    def start_autonomous(self, duration: Optional[float] = None) -> Dict[str, float]:
+        """drive for `duration` seconds (until ctrl-c when None), then stop safely"""
+        if not self.start():
+            return self.stats()
+        end = None if duration is None else time.monotonic() + duration
+        try:
+            while self._running and (end is None or time.monotonic() < end):
+                time.sleep(0.05)
+        except KeyboardInterrupt:
+            print("interrupted")
+        finally:
+            self.stop()
+        self.print_stats()
+        if self.error:
+            raise RuntimeError(self.error)
+        return self.stats()
+
+    def stop(self):
+        """stop the stages, stop the car, and the camera if the driver started it"""
+        if not self._threads:
+            return
+        self._running = False
+        self._frames.close()
+        self._commands.close()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=2)
+        self._threads = []
+        self._stopped = time.monotonic()
+
+        self.car.stop()
+        if self._owns_camera:
+            self.camera.stop()
+            self._owns_camera = False
+        print("autonomous driving stopped")
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def stats(self) -> Dict[str, float]:
+        """achieved rates, skipped work and frame-to-command latency"""
+        end = self._stopped or time.monotonic()
+        elapsed = end - self._started if self._started else 0.0
+        latency = summarize(list(self._latency_ms))
+        inference = summarize(list(self._inference_ms))
+        bus = self.recorder.stats()['total']
+        return {
+            'seconds': elapsed,
+            'frames_inferred': self.frames_inferred,
+            'frames_skipped': self.frames_skipped,
+            'commands_applied': self.commands_applied,
+            'commands_superseded': self.commands_superseded,
+            'watchdog_trips': self.watchdog_trips,
+            'control_hz': self.commands_applied / elapsed if elapsed else 0.0,
+            'inference_hz': self.frames_inferred / elapsed if elapsed else 0.0,
+            'inference_p50_ms': inference['p50'],
+            'latency_p50_ms': latency['p50'],
+            'latency_p99_ms': latency['p99'],
+            'bus_latency_p50_ms': bus['p50'],
+            'bus_latency_p99_ms': bus['p99'],
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"control: {s['control_hz']:.1f}hz ({s['commands_applied']} commands, "
+              f"{s['commands_superseded']} superseded, {s['watchdog_trips']} watchdog trips)")
+        print(f"inference: {s['inference_hz']:.1f}hz, p50 {s['inference_p50_ms']:.1f}ms "
+              f"({s['frames_inferred']} frames, {s['frames_skipped']} skipped)")
+        print(f"frame -> command: p50 {s['latency_p50_ms']:.1f}ms p99 {s['latency_p99_ms']:.1f}ms, "
+              f"frame -> bus: p50 {s['bus_latency_p50_ms']:.1f}ms p99 {s['bus_latency_p99_ms']:.1f}ms")
+        if self.error:
+            print(f"stopped early: {self.error}")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _stand_in_model(feature_dim: int = 64) -> torch.nn.Module:
+    #small conv net with the SteeringModel interface (no torchvision download)
+    from ..models.networks import SteeringModel
+
+    backbone = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 32, 5, stride=2), torch.nn.ReLU(),
+        torch.nn.Conv2d(32, feature_dim, 3, stride=2), torch.nn.ReLU(),
+        torch.nn.AdaptiveAvgPool2d(1))
+    return SteeringModel(backbone=backbone, feature_dim=feature_dim)
+
+
+def _serial_loop(car, camera, model, preprocess: Preprocessor, seconds: float) -> Dict[str, float]:
+    #the read -> infer -> steer loop the driver replaces, for comparison
+    latencies = []
+    commands = 0
+    last_seq = 0
+    start = time.monotonic()
+    with torch.inference_mode():
+        while time.monotonic() - start < seconds:
+            frame = camera.read_next(after_seq=last_seq, timeout=0.5)
+            if frame is None:
+                continue
+            last_seq = frame.seq
+            output = model(preprocess(frame.image)).reshape(-1)
+            car.set_controls(float(output[0]), 0.0)
+            commands += 1
+            latencies.append((time.monotonic_ns() - frame.timestamp_ns) / 1e6)
+    latency = summarize(latencies)
+    return {'control_hz': commands / seconds,
+            'latency_p50_ms': latency['p50'], 'latency_p99_ms': latency['p99']}
+
+
+def test_driver(seconds: float = 5.0, fps: int = 30, latency: float = 0.0005,
+                model: Optional[torch.nn.Module] = None,
+                compare_serial: bool = True) -> Dict[str, float]:
+    """drive the simulated camera and bus, report control hz and latency"""
+    from ..core.camera_sim import SimulatedCamera
+    from ..core.hardware import create_sim_car
+
+    print(f"driver test: simulated camera @ {fps}fps, simulated bus, {seconds}s")
+    model = model or _stand_in_model()
+    car = create_sim_car(latency=latency)
+    camera = SimulatedCamera('inference', fps=fps)
+    camera.start()
+
+    try:
+        if compare_serial:
+            serial = _serial_loop(car, camera, model.eval(), Preprocessor(camera.target_size), seconds)
+            print(f"serial loop: {serial['control_hz']:.1f}hz, frame -> command "
+                  f"p50 {serial['latency_p50_ms']:.1f}ms p99 {serial['latency_p99_ms']:.1f}ms")
+
+        driver = AutonomousDriver(car, camera, model, throttle=0.0)
+        stats = driver.start_autonomous(duration=seconds)
+        if compare_serial:
+            stats['serial_control_hz'] = serial['control_hz']
+            stats['serial_latency_p50_ms'] = serial['latency_p50_ms']
+    finally:
+        camera.stop()
+        car.close()
+
+    ok = stats['commands_applied'] > 0 and stats['watchdog_trips'] == 0
+    print(f"driver test {'passed' if ok else 'failed'}")
+    return stats
+
+
+if __name__ == "__main__":
+    test_driver()
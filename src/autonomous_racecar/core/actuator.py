@@ -0,0 +1,180 @@
+#src/autonomous_racecar/core/actuator.py
+#latest-wins actuator mailbox flushed to the pca9685 by one thread
+
+import threading
+from typing import Dict, Optional
+
+from .pca9685 import PCA9685
+from .scheduler import PeriodicScheduler
+
+
+class ActuatorMailbox:
+    """
+    latest-wins pwm slots with a single background flusher
+
+    setters only deposit 12-bit tick values under a lock; the flusher thread
+    is the only writer on the bus, so channel registers can never be torn by
+    two threads interleaving. values that match what is already on the chip
+    are skipped, so steady commands cost no i2c traffic
+
+    a deposit can carry a FrameTrace, its actuation stage is marked once
+    the flush that includes the command has reached the bus
+    """
+
+    def __init__(self, pwm: PCA9685, period: Optional[float] = None):
+        self.pwm = pwm
+        self.period = period if period is not None else pwm.period_us / 1000000
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._pending_trace = None
+        self._written = {}
+        self._tick_callbacks = []
+
+        #flusher runs on absolute pwm-period deadlines
+        self.scheduler = PeriodicScheduler(period=self.period, overrun='skip')
+
+        #stats
+        self.deposits = 0
+        self.flushes = 0
+        self.writes = 0
+        self.skipped = 0
+        self.callback_errors = 0
+
+    def put(self, channel: int, ticks: int, trace=None):
+        """deposit a tick value for one channel (latest wins)"""
+        with self._lock:
+            self._pending[channel] = ticks
+            self.deposits += 1
+            if trace is not None:
+                self._set_trace(trace)
+
+    def put_many(self, ticks: Dict[int, int], trace=None):
+        """deposit tick values for several channels atomically"""
+        with self._lock:
+            self._pending.update(ticks)
+            self.deposits += len(ticks)
+            if trace is not None:
+                self._set_trace(trace)
+
+    def _set_trace(self, trace):
+        #an unflushed older command was overwritten, so was its trace
+        if self._pending_trace is not None:
+            self._pending_trace.drop()
+        self._pending_trace = trace
+
+    def put_pulses(self, pulses: Dict[int, float]):
+        """deposit pulse widths in microseconds"""
+        self.put_many({channel: self.pwm.pulse_to_ticks(pulse_us)
+                       for channel, pulse_us in pulses.items()})
+
+    def add_tick_callback(self, callback):
+        """call `callback()` at the start of every flush (e.g. esc updates)"""
+        self._tick_callbacks.append(callback)
+
+    def flush(self) -> int:
+        """write changed channels to the chip now, returns channels written"""
+        with self._flush_lock:
+            for callback in self._tick_callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    #a failing callback must not kill the flusher, later
+                    #commands (the throttle cut included) still go out
+                    print(f"actuator tick callback error: {e}")
+                    self.callback_errors += 1
+
+            with self._lock:
+                pending = self._pending
+                trace = self._pending_trace
+                self._pending = {}
+                self._pending_trace = None
+
+            changed = {channel: ticks for channel, ticks in pending.items()
+                       if self._written.get(channel) != ticks}
+            self.flushes += 1
+            self.skipped += len(pending) - len(changed)
+
+            if not changed:
+                #already on the chip
+                if trace is not None:
+                    trace.mark('actuation')
+                return 0
+
+            try:
+                self.pwm.set_ticks_many(changed)
+            except Exception as e:
+                print(f"actuator flush error: {e}")
+                #retry on the next period unless something newer arrived
+                with self._lock:
+                    for channel, ticks in changed.items():
+                        self._pending.setdefault(channel, ticks)
+                    if trace is not None:
+                        if self._pending_trace is None:
+                            self._pending_trace = trace
+                        else:
+                            trace.drop()
+                return 0
+
+            self._written.update(changed)
+            self.writes += len(changed)
+            if trace is not None:
+                trace.mark('actuation')
+            return len(changed)
+
+    def written(self, channel: int) -> Optional[int]:
+        """last tick value actually written for a channel"""
+        return self._written.get(channel)
+
+    def start(self):
+        """start the flusher thread"""
+        self.scheduler.start(self.flush)
+
+    def stop(self):
+        """stop the flusher thread after a final flush"""
+        self.scheduler.stop()
+        self.flush()
+
+    @property
+    def running(self) -> bool:
+        return self.scheduler.running
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'deposits': self.deposits,
+            'flushes': self.flushes,
+            'writes': self.writes,
+            'skipped': self.skipped,
+            'callback_errors': self.callback_errors,
+        }
+
+
+def test_actuator_mailbox(seconds: float = 0.5) -> bool:
+    """compare bus traffic of steady commands against a 20ms rewrite loop"""
+    import time
+    from .i2c import SimulatedPCA9685
+
+    print("testing actuator mailbox")
+
+    bus = SimulatedPCA9685()
+    pwm = PCA9685(bus)
+    pwm.init()
+    bus.reset_count()
+    mailbox = ActuatorMailbox(pwm)
+    mailbox.start()
+
+    #control loop at ~200hz with a steady command
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        mailbox.put_pulses({0: 1500, 1: 1500})
+        time.sleep(0.005)
+    mailbox.stop()
+
+    #a rewrite-every-period loop would have written both channels each tick
+    rewrites = mailbox.flushes * 2
+    print(f"deposits: {mailbox.deposits}, writes: {mailbox.writes}, "
+          f"rewrite loop would write: {rewrites}")
+    ok = mailbox.writes == 2 and bus.count == 1
+    print("actuator mailbox ok" if ok else "actuator mailbox wrote redundantly")
+    return ok
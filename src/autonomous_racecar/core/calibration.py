@@ -0,0 +1,183 @@
+#src/autonomous_racecar/core/calibration.py
+#piecewise-linear calibration curves compiled into pwm tick lookup tables
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .pca9685 import TICKS
+
+
+class PiecewiseLinearCurve:
+    """
+    command -> pulse width (us) curve through (command, pulse_us) points
+
+    deadband_us models the esc neutral deadband: any non-zero command is
+    pushed outside center +/- deadband so the car responds immediately,
+    while full command still lands on the curve endpoint
+    """
+
+    def __init__(self,
+                 points: Sequence[Tuple[float, float]],
+                 center: float = 1500,
+                 deadband_us: float = 0.0):
+        points = sorted((float(c), float(p)) for c, p in points)
+        if len(points) < 2:
+            raise ValueError("calibration curve needs at least two points")
+        self.points = points
+        self.commands = np.array([c for c, _ in points])
+        self.pulses = np.array([p for _, p in points])
+        self.center = center
+        self.deadband_us = deadband_us
+
+    @classmethod
+    def linear(cls, gain: float, offset: float = 0.0,
+               center: float = 1500, span_us: float = 500):
+        """pulse = center + (command * gain + offset) * span_us"""
+        return cls([(c, center + (c * gain + offset) * span_us)
+                    for c in (-1.0, 0.0, 1.0)], center=center)
+
+    @classmethod
+    def esc(cls, gain: float = 1.0, forward_range_us: float = 200,
+            reverse_range_us: float = 200, deadband_us: float = 0.0,
+            center: float = 1500):
+        """asymmetric esc curve, forward lowers the pulse and reverse raises it"""
+        return cls([(-1.0, center + gain * reverse_range_us),
+                    (0.0, center),
+                    (1.0, center - gain * forward_range_us)],
+                   center=center, deadband_us=deadband_us)
+
+    def __call__(self, commands) -> np.ndarray:
+        commands = np.asarray(commands, dtype=np.float64)
+        pulses = np.interp(commands, self.commands, self.pulses)
+
+        if self.deadband_us > 0:
+            offset = pulses - self.center
+            #travel available on each side of neutral
+            lo_span = abs(self.pulses[0] - self.center)
+            hi_span = abs(self.pulses[-1] - self.center)
+            span = np.where(commands < 0, lo_span, hi_span)
+            span = np.where(span > 0, span, 1.0)
+            moved = (commands != 0) & (offset != 0)
+            scaled = self.deadband_us + np.abs(offset) * (span - self.deadband_us) / span
+            pulses = np.where(moved, self.center + np.sign(offset) * scaled, pulses)
+
+        return pulses
+
+
+class CalibrationTable:
+    """
+    curve compiled once into a tick lookup table
+
+    commands are clamped to [min_command, max_command] and mapped to the
+    nearest of `resolution` evenly spaced entries, so a conversion is one
+    index computation and a table read for scalars or whole arrays
+
+    the command is quantized to the table step (0.001 at the default 2001
+    entries), so ticks can differ by +-1 from converting the exact curve
+    value: about 1.5% of random steering commands and 0.8% of throttle
+    commands with the default gains, 1 tick is ~4.9us (20000us / 4096).
+    a higher resolution shrinks the share (~0.2% / 0.1% at 20001) but does
+    not remove it
+    """
+
+    def __init__(self,
+                 curve: PiecewiseLinearCurve,
+                 resolution: int = 2001,
+                 frequency: float = 50,
+                 min_pulse: float = 1000,
+                 max_pulse: float = 2000,
+                 min_command: float = -1.0,
+                 max_command: float = 1.0):
+        if resolution < 2:
+            raise ValueError("calibration resolution must be at least 2")
+        self.curve = curve
+        self.resolution = resolution
+        self.min_command = min_command
+        self.max_command = max_command
+        self._scale = (resolution - 1) / (max_command - min_command)
+
+        period_us = 1000000 / frequency
+        commands = np.linspace(min_command, max_command, resolution)
+        pulses = np.clip(curve(commands), min_pulse, max_pulse)
+
+        self.pulse_table = pulses
+        self.tick_table = (pulses * TICKS / period_us).astype(np.uint16)
+
+        #python list for the scalar path, avoids numpy scalar overhead
+        self._tick_list = self.tick_table.tolist()
+        self._pulse_list = self.pulse_table.tolist()
+
+    def _index(self, value: float) -> int:
+        value = max(self.min_command, min(self.max_command, value))
+        return int((value - self.min_command) * self._scale + 0.5)
+
+    def _indices(self, values) -> np.ndarray:
+        values = np.clip(np.asarray(values, dtype=np.float64),
+                         self.min_command, self.max_command)
+        return np.rint((values - self.min_command) * self._scale).astype(np.intp)
+
+    def ticks(self, value):
+        """pwm ticks for a scalar command or an array of commands"""
+        if np.isscalar(value):
+            return self._tick_list[self._index(value)]
+        return self.tick_table[self._indices(value)]
+
+    def pulse(self, value):
+        """pulse width (us) for a scalar command or an array of commands"""
+        if np.isscalar(value):
+            return self._pulse_list[self._index(value)]
+        return self.pulse_table[self._indices(value)]
+
+
+def _curve_from_config(section: Dict[str, Any], default: PiecewiseLinearCurve,
+                       center: float) -> PiecewiseLinearCurve:
+    """explicit `curve` points override the gain based default"""
+    if 'curve' in section:
+        return PiecewiseLinearCurve(section['curve'], center=center,
+                                    deadband_us=section.get('deadband_us', 0.0))
+    return default
+
+
+def load_calibration(config: Optional[Dict[str, Any]] = None,
+                     resolution: Optional[int] = None) -> Dict[str, CalibrationTable]:
+    """compile steering and throttle tables from hardware_config.yaml"""
+    if config is None:
+        from ..utils.config import load_hardware_config
+        config = load_hardware_config()
+
+    steering = config.get('steering', {})
+    throttle = config.get('throttle', {})
+    calibration = config.get('calibration', {})
+
+    center = calibration.get('center_pulse', 1500)
+    table_args = {
+        'resolution': resolution or calibration.get('resolution', 2001),
+        'frequency': calibration.get('pwm_frequency', 50),
+        'min_pulse': calibration.get('min_pulse', 1000),
+        'max_pulse': calibration.get('max_pulse', 2000),
+    }
+
+    steering_curve = _curve_from_config(steering, PiecewiseLinearCurve.linear(
+        gain=steering.get('gain', -0.65),
+        offset=steering.get('offset', 0.17),
+        center=center), center)
+    throttle_curve = _curve_from_config(throttle, PiecewiseLinearCurve.esc(
+        gain=throttle.get('gain', 0.8),
+        forward_range_us=throttle.get('forward_range_us', 200),
+        reverse_range_us=throttle.get('reverse_range_us', 200),
+        deadband_us=throttle.get('deadband_us', 0.0),
+        center=center), center)
+
+    return {
+        'steering': CalibrationTable(
+            steering_curve,
+            min_command=steering.get('min_value', -1.0),
+            max_command=steering.get('max_value', 1.0),
+            **table_args),
+        'throttle': CalibrationTable(
+            throttle_curve,
+            min_command=throttle.get('min_value', -1.0),
+            max_command=throttle.get('max_value', 1.0),
+            **table_args),
+    }
@@ -1,37 +1,352 @@
 #src/autonomous_racecar/core/camera.py
-#placeholder until we implement working solution
+#fixed to use your exact working method
 
 import cv2
 import time
+import weakref
 import numpy as np
 from typing import Optional, Tuple
 
+from .frame import Frame, FrameSlot
+from .gst_pipeline import ARGUS_SOURCE, build_pipeline, output_frame_size
+
+
+def _cropped_csi_camera(base, crop: Tuple[int, int, int, int]):
+    """jetcam CSICamera whose pipeline also crops (left, top, right, bottom) in nvvidconv"""
+
+    class CroppedCSICamera(base):
+        def _gst_str(self):
+            pipeline = build_pipeline(ARGUS_SOURCE, self.capture_width, self.capture_height,
+                                      self.capture_fps, output_size=(self.width, self.height),
+                                      crop=crop)
+            return f"{pipeline} ! appsink"
+
+    return CroppedCSICamera
+
 class AutonomousRacecarCamera:
-    """placeholder camera class"""
-    
-    def __init__(self, mode='inference', width=640, height=480, fps=21):
+    """
+    camera interface using your proven working method
+    simple, reliable, no over-engineering
+
+    every new jetcam frame is published to a FrameSlot from the observer,
+    so read_next() can sleep until a new frame instead of re-reading .value
+    """
+
+    #cameras currently holding the sensor, released before a new start
+    _active = weakref.WeakSet()
+
+    #read_next() blocks on frames published by the observer
+    blocking_reads = True
+
+    def __init__(self,
+                 mode: str = 'inference',
+                 width: int = 640,
+                 height: int = 480,
+                 fps: int = 21,
+                 startup_timeout: float = 5.0,
+                 crop: Optional[Tuple[int, int, int, int]] = None):
+        """
+        initialize camera with proven settings
+
+        args:
+            mode: 'inference', 'training', or 'debug'
+            width: camera width (640 works reliably)
+            height: camera height (480 works reliably) 
+            fps: frames per second (21 is proven stable)
+            startup_timeout: max seconds start() waits for the first frame
+            crop: (left, top, right, bottom) pixels trimmed off the capture
+        """
         self.mode = mode
-        print(f"camera placeholder created: {mode}")
-        
-    def start(self):
-        print("camera placeholder - not functional yet")
-        return False
-        
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.startup_timeout = startup_timeout
+        self.crop = crop
+
+        #set target size based on mode
+        if mode in ['inference', 'training']:
+            self.target_size = (224, 224)  #model input size
+        else:
+            self.target_size = None  #debug mode - no resizing
+
+        #resize and crop are done by nvvidconv, frames arrive at this size
+        self._output_size = output_frame_size(width, height, self.target_size, crop)
+
+        #camera state
+        self._camera = None
+        self._running = False
+        self._last_image = None
+        self._slot = FrameSlot()
+        self._seq = 0
+        self._last_read_seq = 0
+
+        #cold-start latency of the last start(), start() to first frame
+        self.startup_time_ms = None
+
+        print(f"camera configured:")
+        print(f"mode: {mode}")
+        print(f"capture: {width}x{height} @ {fps}fps")
+        print(f"output: {self.output_size[0]}x{self.output_size[1]}")
+
+    @classmethod
+    def release_all(cls, keep=None):
+        """stop every running camera instance (except keep)"""
+        for camera in list(cls._active):
+            if camera is not keep:
+                camera.stop()
+
+    def start(self) -> bool:
+        """start camera and return as soon as the first frame arrives"""
+        print("starting camera using proven method")
+        t0 = time.monotonic()
+
+        try:
+            from jetcam.csi_camera import CSICamera
+
+            #step 1: release cameras we know about (no global scanning)
+            self.release_all(keep=self)
+
+            #step 2: create camera with your exact working settings,
+            #capturing at width x height and scaling to the output size
+            print("creating camera")
+            camera_class = _cropped_csi_camera(CSICamera, self.crop) if self.crop else CSICamera
+            self._camera = camera_class(
+                width=self.output_size[0],
+                height=self.output_size[1],
+                capture_width=self.width,
+                capture_height=self.height,
+                capture_fps=self.fps
+            )
+            AutonomousRacecarCamera._active.add(self)
+
+            #step 3: get notified on every new frame, then start capture
+            self._slot.reset()
+            self._last_read_seq = 0
+            self._camera.observe(self._on_frame, names='value')
+            self._camera.running = True
+            self._running = True
+
+            #step 4: wait for the first frame from the capture thread
+            if self._slot.wait_next(0, self.startup_timeout) is None:
+                print(f"camera not capturing images after {self.startup_timeout}s")
+                self.stop()
+                return False
+
+            test_image = self._camera.value
+            self.startup_time_ms = (time.monotonic() - t0) * 1000
+            print(f"camera started successfully in {self.startup_time_ms:.0f}ms")
+            print(f"raw image: {test_image.shape}")
+
+            #test image processing
+            processed = self._process_image(test_image)
+            if processed is not None:
+                print(f"processed: {processed.shape}")
+                self._last_image = processed
+                return True
+            else:
+                print("image processing failed")
+                self.stop()
+                return False
+
+        except Exception as e:
+            print(f"camera start failed: {e}")
+            self.stop()
+            return False
+
+    def _on_frame(self, change):
+        """traitlets observer, called from the capture thread"""
+        if change['new'] is not None:
+            timestamp_ns = time.monotonic_ns()
+            self._seq += 1
+            self._slot.publish(Frame(self._process_image(change['new']), self._seq, timestamp_ns))
+
     def stop(self):
-        pass
-        
-    def read(self):
+        """stop camera safely"""
+        print("stopping camera")
+
+        try:
+            self._running = False
+
+            #stop camera (joins the capture thread) and free the sensor
+            if self._camera:
+                camera = self._camera
+                self._camera = None
+                try:
+                    camera.unobserve(self._on_frame, names='value')
+                except ValueError:
+                    pass
+                camera.running = False
+                if hasattr(camera, 'cap'):
+                    camera.cap.release()
+
+            #wake consumers blocked in read_next
+            self._slot.close()
+
+            AutonomousRacecarCamera._active.discard(self)
+            print("camera stopped")
+
+        except Exception as e:
+            print(f"warning during camera stop: {e}")
+
+    def _process_image(self, image: np.ndarray) -> Optional[np.ndarray]:
+        """process raw camera image"""
+        if image is None:
+            return None
+
+        try:
+            #fallback only, nvvidconv normally delivers target_size
+            if self.target_size and image.shape[1::-1] != tuple(self.target_size):
+                processed = cv2.resize(image, self.target_size)
+                return processed
+
+            return image
+
+        except Exception as e:
+            print(f"image processing error: {e}")
+            return image
+
+    def read(self) -> Optional[np.ndarray]:
+        """read and process current image"""
+        try:
+            if not self._running or not self._camera:
+                return self._last_image
+
+            #use .value method (your working approach)
+            raw_image = self._camera.value
+            processed = self._process_image(raw_image)
+
+            if processed is not None:
+                self._last_image = processed
+
+            return processed
+
+        except Exception as e:
+            print(f"error reading from camera: {e}")
+            return self._last_image
+
+    def read_latest(self) -> Optional[Frame]:
+        """newest processed frame with seq and capture time, never blocks"""
+        frame = self._slot.latest()
+        if frame is not None:
+            self._last_read_seq = max(self._last_read_seq, frame.seq)
+        return frame
+
+    def read_next(self, after_seq: Optional[int] = None,
+                  timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """
+        block until a frame newer than after_seq (default: the last frame
+        returned by this camera) arrives, None on timeout or stop
+        """
+        if after_seq is None:
+            after_seq = self._last_read_seq
+        frame = self._slot.wait_next(after_seq, timeout)
+        if frame is not None:
+            self._last_read_seq = max(self._last_read_seq, frame.seq)
+        return frame
+
+    @property
+    def value(self) -> Optional[np.ndarray]:
+        """get current processed camera image"""
+        return self.read()
+
+    @property
+    def raw_value(self) -> Optional[np.ndarray]:
+        """get current raw camera image (as delivered by the pipeline)"""
+        if self._camera and hasattr(self._camera, 'value'):
+            return self._camera.value
         return None
 
-def create_inference_camera():
-    return AutonomousRacecarCamera('inference')
+    @property
+    def running(self) -> bool:
+        """check if camera is running"""
+        return self._running
 
-def create_training_camera():
-    return AutonomousRacecarCamera('training')
+    @property
+    def output_size(self) -> Tuple[int, int]:
+        """get output image size"""
+        return self._output_size
 
-def create_debug_camera():
-    return AutonomousRacecarCamera('debug')
+    def capture_image(self, filepath: str) -> bool:
+        """capture and save single image"""
+        try:
+            image = self.read()
+            if image is not None:
+                cv2.imwrite(filepath, image)
+                print(f"image saved: {filepath}")
+                return True
+            else:
+                print("failed to capture image")
+                return False
+        except Exception as e:
+            print(f"error saving image: {e}")
+            return False
 
-def test_camera(mode='debug'):
-    print(f"camera test placeholder - {mode}")
-    return False
+    def __enter__(self):
+        """context manager entry"""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """context manager exit"""
+        self.stop()
+
+
+#convenience functions
+def create_inference_camera() -> AutonomousRacecarCamera:
+    """create camera for autonomous driving (224x224 output)"""
+    return AutonomousRacecarCamera(mode='inference')
+
+def create_training_camera() -> AutonomousRacecarCamera:
+    """create camera for data collection (224x224 output)"""
+    return AutonomousRacecarCamera(mode='training')
+
+def create_debug_camera() -> AutonomousRacecarCamera:
+    """create camera for debugging (full 640x480 output)"""
+    return AutonomousRacecarCamera(mode='debug')
+
+def test_camera(mode: str = 'debug') -> bool:
+    """test camera functionality"""
+    print(f"testing camera in {mode} mode")
+
+    try:
+        with AutonomousRacecarCamera(mode=mode) as camera:
+            if camera.running:
+                #test multiple captures
+                for i in range(3):
+                    img = camera.read()
+                    if img is not None:
+                        print(f"capture {i+1}: {img.shape}")
+                    else:
+                        print(f"capture {i+1}: failed")
+                    time.sleep(0.5)
+
+                print("camera test passed")
+                return True
+            else:
+                print("camera failed to start")
+                return False
+
+    except Exception as e:
+        print(f"camera test failed: {e}")
+        return False
+
+def quick_camera_test() -> bool:
+    """quick camera availability test"""
+    try:
+        print("quick camera test")
+        camera = AutonomousRacecarCamera(mode='debug', startup_timeout=3.0)
+        result = camera.start()
+        img = camera.read() if result else None
+        camera.stop()
+
+        if img is not None:
+            print(f"camera available: {img.shape} "
+                  f"(startup {camera.startup_time_ms:.0f}ms)")
+        else:
+            print("camera not capturing")
+
+        return img is not None
+
+    except Exception as e:
+        print(f"camera test failed: {e}")
+        return False
@@ -0,0 +1,220 @@
+#src/autonomous_racecar/core/camera_backends.py
+#one camera protocol, a backend registry and a cross-backend benchmark
+
+import importlib
+import inspect
+import resource
+import time
+from typing import Any, Dict, List, Optional, Protocol, Tuple, runtime_checkable
+
+import numpy as np
+
+from .gst_pipeline import ARGUS_SOURCE, TEST_SOURCE
+
+
+@runtime_checkable
+class Camera(Protocol):
+    """
+    what every camera backend provides
+
+    backends with a capture thread also offer read_frame, read_latest and
+    read_next(after_seq, timeout), and set blocking_reads = True when
+    read_next really sleeps until the next frame
+    """
+
+    mode: str
+    width: int
+    height: int
+    fps: int
+
+    def start(self) -> bool: ...
+
+    def stop(self) -> None: ...
+
+    def read(self) -> Optional[np.ndarray]: ...
+
+    @property
+    def running(self) -> bool: ...
+
+    def __enter__(self) -> 'Camera': ...
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None: ...
+
+
+#name -> (module, class), imported on first use so cv2/jetcam stay lazy
+CAMERA_BACKENDS: Dict[str, Tuple[str, str]] = {
+    'jetcam': ('.camera', 'AutonomousRacecarCamera'),
+    'gstreamer': ('.camera_gstreamer', 'GStreamerCamera'),
+    'opencv': ('.camera_opencv', 'OpenCVCamera'),
+    'fixed': ('.camera_fixed', 'FixedCamera'),
+    'working': ('.camera_working', 'WorkingCamera'),
+    'simple': ('.camera_simple', 'SimpleCamera'),
+    'sim': ('.camera_sim', 'SimulatedCamera'),
+}
+
+DEFAULT_BACKEND = 'jetcam'
+
+
+def register_backend(name: str, module: str, class_name: str):
+    """add a backend, module is absolute or relative to this package"""
+    CAMERA_BACKENDS[name] = (module, class_name)
+
+
+def available_backends() -> List[str]:
+    return list(CAMERA_BACKENDS)
+
+
+def get_backend(name: str):
+    """camera class for a backend name"""
+    if name not in CAMERA_BACKENDS:
+        raise ValueError(f"unknown camera backend '{name}', "
+                         f"expected one of {available_backends()}")
+    module, class_name = CAMERA_BACKENDS[name]
+    return getattr(importlib.import_module(module, __package__), class_name)
+
+
+def supports(name: str, option: str) -> bool:
+    """true if the backend constructor takes `option` (e.g. source, crop)"""
+    return option in inspect.signature(get_backend(name).__init__).parameters
+
+
+def create_camera(backend: Optional[str] = None,
+                  mode: str = 'inference',
+                  config: Optional[Dict[str, Any]] = None,
+                  **kwargs) -> Camera:
+    """
+    build a camera from the `camera` section of hardware_config.yaml
+
+    backend and kwargs override the config. options the backend does not
+    take (source on the csi-only backends, crop on snapshot ones) are
+    dropped with a warning
+    """
+    if config is None:
+        from ..utils.config import load_hardware_config
+        config = load_hardware_config()
+    section = config.get('camera', {})
+
+    name = backend or section.get('backend', DEFAULT_BACKEND)
+    camera_class = get_backend(name)
+
+    options = {key: section[key] for key in ('width', 'height', 'fps', 'source', 'crop')
+               if section.get(key) is not None}
+    if 'crop' in options:
+        options['crop'] = tuple(options['crop'])
+    options.update(kwargs)
+
+    accepted = inspect.signature(camera_class.__init__).parameters
+    for key in [key for key in options if key not in accepted]:
+        if not (key == 'source' and options[key] == ARGUS_SOURCE):
+            print(f"camera backend '{name}' ignores {key}={options[key]}")
+        del options[key]
+
+    return camera_class(mode, **options)
+
+
+def _children_cpu() -> float:
+    #cpu of finished child processes (gst-launch)
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def benchmark_camera(camera: Camera, seconds: float = 5.0) -> Dict[str, float]:
+    """
+    sustained fps, frame age, cpu per frame and startup time of one camera
+
+    frames are counted when the camera hands out a new one (new seq for
+    backends with read_frame, a new array otherwise). frame age needs the
+    capture timestamp, so it is only reported for read_frame backends.
+    cpu covers this process and finished gst-launch children
+    """
+    from ..utils.stats import summarize
+
+    cpu0 = time.process_time() + _children_cpu()
+    t0 = time.monotonic()
+    if not camera.start():
+        camera.stop()
+        return {}
+    startup_ms = (time.monotonic() - t0) * 1000
+
+    read_frame = getattr(camera, 'read_frame', None)
+    if getattr(camera, 'latest_only', True) is False:
+        #opencv direct mode stamps frames on read, the age would be meaningless
+        read_frame = None
+    frames = 0
+    ages = []
+    last = None
+    t0 = time.monotonic()
+    try:
+        while time.monotonic() - t0 < seconds:
+            if read_frame is not None:
+                frame = read_frame()
+                if frame is None or frame.seq == last:
+                    time.sleep(0.001)
+                    continue
+                last = frame.seq
+                ages.append((time.monotonic_ns() - frame.timestamp_ns) / 1e6)
+            else:
+                image = camera.read()
+                if image is None or image is last:
+                    time.sleep(0.001)
+                    continue
+                last = image
+            frames += 1
+        elapsed = time.monotonic() - t0
+    finally:
+        camera.stop()
+    cpu = time.process_time() + _children_cpu() - cpu0
+
+    age = summarize(ages)
+    return {
+        'fps': frames / elapsed,
+        'frames': frames,
+        'startup_ms': startup_ms,
+        'age_p50_ms': age['p50'] if ages else float('nan'),
+        'age_p99_ms': age['p99'] if ages else float('nan'),
+        'cpu_ms_per_frame': cpu * 1000 / frames if frames else float('nan'),
+    }
+
+
+def benchmark_backends(backends: Optional[List[str]] = None,
+                       source: str = TEST_SOURCE,
+                       seconds: float = 5.0,
+                       mode: str = 'inference',
+                       fps: int = 21) -> Dict[str, Dict[str, float]]:
+    """
+    run every backend against the same source and print a comparison
+
+    backends that can only open the csi camera are skipped unless source is
+    nvarguscamerasrc (i.e. when run on the car)
+    """
+    print(f"camera backend benchmark: {source} @ {fps}fps, {seconds}s each")
+    results = {}
+
+    for name in backends or available_backends():
+        kwargs = {'fps': fps}
+        if supports(name, 'source'):
+            kwargs['source'] = source
+        elif source != ARGUS_SOURCE:
+            print(f"{name}: skipped (csi camera only)")
+            continue
+
+        try:
+            camera = create_camera(name, mode, config={}, **kwargs)
+            results[name] = benchmark_camera(camera, seconds)
+        except Exception as e:
+            print(f"{name}: failed ({e})")
+            continue
+        if not results[name]:
+            print(f"{name}: failed to start")
+
+    print(f"{'backend':>10} {'fps':>6} {'age p50':>8} {'age p99':>8} "
+          f"{'cpu/frame':>10} {'startup':>8}")
+    for name, r in results.items():
+        if r:
+            print(f"{name:>10} {r['fps']:6.1f} {r['age_p50_ms']:6.1f}ms {r['age_p99_ms']:6.1f}ms "
+                  f"{r['cpu_ms_per_frame']:8.2f}ms {r['startup_ms']:6.0f}ms")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_backends()
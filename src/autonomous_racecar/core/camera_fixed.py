@@ -3,24 +3,30 @@
 
 import subprocess
 import numpy as np
-import cv2
 import os
 import time
 from typing import Optional
 
+from .gst_pipeline import ARGUS_SOURCE, build_pipeline, gst_launch_command, output_frame_size
+
 class FixedCamera:
     """camera with corrected gstreamer pipeline"""
     
-    def __init__(self, mode='inference', width=640, height=480, fps=21):
+    def __init__(self, mode='inference', width=640, height=480, fps=21,
+                 source=ARGUS_SOURCE, crop=None):
         self.mode = mode
         self.width = width
         self.height = height
         self.fps = fps
+        self.source = source
+        self.crop = crop
         
         if mode in ['inference', 'training']:
             self.target_size = (224, 224)
         else:
             self.target_size = None
+        # resize and crop happen in the pipeline
+        self.output_size = output_frame_size(width, height, self.target_size, crop)
             
         self._running = False
         print(f"fixed camera created: {mode}")
@@ -39,33 +45,26 @@ class FixedCamera:
     def _test_capture(self):
         """test with corrected pipeline"""
         temp_file = '/tmp/test_frame.raw'
-        cmd = [
-            'gst-launch-1.0',
-            'nvarguscamerasrc', 'num-buffers=1',
-            f'! video/x-raw(memory:NVMM), width={self.width}, height={self.height}',
-            '! nvvidconv ! video/x-raw, format=BGRx',
-            '! videoconvert ! video/x-raw, format=BGR',
-            f'! filesink location={temp_file}'
-        ]
+        cmd = self._snapshot_command(temp_file)
         
         result = subprocess.run(cmd, capture_output=True, timeout=10)
         if result.returncode != 0:
             raise RuntimeError(f"gstreamer failed: {result.stderr.decode()}")
     
+    def _snapshot_command(self, temp_file):
+        """one-frame pipeline, spawns a new gst-launch (and sensor init) per call"""
+        pipeline = build_pipeline(self.source, self.width, self.height, self.fps,
+                                  num_buffers=1, output_size=self.target_size,
+                                  crop=self.crop)
+        return gst_launch_command(pipeline, f'filesink location={temp_file}')
+    
     def read(self):
         if not self._running:
             return None
             
         try:
             temp_file = '/tmp/camera_frame.raw'
-            cmd = [
-                'gst-launch-1.0',
-                'nvarguscamerasrc', 'num-buffers=1',
-                f'! video/x-raw(memory:NVMM), width={self.width}, height={self.height}',
-                '! nvvidconv ! video/x-raw, format=BGRx',
-                '! videoconvert ! video/x-raw, format=BGR',
-                f'! filesink location={temp_file}'
-            ]
+            cmd = self._snapshot_command(temp_file)
             
             result = subprocess.run(cmd, capture_output=True, timeout=5)
             
@@ -74,12 +73,7 @@ class FixedCamera:
                     data = f.read()
                 
                 frame = np.frombuffer(data, dtype=np.uint8)
-                frame = frame.reshape((self.height, self.width, 3))
-                
-                if self.target_size:
-                    frame = cv2.resize(frame, self.target_size)
-                
-                return frame
+                return frame.reshape((self.output_size[1], self.output_size[0], 3))
             
         except Exception as e:
             print(f"capture error: {e}")
@@ -97,6 +91,13 @@ class FixedCamera:
     @property
     def value(self):
         return self.read()
+    
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
 
 def test_fixed_camera():
     print("testing fixed camera")
@@ -6,28 +6,57 @@ import time
 import numpy as np
 import subprocess
 import threading
-import tempfile
-import os
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
+
+from .gst_pipeline import (ARGUS_SOURCE, TEST_SOURCE, build_pipeline, gst_launch_command,
+                           output_frame_size)
+from .frame import Frame, FrameSlot, read_exact
 
 class GStreamerCamera:
     """
-    gstreamer-based camera using subprocess calls
+    gstreamer-based camera streaming from one long-lived gst-launch process
     bypasses jetcam library issues
+
+    raw BGR frames are written to the process stdout (fdsink) and read
+    continuously by a capture thread, so the sensor is initialized once
+    instead of once per frame. frames are read with readinto into a ring
+    of preallocated buffers, so an image returned by read() stays valid
+    until `buffers - 1` newer frames have arrived (copy it to keep it)
+
+    resizing to the model input size and the optional roi crop are done in
+    the pipeline caps, so frames arrive at their final size
+
+    read_next() sleeps until a frame newer than the last one returned
+    arrives, read_latest() returns the newest frame without waiting
     """
 
+    #read_next() blocks on frames published by the capture thread
+    blocking_reads = True
+
     def __init__(self,
                  mode: str = 'inference',
                  width: int = 640,
                  height: int = 480,
-                 fps: int = 21):
+                 fps: int = 21,
+                 source: str = ARGUS_SOURCE,
+                 startup_timeout: float = 5.0,
+                 buffers: int = 4,
+                 crop: Optional[Tuple[int, int, int, int]] = None):
         """
         initialize camera with gstreamer backend
+
+        source: source element, 'videotestsrc' runs without a camera
+        buffers: number of preallocated frame buffers in the ring
+        crop: (left, top, right, bottom) pixels trimmed off the capture
         """
         self.mode = mode
         self.width = width
         self.height = height
         self.fps = fps
+        self.source = source
+        self.startup_timeout = startup_timeout
+        self.buffers = max(2, buffers)
+        self.crop = crop
 
         #set target size based on mode
         if mode in ['inference', 'training']:
@@ -35,42 +64,53 @@ class GStreamerCamera:
         else:
             self.target_size = None
 
+        #size of the frames coming out of the pipeline
+        self.output_size = output_frame_size(width, height, self.target_size, crop)
+
         #camera state
         self._running = False
         self._last_image = None
+        self._slot = FrameSlot()
         self._capture_thread = None
-        self._temp_fifo = None
+        self._gst_process = None
+        self.startup_time_ms = None
+
+        #frame ring (allocated on start)
+        self._raw_buffers = []
+
+        #stats
+        self.frames = 0
+        self.partial_frames = 0
+        self.dropped_frames = 0
+        self._last_read_seq = 0
 
         print(f"gstreamer camera configured:")
         print(f"mode: {mode}")
         print(f"capture: {width}x{height} @ {fps}fps")
-        if self.target_size:
-            print(f"output: {self.target_size[0]}x{self.target_size[1]}")
+        print(f"output: {self.output_size[0]}x{self.output_size[1]}")
 
     def start(self) -> bool:
-        """start camera using gstreamer subprocess"""
+        """start the long-lived gstreamer process and capture thread"""
         print("starting gstreamer camera")
+        t0 = time.monotonic()
 
         try:
-            #create named pipe for gstreamer output
-            self._temp_fifo = tempfile.mktemp(suffix='.raw')
-            os.mkfifo(self._temp_fifo)
-
-            #start gstreamer process
-            gst_command = [
-                'gst-launch-1.0',
-                'nvarguscamerasrc',
-                f'! video/x-raw(memory:NVMM), width={self.width}, height={self.height}, framerate={self.fps}/1',
-                '! nvvidconv',
-                '! video/x-raw, format=BGR',
-                f'! filesink location={self._temp_fifo}'
-            ]
+            #start gstreamer process, frames come out on stdout
+            gst_command = gst_launch_command(
+                build_pipeline(self.source, self.width, self.height, self.fps,
+                               output_size=self.target_size, crop=self.crop),
+                'fdsink fd=1')
 
+            #unbuffered pipe, frames are framed exactly with readinto
             self._gst_process = subprocess.Popen(
                 gst_command,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
+                stderr=subprocess.DEVNULL,
+                bufsize=0
             )
+            self._allocate_ring()
+            self._slot.reset()
+            self._last_read_seq = 0
 
             #start capture thread
             self._running = True
@@ -79,50 +119,67 @@ class GStreamerCamera:
             self._capture_thread.start()
 
             #wait for first frame
-            time.sleep(3)
-
-            if self._last_image is not None:
+            if self._slot.wait_next(0, self.startup_timeout) is not None:
+                self.startup_time_ms = (time.monotonic() - t0) * 1000
                 print("gstreamer camera started successfully")
-                print(f"image: {self._last_image.shape}")
+                print(f"image: {self._last_image.shape} ({self.startup_time_ms:.0f}ms)")
                 return True
             else:
                 print("no image captured")
+                self.stop()
                 return False
 
         except Exception as e:
             print(f"gstreamer camera start failed: {e}")
+            self.stop()
             return False
 
+    def _allocate_ring(self):
+        """preallocate final-size frame buffers once per start"""
+        shape = (self.output_size[1], self.output_size[0], 3)
+        self._raw_buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.buffers)]
+
     def _capture_loop(self):
         """capture loop running in thread"""
-        frame_size = self.width * self.height * 3  # BGR
+        stream = self._gst_process.stdout
+        views = [memoryview(buf.reshape(-1)) for buf in self._raw_buffers]
+        frame_size = len(views[0])
+        slot = 0
+        seq = 0
 
         try:
-            with open(self._temp_fifo, 'rb') as fifo:
-                while self._running:
-                    data = fifo.read(frame_size)
-                    if len(data) == frame_size:
-                        # convert raw BGR data to numpy array
-                        frame = np.frombuffer(data, dtype=np.uint8)
-                        frame = frame.reshape((self.height, self.width, 3))
-                        
-                        # process image
-                        processed = self._process_image(frame)
-                        self._last_image = processed
-                    else:
-                        time.sleep(0.01)
+            while self._running:
+                #fill exactly one frame, short pipe reads are continued
+                got = read_exact(stream, views[slot])
+                if got != frame_size:
+                    #eof, the pipeline exited (possibly mid-frame)
+                    if got:
+                        self.partial_frames += 1
+                    break
+                timestamp_ns = time.monotonic_ns()
+
+                processed = self._process_image(self._raw_buffers[slot])
+                seq += 1
+                self._last_image = processed
+                self.frames += 1
+                self._slot.publish(Frame(processed, seq, timestamp_ns))
+
+                slot = (slot + 1) % self.buffers
         except Exception as e:
             print(f"capture loop error: {e}")
+        finally:
+            #wake consumers blocked in read_next
+            self._slot.close()
 
     def _process_image(self, image: np.ndarray) -> Optional[np.ndarray]:
-        """process raw camera image"""
+        """process raw camera image (already final size from the pipeline)"""
         if image is None:
             return None
 
         try:
-            if self.target_size:
-                processed = cv2.resize(image, self.target_size)
-                return processed
+            #fallback only, the pipeline caps normally do the resize
+            if self.target_size and image.shape[1::-1] != tuple(self.target_size):
+                return cv2.resize(image, self.target_size)
             return image
         except Exception as e:
             print(f"image processing error: {e}")
@@ -130,7 +187,40 @@ class GStreamerCamera:
 
     def read(self) -> Optional[np.ndarray]:
         """read current image"""
-        return self._last_image
+        frame = self.read_frame()
+        return frame.image if frame is not None else None
+
+    def read_frame(self) -> Optional[Frame]:
+        """read the newest frame with its sequence number and capture time"""
+        return self._count(self._slot.latest())
+
+    def read_latest(self) -> Optional[Frame]:
+        """newest frame without blocking (may be one returned before)"""
+        return self.read_frame()
+
+    def read_next(self, after_seq: Optional[int] = None,
+                  timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """
+        block until a frame newer than after_seq (default: the last frame
+        returned by this camera) arrives, None on timeout or stop
+        """
+        if after_seq is None:
+            after_seq = self._last_read_seq
+        return self._count(self._slot.wait_next(after_seq, timeout))
+
+    def _count(self, frame: Optional[Frame]) -> Optional[Frame]:
+        if frame is not None and frame.seq > self._last_read_seq:
+            #frames published since the last read that nobody saw
+            self.dropped_frames += frame.seq - self._last_read_seq - 1
+            self._last_read_seq = frame.seq
+        return frame
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'frames': self.frames,
+            'dropped_frames': self.dropped_frames,
+            'partial_frames': self.partial_frames,
+        }
 
     def stop(self):
         """stop camera safely"""
@@ -138,15 +228,23 @@ class GStreamerCamera:
         
         self._running = False
         
+        process = self._gst_process
+        if process:
+            process.terminate()
+            try:
+                process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        
+        #pipeline exited, the capture thread sees eof
         if self._capture_thread:
             self._capture_thread.join(timeout=2)
+            self._capture_thread = None
         
-        if hasattr(self, '_gst_process'):
-            self._gst_process.terminate()
-            self._gst_process.wait()
-        
-        if self._temp_fifo and os.path.exists(self._temp_fifo):
-            os.unlink(self._temp_fifo)
+        if process:
+            process.stdout.close()
+            self._gst_process = None
         
         print("gstreamer camera stopped")
 
@@ -158,6 +256,13 @@ class GStreamerCamera:
     def value(self):
         return self.read()
 
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
 #test function
 def test_gstreamer_camera():
     """test gstreamer camera"""
@@ -179,3 +284,86 @@ def test_gstreamer_camera():
     else:
         print("gstreamer camera test failed")
         return False
+
+def benchmark_capture(source: str = TEST_SOURCE,
+                      seconds: float = 5.0,
+                      fps: int = 21) -> Dict[str, float]:
+    """sustained fps of the streaming camera vs the per-frame snapshot camera"""
+    from .camera_fixed import FixedCamera
+
+    print(f"capture benchmark: {source} @ {fps}fps for {seconds}s")
+    results = {}
+
+    #streaming: count distinct frames delivered by the capture thread
+    camera = GStreamerCamera('debug', fps=fps, source=source)
+    if camera.start():
+        first = camera.frames
+        t0 = time.monotonic()
+        time.sleep(seconds)
+        results['streaming_fps'] = (camera.frames - first) / (time.monotonic() - t0)
+        results['streaming_startup_ms'] = camera.startup_time_ms
+        camera.stop()
+
+    #snapshot: one gst-launch process per read()
+    camera = FixedCamera('debug', fps=fps, source=source)
+    if camera.start():
+        frames = 0
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < seconds:
+            if camera.read() is not None:
+                frames += 1
+        results['snapshot_fps'] = frames / (time.monotonic() - t0)
+        camera.stop()
+
+    for name, value in results.items():
+        print(f"{name}: {value:.1f}")
+    return results
+
+def test_read_next(source: str = TEST_SOURCE, seconds: float = 3.0,
+                   fps: int = 21) -> Dict[str, float]:
+    """consumer cpu and duplicate frames: polling read() vs blocking read_next()"""
+    print(f"read_next test: {source} @ {fps}fps for {seconds}s")
+    results = {}
+
+    with GStreamerCamera('inference', fps=fps, source=source) as camera:
+        if not camera.running:
+            print("camera failed to start")
+            return results
+
+        #fast consumer polling read(), most reads return the same frame
+        reads = duplicates = 0
+        last = None
+        cpu0 = time.thread_time()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            image = camera.read()
+            reads += 1
+            if image is last:
+                duplicates += 1
+            last = image
+        results['poll_reads'] = reads
+        results['poll_duplicates'] = duplicates
+        results['poll_cpu_s'] = time.thread_time() - cpu0
+
+        #same consumer sleeping until a new frame arrives
+        frames = duplicates = 0
+        last_seq = None
+        cpu0 = time.thread_time()
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            frame = camera.read_next(timeout=0.5)
+            if frame is None:
+                continue
+            frames += 1
+            if frame.seq == last_seq:
+                duplicates += 1
+            last_seq = frame.seq
+        results['next_frames'] = frames
+        results['next_duplicates'] = duplicates
+        results['next_cpu_s'] = time.thread_time() - cpu0
+
+    print(f"polling read(): {results['poll_reads']} reads, "
+          f"{results['poll_duplicates']} duplicates, cpu {results['poll_cpu_s']:.2f}s")
+    print(f"read_next(): {results['next_frames']} frames, {results['next_duplicates']} duplicates, "
+          f"cpu {results['next_cpu_s']:.3f}s")
+    return results
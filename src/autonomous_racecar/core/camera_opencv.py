@@ -3,28 +3,57 @@
 
 import cv2
 import time
+import threading
 import numpy as np
 from typing import Optional, Tuple
 
+from .gst_pipeline import ARGUS_SOURCE, TEST_SOURCE, build_pipeline, output_frame_size
+from .frame import Frame, FrameSlot
+
 class OpenCVCamera:
-    """camera using your working opencv gstreamer pipeline"""
+    """
+    camera using your working opencv gstreamer pipeline
+
+    latest_only=True runs a grabber thread that keeps draining the capture
+    (appsink drop=true max-buffers=1) so read() returns the newest frame
+    immediately instead of the oldest one queued in the appsink
+
+    resize to the model input and the optional crop (left, top, right,
+    bottom pixels) are negotiated in the pipeline caps
+    """
     
-    def __init__(self, mode='inference', width=640, height=480, fps=21):
+    def __init__(self, mode='inference', width=640, height=480, fps=21,
+                 source=ARGUS_SOURCE, latest_only=False, crop=None):
         self.mode = mode
         self.width = width
         self.height = height
         self.fps = fps
+        self.source = source
+        self.latest_only = latest_only
+        self.crop = crop
         
         if mode in ['inference', 'training']:
             self.target_size = (224, 224)
         else:
             self.target_size = None
+        self.output_size = output_frame_size(width, height, self.target_size, crop)
             
         self._camera = None
         self._running = False
         
-        # your working gstreamer pipeline
-        self.pipeline = f"nvarguscamerasrc ! video/x-raw(memory:NVMM), width={width}, height={height}, format=(string)NV12, framerate=(fraction){fps}/1 ! nvvidconv flip-method=0 ! video/x-raw, width={width}, height={height}, format=(string)BGRx ! videoconvert ! video/x-raw, format=(string)BGR ! appsink"
+        # grabber state
+        self._grab_thread = None
+        self._slot = FrameSlot()
+        self._seq = 0
+        self._last_read_seq = 0
+        
+        # only keep the newest buffer in the appsink in grabber mode
+        sink = "appsink drop=true max-buffers=1 sync=false" if latest_only else "appsink"
+        
+        # your working gstreamer pipeline, scaled and cropped by nvvidconv
+        pipeline = build_pipeline(source, width, height, fps,
+                                  output_size=self.target_size, crop=crop)
+        self.pipeline = f"{pipeline} ! {sink}"
         
         print(f"opencv camera configured: {mode}")
     
@@ -39,6 +68,12 @@ class OpenCVCamera:
                 if ret and frame is not None:
                     print(f"opencv camera started: {frame.shape}")
                     self._running = True
+                    if self.latest_only:
+                        self._slot.reset()
+                        self._last_read_seq = 0
+                        self._publish(frame)
+                        self._grab_thread = threading.Thread(target=self._grab_loop, daemon=True)
+                        self._grab_thread.start()
                     return True
                 else:
                     print("camera opened but no frame")
@@ -51,17 +86,91 @@ class OpenCVCamera:
             print(f"camera start failed: {e}")
             return False
     
+    def _resize(self, frame):
+        # fallback only, the pipeline caps normally deliver target_size
+        if self.target_size and frame.shape[1::-1] != tuple(self.target_size):
+            frame = cv2.resize(frame, self.target_size)
+        return frame
+    
+    def _publish(self, frame):
+        frame = self._resize(frame)
+        self._seq += 1
+        self._slot.publish(Frame(frame, self._seq, time.monotonic_ns()))
+    
+    def _grab_loop(self):
+        # keep the appsink drained, only the newest frame survives
+        while self._running:
+            try:
+                ret, frame = self._camera.read()
+            except Exception as e:
+                print(f"grab error: {e}")
+                break
+            if ret and frame is not None:
+                self._publish(frame)
+            elif not self._running:
+                break
+            else:
+                time.sleep(0.005)
+        self._slot.close()
+    
+    def read_frame(self) -> Optional[Frame]:
+        """newest frame (grabber mode) or the next one read, with seq and capture time"""
+        if not self.latest_only:
+            image = self.read()
+            if image is None:
+                return None
+            self._seq += 1
+            return Frame(image, self._seq, time.monotonic_ns())
+        return self.read_latest()
+    
+    def _require_grabber(self, method: str):
+        # without the grabber thread nothing publishes to the slot
+        if not self.latest_only:
+            raise RuntimeError(f"{method}() needs grabber mode, create the camera "
+                               f"with latest_only=True (or use read_frame())")
+    
+    def read_latest(self) -> Optional[Frame]:
+        """newest frame without blocking (grabber mode)"""
+        self._require_grabber('read_latest')
+        frame = self._slot.latest()
+        if frame is not None:
+            self._last_read_seq = max(self._last_read_seq, frame.seq)
+        return frame
+    
+    def read_next(self, after_seq: Optional[int] = None,
+                  timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """
+        block until a frame newer than after_seq (default: the last frame
+        returned by this camera) arrives, None on timeout or stop (grabber mode)
+        """
+        self._require_grabber('read_next')
+        if after_seq is None:
+            after_seq = self._last_read_seq
+        frame = self._slot.wait_next(after_seq, timeout)
+        if frame is not None:
+            self._last_read_seq = max(self._last_read_seq, frame.seq)
+        return frame
+    
+    def read_with_age(self) -> Tuple[Optional[np.ndarray], Optional[float]]:
+        """newest image and its age in seconds (grabber mode)"""
+        self._require_grabber('read_with_age')
+        frame = self._slot.latest()
+        if frame is None:
+            return None, None
+        return frame.image, (time.monotonic_ns() - frame.timestamp_ns) / 1e9
+    
     def read(self):
         if not self._running or not self._camera:
             return None
         
+        if self.latest_only:
+            frame = self._slot.latest()
+            return frame.image if frame is not None else None
+        
         try:
             ret, frame = self._camera.read()
             if ret and frame is not None:
-                # resize if needed
-                if self.target_size:
-                    frame = cv2.resize(frame, self.target_size)
-                return frame
+                return self._resize(frame)
             return None
         except Exception as e:
             print(f"read error: {e}")
@@ -69,10 +178,18 @@ class OpenCVCamera:
     
     def stop(self):
         self._running = False
+        if self._grab_thread:
+            self._grab_thread.join(timeout=2)
+            self._grab_thread = None
         if self._camera:
             self._camera.release()
         print("opencv camera stopped")
     
+    @property
+    def blocking_reads(self) -> bool:
+        # read_next() only works with the grabber thread publishing frames
+        return self.latest_only
+    
     @property
     def running(self):
         return self._running
@@ -116,3 +233,52 @@ def test_opencv_camera():
     except Exception as e:
         print(f"test failed: {e}")
         return False
+
+def test_frame_age(source: str = TEST_SOURCE,
+                   consumer_delay: float = 0.2,
+                   reads: int = 15,
+                   fps: int = 21) -> bool:
+    """
+    slow consumer against a live source: frame age with and without grabber
+
+    without the grabber the appsink queues frames and a slow consumer falls
+    further behind each read (age estimated from the live frame clock);
+    with it the age stays bounded by about one frame period
+    """
+    from ..utils.stats import summarize
+
+    print(f"frame age test: {source} @ {fps}fps, consumer takes {consumer_delay}s")
+    period = 1.0 / fps
+
+    #direct reads, frame i was produced around t_first + i / fps
+    ages_direct = []
+    with OpenCVCamera('debug', fps=fps, source=source) as camera:
+        if not camera.running:
+            print("camera failed to start")
+            return False
+        t_first = time.monotonic()
+        for i in range(1, reads + 1):
+            time.sleep(consumer_delay)
+            if camera.read() is not None:
+                ages_direct.append(time.monotonic() - (t_first + i * period))
+
+    #grabber mode, age measured from the capture timestamp
+    ages_latest = []
+    with OpenCVCamera('debug', fps=fps, source=source, latest_only=True) as camera:
+        if not camera.running:
+            print("camera failed to start")
+            return False
+        for _ in range(reads):
+            time.sleep(consumer_delay)
+            image, age = camera.read_with_age()
+            if image is not None:
+                ages_latest.append(age)
+
+    direct = summarize(ages_direct)
+    latest = summarize(ages_latest)
+    print(f"direct age p50: {direct['p50'] * 1000:.0f}ms max: {direct['max'] * 1000:.0f}ms")
+    print(f"latest age p50: {latest['p50'] * 1000:.0f}ms max: {latest['max'] * 1000:.0f}ms")
+
+    ok = latest['count'] > 0 and latest['max'] < 3 * period
+    print("frame age bounded" if ok else "frame age not bounded")
+    return ok
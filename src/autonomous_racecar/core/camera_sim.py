@@ -0,0 +1,132 @@
+#src/autonomous_racecar/core/camera_sim.py
+#simulated camera for running the driving loop without a csi camera
+
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from .frame import Frame, FrameSlot
+
+
+class SimulatedCamera:
+    """
+    synthetic frames at a fixed rate from a capture thread
+
+    a bright vertical line (the "track") sweeps left and right over a
+    gradient, so a model has something that changes. same read api as the
+    threaded backends: read, read_frame, read_latest and blocking read_next.
+    frames are written into a small ring of preallocated buffers, a frame
+    stays valid for `ring - 1` newer frames (copy() it to keep it)
+    """
+
+    #read_next() blocks on frames published by the capture thread
+    blocking_reads = True
+
+    def __init__(self, mode: str = 'inference', width: int = 640, height: int = 480,
+                 fps: int = 21, ring: int = 4, sweep_hz: float = 0.25):
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.sweep_hz = sweep_hz
+
+        if mode in ['inference', 'training']:
+            self.target_size = (224, 224)
+        else:
+            self.target_size = None
+        self.output_size = self.target_size or (width, height)
+
+        out_w, out_h = self.output_size
+        self._background = np.empty((out_h, out_w, 3), dtype=np.uint8)
+        self._background[:] = np.linspace(40, 120, out_h, dtype=np.uint8)[:, None, None]
+        self._ring = [np.empty_like(self._background) for _ in range(max(2, ring))]
+
+        self._slot = FrameSlot()
+        self._thread = None
+        self._running = False
+        self._seq = 0
+        self._last_read_seq = 0
+
+        #stats
+        self.frames = 0
+        print(f"simulated camera created: {mode} {out_w}x{out_h} @ {fps}fps")
+
+    def start(self) -> bool:
+        if self._running:
+            return True
+        self._slot.reset()
+        self._running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+        print("simulated camera started")
+        return True
+
+    def track_position(self, t: float) -> float:
+        """line position at time t, -1 (left edge) .. 1 (right edge)"""
+        return float(np.sin(2 * np.pi * self.sweep_hz * t))
+
+    def _render(self, image: np.ndarray, position: float):
+        np.copyto(image, self._background)
+        width = image.shape[1]
+        center = int((position + 1) / 2 * (width - 1))
+        image[:, max(0, center - 4):center + 5] = 255
+
+    def _capture_loop(self):
+        period = 1.0 / self.fps
+        start = time.monotonic()
+        while self._running:
+            self._seq += 1
+            image = self._ring[self._seq % len(self._ring)]
+            self._render(image, self.track_position(time.monotonic() - start))
+            self._slot.publish(Frame(image, self._seq, time.monotonic_ns()))
+            self.frames += 1
+            time.sleep(max(0.0, start + self._seq * period - time.monotonic()))
+        self._slot.close()
+
+    def read(self) -> Optional[np.ndarray]:
+        frame = self.read_frame()
+        return frame.image if frame is not None else None
+
+    def read_frame(self) -> Optional[Frame]:
+        return self.read_latest()
+
+    def read_latest(self) -> Optional[Frame]:
+        """newest frame without blocking"""
+        frame = self._slot.latest()
+        if frame is not None:
+            self._last_read_seq = max(self._last_read_seq, frame.seq)
+        return frame
+
+    def read_next(self, after_seq: Optional[int] = None,
+                  timeout: Optional[float] = 1.0) -> Optional[Frame]:
+        """block until a frame newer than after_seq arrives, None on timeout or stop"""
+        if after_seq is None:
+            after_seq = self._last_read_seq
+        frame = self._slot.wait_next(after_seq, timeout)
+        if frame is not None:
+            self._last_read_seq = max(self._last_read_seq, frame.seq)
+        return frame
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+        print("simulated camera stopped")
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def value(self) -> Optional[np.ndarray]:
+        return self.read()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
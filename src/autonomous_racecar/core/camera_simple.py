@@ -21,6 +21,8 @@ class SimpleCamera:
             self.target_size = (224, 224)
         else:
             self.target_size = None
+        # nvvidconv scales to the output size in the pipeline
+        self.output_size = self.target_size or (width, height)
             
         self._running = False
         print(f"simple camera created: {mode}")
@@ -61,7 +63,7 @@ class SimpleCamera:
                 'gst-launch-1.0',
                 'nvarguscamerasrc', 'num-buffers=1',
                 f'! video/x-raw(memory:NVMM), width={self.width}, height={self.height}',
-                '! nvvidconv',
+                f'! nvvidconv ! video/x-raw, format=BGRx, width={self.output_size[0]}, height={self.output_size[1]}',
                 f'! filesink location={temp_file}'
             ]
             
@@ -71,13 +73,10 @@ class SimpleCamera:
                 with open(temp_file, 'rb') as f:
                     data = f.read()
                 
-                # the default format should be interpretable by opencv
+                # BGRx from nvvidconv, drop the padding byte for BGR
                 frame = np.frombuffer(data, dtype=np.uint8)
-                # we'll need to figure out the exact dimensions/format
-                # but let's test if this basic approach works first
-                
-                print(f"captured {len(data)} bytes")
-                return data  # return raw data for now
+                frame = frame.reshape((self.output_size[1], self.output_size[0], 4))
+                return frame[:, :, :3]
             
         except Exception as e:
             print(f"capture error: {e}")
@@ -87,14 +86,29 @@ class SimpleCamera:
     def stop(self):
         self._running = False
         print("simple camera stopped")
+    
+    @property
+    def running(self):
+        return self._running
+        
+    @property
+    def value(self):
+        return self.read()
+    
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
 
 def test_simple_camera():
     print("testing simple camera")
     camera = SimpleCamera('debug')
     if camera.start():
-        data = camera.read()
-        if data is not None:
-            print(f"simple camera captured data: {len(data)} bytes")
+        img = camera.read()
+        if img is not None:
+            print(f"simple camera captured: {img.shape}")
             camera.stop()
             return True
     camera.stop()
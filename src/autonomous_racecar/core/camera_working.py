@@ -1,7 +1,6 @@
 #src/autonomous_racecar/core/camera_working.py
 #simple working camera using gstreamer subprocess
 
-import cv2
 import time
 import numpy as np
 import subprocess
@@ -22,6 +21,8 @@ class WorkingCamera:
             self.target_size = (224, 224)
         else:
             self.target_size = None
+        # nvvidconv scales to the output size in the pipeline
+        self.output_size = self.target_size or (width, height)
             
         self._running = False
         print(f"working camera created: {mode}")
@@ -66,7 +67,7 @@ class WorkingCamera:
                 'gst-launch-1.0',
                 'nvarguscamerasrc', 'num-buffers=1',
                 f'! video/x-raw(memory:NVMM), width={self.width}, height={self.height}',
-                '! nvvidconv ! video/x-raw, format=BGR',
+                f'! nvvidconv ! video/x-raw, format=BGR, width={self.output_size[0]}, height={self.output_size[1]}',
                 f'! filesink location={temp_file}'
             ]
             
@@ -76,11 +77,7 @@ class WorkingCamera:
             if os.path.exists(temp_file):
                 data = open(temp_file, 'rb').read()
                 frame = np.frombuffer(data, dtype=np.uint8)
-                frame = frame.reshape((self.height, self.width, 3))
-                
-                # resize if needed
-                if self.target_size:
-                    frame = cv2.resize(frame, self.target_size)
+                frame = frame.reshape((self.output_size[1], self.output_size[0], 3))
                 
                 return frame
             
@@ -100,6 +97,13 @@ class WorkingCamera:
     @property 
     def value(self):
         return self.read()
+    
+    def __enter__(self):
+        self.start()
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
 
 def test_working_camera():
     """test the working camera"""
@@ -0,0 +1,126 @@
+#src/autonomous_racecar/core/esc.py
+#non-blocking esc arming and direction-change state machine
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+#states
+DISARMED = 'disarmed'
+ARMING = 'arming'
+ARMED = 'armed'
+REARMING = 'rearming'
+
+
+class ESCStateMachine:
+    """
+    time-driven esc handling for the throttle channel
+
+    instead of blocking with sleeps, arming and reverse handling are pulse
+    sequences that update() walks through as time passes. call update() from
+    a periodic tick (e.g. the actuator flusher) and write the pulse it
+    returns; request() and rearm() never block, so steering and other
+    commands keep flowing while the esc goes neutral -> arm -> target
+
+    arm_sequence / rearm_sequence are lists of (pulse_us, seconds).
+    forward_sign is -1 when forward lowers the pulse (our esc)
+    """
+
+    def __init__(self,
+                 center: float = 1500,
+                 arm_pulse: float = 1480,
+                 arm_sequence: Optional[List[Tuple[float, float]]] = None,
+                 rearm_sequence: Optional[List[Tuple[float, float]]] = None,
+                 forward_sign: int = -1):
+        self.center = center
+        self.forward_sign = forward_sign
+
+        #same timings as the old blocking init_esc / reset_esc
+        self.arm_sequence = arm_sequence or [(center, 1.0), (arm_pulse, 0.5), (center, 0.5)]
+        self.rearm_sequence = rearm_sequence or [(center, 0.3), (arm_pulse, 0.2)]
+
+        self._lock = threading.Lock()
+        self.state = DISARMED
+        self.target = center
+        self._sequence = []
+        self._step = 0
+        self._step_end = 0.0
+        self._direction = 0
+
+        #stats
+        self.rearms = 0
+
+    def direction(self, pulse: float) -> int:
+        """1 forward, -1 reverse, 0 neutral"""
+        if pulse == self.center:
+            return 0
+        return 1 if (pulse - self.center) * self.forward_sign > 0 else -1
+
+    def arm(self, now: Optional[float] = None):
+        """start the arming sequence (neutral, arm pulse, neutral)"""
+        with self._lock:
+            self._begin(ARMING, self.arm_sequence, now)
+
+    def rearm(self, now: Optional[float] = None):
+        """manual esc reset, returns to the current target afterwards"""
+        with self._lock:
+            if self.state != DISARMED:
+                self._begin(REARMING, self.rearm_sequence, now)
+
+    def request(self, pulse: float, now: Optional[float] = None):
+        """set the throttle target, rearming first on forward <-> reverse"""
+        with self._lock:
+            self.target = pulse
+            new_direction = self.direction(pulse)
+            if (self.state == ARMED and new_direction != 0 and
+                    self._direction != 0 and new_direction != self._direction):
+                self._begin(REARMING, self.rearm_sequence, now)
+            if new_direction != 0 and self.state == ARMED:
+                self._direction = new_direction
+
+    def update(self, now: Optional[float] = None) -> float:
+        """advance the state machine, returns the pulse to output now"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self.state in (ARMING, REARMING) and now >= self._step_end:
+                self._step += 1
+                if self._step >= len(self._sequence):
+                    self._finish()
+                    break
+                self._step_end += self._sequence[self._step][1]
+
+            if self.state in (ARMING, REARMING):
+                return self._sequence[self._step][0]
+            if self.state == ARMED:
+                return self.target
+            return self.center
+
+    def _begin(self, state: str, sequence: List[Tuple[float, float]],
+               now: Optional[float]):
+        now = time.monotonic() if now is None else now
+        if state == REARMING:
+            self.rearms += 1
+        self.state = state
+        self._sequence = sequence
+        self._step = 0
+        self._step_end = now + sequence[0][1]
+
+    def _finish(self):
+        self.state = ARMED
+        self._sequence = []
+        self._direction = self.direction(self.target)
+
+    @property
+    def armed(self) -> bool:
+        return self.state == ARMED
+
+    @property
+    def busy(self) -> bool:
+        """true while an arming or rearming sequence is running"""
+        return self.state in (ARMING, REARMING)
+
+    def attach(self, mailbox, channel: int):
+        """drive `channel` from update() on every actuator flush"""
+        def tick():
+            mailbox.put_pulses({channel: self.update()})
+        mailbox.add_tick_callback(tick)
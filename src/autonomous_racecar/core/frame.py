@@ -0,0 +1,92 @@
+#src/autonomous_racecar/core/frame.py
+#captured frame records shared by the camera backends
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+
+class Frame:
+    """
+    one captured frame
+
+    image: HxWx3 uint8 BGR array (may be a view into a reused ring buffer)
+    seq: monotonically increasing sequence number, starts at 1
+    timestamp_ns: time.monotonic_ns() when the frame was captured
+    trace: optional FrameTrace following the frame to the actuators
+    """
+
+    __slots__ = ('image', 'seq', 'timestamp_ns', 'trace')
+
+    def __init__(self, image: np.ndarray, seq: int, timestamp_ns: int, trace=None):
+        self.image = image
+        self.seq = seq
+        self.timestamp_ns = timestamp_ns
+        self.trace = trace
+
+    def copy(self) -> 'Frame':
+        """detach the image from the ring buffer"""
+        return Frame(self.image.copy(), self.seq, self.timestamp_ns, self.trace)
+
+    def __repr__(self):
+        return f"Frame(seq={self.seq}, shape={self.image.shape})"
+
+
+class FrameSlot:
+    """
+    newest frame from a capture thread, with blocking wait for a new one
+
+    the producer publish()es every frame; consumers either take the latest
+    without blocking or sleep on a condition variable until a frame newer
+    than the one they already have arrives (no busy polling, no duplicates)
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._closed = False
+
+    def publish(self, frame: Frame):
+        with self._cond:
+            self._frame = frame
+            self._cond.notify_all()
+
+    def latest(self) -> Optional[Frame]:
+        """newest frame without waiting (None before the first one)"""
+        return self._frame
+
+    def wait_next(self, after_seq: int, timeout: Optional[float] = None) -> Optional[Frame]:
+        """block until a frame with seq > after_seq, None on timeout or close"""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._closed or (self._frame is not None and self._frame.seq > after_seq),
+                timeout)
+            frame = self._frame
+        if frame is None or frame.seq <= after_seq:
+            return None
+        return frame
+
+    def reset(self):
+        """forget the last frame before a restart"""
+        with self._cond:
+            self._frame = None
+            self._closed = False
+
+    def close(self):
+        """wake every waiter, used when the camera stops"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+def read_exact(stream, view: memoryview) -> int:
+    """readinto until view is full or eof, returns bytes read"""
+    total = 0
+    size = len(view)
+    while total < size:
+        n = stream.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
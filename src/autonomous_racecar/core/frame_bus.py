@@ -0,0 +1,427 @@
+#src/autonomous_racecar/core/frame_bus.py
+#shared-memory frame ring: one camera producer, many zero-copy subscribers
+
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .frame import Frame
+from ..utils.process import pid_alive
+
+DEFAULT_NAME = 'racecar_frames'
+
+#header layout (int64)
+_MAGIC = 0x52434642  #'RCFB'
+_HEADER_FIELDS = 8
+_H_MAGIC, _H_SLOTS, _H_HEIGHT, _H_WIDTH, _H_CHANNELS, _H_LATEST, _H_PID = range(7)
+_ALIGN = 64
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(slots: int, shape: Tuple[int, int, int]) -> Tuple[int, int, int]:
+    """(meta offset, data offset, total size) of the segment"""
+    meta = _aligned(_HEADER_FIELDS * 8)
+    data = meta + _aligned(slots * 2 * 8)
+    return meta, data, data + slots * int(np.prod(shape))
+
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    """open an existing segment without handing it to this process' resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  #python < 3.13
+        #skip registration, otherwise the tracker unlinks the producer's
+        #segment when this subscriber exits
+        from multiprocessing import resource_tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def _owner_pid(name: str) -> Optional[int]:
+    """pid of the live producer owning segment `name`, None if it is stale"""
+    try:
+        shm = _attach_shm(name)
+    except FileNotFoundError:
+        return None
+    try:
+        if shm.size < _HEADER_FIELDS * 8:
+            return None
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        pid = int(header[_H_PID]) if header[_H_MAGIC] == _MAGIC else 0
+        del header
+    finally:
+        shm.close()
+    return pid if pid > 0 and pid_alive(pid) else None
+
+
+class FrameBus:
+    """
+    ring of `slots` frames in one shared memory segment
+
+    the producer writes frame n into slot (n - 1) % slots, guarded by a
+    per-slot sequence number (a seqlock): the slot seq is set to 0 while the
+    pixels are written and to n afterwards, then the header's latest seq is
+    bumped. readers never take a lock, so a slow subscriber only misses
+    frames and can never stall the producer or other subscribers.
+    images handed out are views into the ring, valid until the producer
+    wraps around to that slot again (check with is_valid or copy them)
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.name = shm.name
+        self.owner = owner
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        if header[_H_MAGIC] != _MAGIC:
+            raise ValueError(f"shared memory '{shm.name}' is not a frame bus")
+        self.slots = int(header[_H_SLOTS])
+        self.shape = (int(header[_H_HEIGHT]), int(header[_H_WIDTH]), int(header[_H_CHANNELS]))
+
+        meta, data, _ = _layout(self.slots, self.shape)
+        self._header = header
+        self._meta = np.ndarray((self.slots, 2), dtype=np.int64, buffer=shm.buf, offset=meta)
+        self._data = np.ndarray((self.slots,) + self.shape, dtype=np.uint8,
+                                buffer=shm.buf, offset=data)
+
+    @classmethod
+    def create(cls, shape: Tuple[int, int, int], slots: int = 4,
+               name: str = DEFAULT_NAME) -> 'FrameBus':
+        """allocate the segment (producer side), replacing a stale one"""
+        _, _, size = _layout(slots, shape)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            owner = _owner_pid(name)
+            if owner is not None:
+                raise FileExistsError(f"frame bus '{name}' is in use by a running producer "
+                                      f"(pid {owner})")
+            #left behind by a producer that was killed
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_H_PID] = os.getpid()
+        header[_H_SLOTS] = slots
+        header[_H_HEIGHT], header[_H_WIDTH], header[_H_CHANNELS] = shape
+        header[_H_MAGIC] = _MAGIC
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_NAME, timeout: float = 5.0) -> 'FrameBus':
+        """open an existing bus, waiting up to timeout for the producer"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                shm = _attach_shm(name)
+                try:
+                    return cls(shm, owner=False)
+                except ValueError:
+                    #created but the header is not written yet
+                    shm.close()
+            except FileNotFoundError:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no frame bus '{name}' after {timeout}s")
+            time.sleep(0.01)
+
+    @property
+    def latest_seq(self) -> int:
+        return int(self._header[_H_LATEST])
+
+    def publish(self, image: np.ndarray, timestamp_ns: Optional[int] = None) -> int:
+        """copy one frame into the next slot, returns its seq (producer only)"""
+        seq = int(self._header[_H_LATEST]) + 1
+        slot = (seq - 1) % self.slots
+        meta = self._meta[slot]
+
+        meta[0] = 0
+        self._data[slot][...] = image
+        meta[1] = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        meta[0] = seq
+        self._header[_H_LATEST] = seq
+        return seq
+
+    def read(self, seq: Optional[int] = None) -> Optional[Frame]:
+        """frame `seq` (default newest) as a zero-copy view, None if overwritten"""
+        if seq is None:
+            seq = self.latest_seq
+        if seq <= 0:
+            return None
+        slot = (seq - 1) % self.slots
+        meta = self._meta[slot]
+        timestamp_ns = int(meta[1])
+        if meta[0] != seq:
+            return None
+        return Frame(self._data[slot], seq, timestamp_ns)
+
+    def is_valid(self, frame: Frame) -> bool:
+        """true while the producer has not started overwriting the frame's slot"""
+        return self._meta[(frame.seq - 1) % self.slots][0] == frame.seq
+
+    def close(self):
+        """drop the mapping, the producer also removes the segment"""
+        self._header = self._meta = self._data = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class FrameSubscriber:
+    """
+    one consumer of a frame bus (any process)
+
+    read_latest() returns the newest frame, read_next() waits for a frame
+    newer than the last one returned. frames the subscriber was too slow
+    for are counted in `skipped`
+    """
+
+    def __init__(self, name: str = DEFAULT_NAME, timeout: float = 5.0,
+                 poll_interval: float = 0.001):
+        self.bus = FrameBus.attach(name, timeout)
+        self.poll_interval = poll_interval
+        self.last_seq = 0
+
+        #stats
+        self.frames = 0
+        self.skipped = 0
+
+    def _take(self, frame: Optional[Frame]) -> Optional[Frame]:
+        if frame is None or frame.seq <= self.last_seq:
+            return None
+        if self.last_seq:
+            self.skipped += frame.seq - self.last_seq - 1
+        self.last_seq = frame.seq
+        self.frames += 1
+        return frame
+
+    def read_latest(self) -> Optional[Frame]:
+        """newest frame if it was not returned before, else None"""
+        return self._take(self.bus.read())
+
+    def read_next(self, timeout: float = 1.0) -> Optional[Frame]:
+        """wait up to timeout for a frame newer than the last one returned"""
+        deadline = time.monotonic() + timeout
+        while True:
+            frame = self._take(self.bus.read())
+            if frame is not None:
+                return frame
+            if time.monotonic() > deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def read(self) -> Optional[np.ndarray]:
+        """newest image (copied, safe to keep)"""
+        frame = self.bus.read()
+        if frame is None:
+            return None
+        image = frame.image.copy()
+        return image if self.bus.is_valid(frame) else None
+
+    def close(self):
+        self.bus.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _producer_main(name: str, slots: int, backend: Optional[str], mode: str,
+                   camera_kwargs: dict, stop_event, ready_event):
+    """producer process: owns the camera, publishes every new frame"""
+    from .camera_backends import create_camera
+
+    camera = create_camera(backend, mode, **camera_kwargs)
+    if not camera.start():
+        camera.stop()
+        return
+
+    bus = None
+    read_frame = getattr(camera, 'read_frame', None)
+    last = None
+    try:
+        while not stop_event.is_set():
+            if read_frame is not None:
+                frame = read_frame()
+                if frame is None or frame.seq == last:
+                    time.sleep(0.001)
+                    continue
+                last, image, timestamp_ns = frame.seq, frame.image, frame.timestamp_ns
+            else:
+                image = camera.read()
+                if image is None or image is last:
+                    time.sleep(0.001)
+                    continue
+                last, timestamp_ns = image, None
+
+            if bus is None:
+                #frame size is known once the first frame arrives
+                bus = FrameBus.create(image.shape, slots, name)
+                ready_event.set()
+            bus.publish(image, timestamp_ns)
+    finally:
+        camera.stop()
+        if bus is not None:
+            bus.close()
+
+
+class FrameBusProducer:
+    """
+    runs one camera in its own process and publishes it on a frame bus
+
+    every other process (recorder, inference, preview) opens a
+    FrameSubscriber with the same name instead of its own camera
+    """
+
+    def __init__(self,
+                 name: str = DEFAULT_NAME,
+                 backend: Optional[str] = None,
+                 mode: str = 'inference',
+                 slots: int = 4,
+                 **camera_kwargs):
+        self.name = name
+        self.backend = backend
+        self.mode = mode
+        self.slots = slots
+        self.camera_kwargs = camera_kwargs
+
+        self._stop = mp.Event()
+        self._ready = mp.Event()
+        self._process = None
+
+    def start(self, timeout: float = 10.0) -> bool:
+        """start the producer process and wait for the first published frame"""
+        self._stop.clear()
+        self._ready.clear()
+        self._process = mp.Process(
+            target=_producer_main,
+            args=(self.name, self.slots, self.backend, self.mode,
+                  self.camera_kwargs, self._stop, self._ready),
+            daemon=True)
+        self._process.start()
+
+        if self._ready.wait(timeout):
+            print(f"frame bus '{self.name}' publishing")
+            return True
+        print("frame bus producer did not publish a frame")
+        self.stop()
+        return False
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._process is not None:
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def subscribe(self, **kwargs) -> FrameSubscriber:
+        return FrameSubscriber(self.name, **kwargs)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def _slow_subscriber(name: str, delay: float, seconds: float, results):
+    #holds each zero-copy view for `delay` before copying it, so the producer
+    #is often rewriting the slot during the copy. every frame is filled with
+    #(seq - 1) % 256: a copy the seqlock calls valid must match its seq,
+    #otherwise the read was torn
+    torn = 0
+    overwritten = 0
+    with FrameSubscriber(name) as subscriber:
+        bus = subscriber.bus
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            frame = subscriber.read_next(timeout=0.5)
+            if frame is None:
+                continue
+            for hold in (0.0, delay):
+                time.sleep(hold)
+                image = frame.image.copy()
+                if not bus.is_valid(frame):
+                    overwritten += 1
+                    continue
+                expected = (frame.seq - 1) % 256
+                if image.min() != expected or image.max() != expected:
+                    torn += 1
+        results.put((subscriber.frames, subscriber.skipped, overwritten, torn))
+
+
+def test_frame_bus(seconds: float = 2.0, rate_hz: float = 30.0,
+                   shape: Tuple[int, int, int] = (224, 224, 3)) -> bool:
+    """synthetic producer with a fast subscriber here and a slow one in another process"""
+    print(f"testing frame bus: {rate_hz}hz for {seconds}s, slow subscriber in a child process")
+
+    name = f"{DEFAULT_NAME}_test"
+    bus = FrameBus.create(shape, slots=4, name=name)
+    results = mp.Queue()
+    slow = mp.Process(target=_slow_subscriber, args=(name, 0.2, seconds, results))
+    slow.start()
+    fast = FrameSubscriber(name)
+
+    image = np.zeros(shape, dtype=np.uint8)
+    published = 0
+    torn = 0
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        image[...] = published % 256
+        bus.publish(image)
+        published += 1
+
+        frame = fast.read_latest()
+        if frame is not None and frame.image[0, 0, 0] != (frame.seq - 1) % 256:
+            torn += 1
+        time.sleep(max(0.0, start + published / rate_hz - time.monotonic()))
+    elapsed = time.monotonic() - start
+
+    slow_frames, slow_skipped, slow_overwritten, slow_torn = results.get(timeout=5)
+    slow.join()
+    fast.close()
+    bus.close()
+
+    producer_hz = published / elapsed
+    print(f"producer: {published} frames ({producer_hz:.1f}hz)")
+    print(f"fast subscriber: {fast.frames} frames, {fast.skipped} skipped, {torn} torn")
+    print(f"slow subscriber: {slow_frames} frames, {slow_skipped} skipped, "
+          f"{slow_overwritten} reads caught by the seqlock, {slow_torn} torn")
+
+    ok = (producer_hz > rate_hz * 0.9 and slow_skipped > 0 and torn == 0
+          and slow_torn == 0 and slow_overwritten > 0)
+    print("frame bus ok" if ok else "frame bus stalled or tore frames")
+    return ok
@@ -0,0 +1,116 @@
+#src/autonomous_racecar/core/gst_pipeline.py
+#gstreamer pipeline strings shared by the camera backends
+
+import shlex
+from typing import List, Optional, Tuple
+
+#csi camera on the car
+ARGUS_SOURCE = 'nvarguscamerasrc'
+#synthetic frames, works on any machine with gstreamer
+TEST_SOURCE = 'videotestsrc'
+
+#gstreamer pads raw video rows to 4 bytes, a BGR row (3 * width bytes) is
+#only unpadded when the width is a multiple of 4, and the fdsink/appsink
+#readers assume width * height * 3 byte frames
+ROW_ALIGN = 4
+
+
+def output_frame_size(width: int,
+                      height: int,
+                      output_size: Optional[Tuple[int, int]] = None,
+                      crop: Optional[Tuple[int, int, int, int]] = None) -> Tuple[int, int]:
+    """
+    (width, height) of the frames a pipeline built with these args delivers
+
+    a crop whose width is not a multiple of ROW_ALIGN is narrowed by
+    trimming up to 3 more pixels on the right (build_pipeline does the
+    same), an explicit output_size or uncropped width that is not aligned
+    is rejected
+    """
+    if output_size:
+        out_width, out_height = output_size
+        _check_row_alignment(out_width, 'output width')
+        return out_width, out_height
+    if crop:
+        left, top, right, bottom = crop
+        out_width = width - left - right
+        return out_width - out_width % ROW_ALIGN, height - top - bottom
+    _check_row_alignment(width, 'capture width')
+    return width, height
+
+
+def _check_row_alignment(width: int, what: str):
+    if width % ROW_ALIGN:
+        raise ValueError(f"{what} {width} is not a multiple of {ROW_ALIGN}, gstreamer would "
+                         f"pad each BGR row and the frame size would not be width * height * 3")
+
+
+def _aligned_crop(width: int, crop: Tuple[int, int, int, int],
+                  output_size: Optional[Tuple[int, int]]) -> Tuple[int, int, int, int]:
+    #without scaling the crop itself sets the row width, trim the excess on the right
+    if output_size:
+        return tuple(crop)
+    left, top, right, bottom = crop
+    return left, top, right + (width - left - right) % ROW_ALIGN, bottom
+
+
+def build_pipeline(source: str = ARGUS_SOURCE,
+                   width: int = 640,
+                   height: int = 480,
+                   fps: int = 21,
+                   num_buffers: Optional[int] = None,
+                   output_size: Optional[Tuple[int, int]] = None,
+                   crop: Optional[Tuple[int, int, int, int]] = None) -> str:
+    """
+    source element chain ending in raw BGR frames
+
+    the sensor is captured at width x height, then `crop` (left, top,
+    right, bottom pixels trimmed off the capture) and scaling to
+    `output_size` (width, height) happen inside the pipeline, nvvidconv on
+    the car and videocrop/videoscale elsewhere, so python only ever sees
+    final-size frames
+
+    append a sink (fdsink, filesink, appsink) to use it. source can be
+    'nvarguscamerasrc', 'videotestsrc' or any other source element string
+    """
+    name, _, props = source.partition(' ')
+    if num_buffers is not None:
+        props = f"{props} num-buffers={num_buffers}".strip()
+    element = f"{name} {props}".strip()
+    out_width, out_height = output_frame_size(width, height, output_size, crop)
+    if crop:
+        crop = _aligned_crop(width, crop, output_size)
+
+    if name == ARGUS_SOURCE:
+        #nvvidconv crops with a source rectangle and scales in one pass
+        convert = "nvvidconv flip-method=0"
+        if crop:
+            left, top, right, bottom = crop
+            convert += (f" left={left} top={top} right={width - right} "
+                        f"bottom={height - bottom}")
+        return (f"{element} ! video/x-raw(memory:NVMM), width={width}, height={height}, "
+                f"format=NV12, framerate={fps}/1 ! {convert} "
+                f"! video/x-raw, width={out_width}, height={out_height}, format=BGRx "
+                f"! videoconvert ! video/x-raw, format=BGR")
+
+    if name == TEST_SOURCE and 'is-live' not in props:
+        #pace synthetic frames at the camera rate
+        element = f"{element} is-live=true"
+
+    if crop:
+        #pin the capture size, crop is given in capture pixels
+        left, top, right, bottom = crop
+        element = (f"{element} ! video/x-raw, width={width}, height={height}, "
+                   f"framerate={fps}/1 ! videoconvert "
+                   f"! videocrop left={left} top={top} right={right} bottom={bottom}")
+    else:
+        element = f"{element} ! videoconvert"
+
+    return (f"{element} ! videoscale "
+            f"! video/x-raw, format=BGR, width={out_width}, height={out_height}, "
+            f"framerate={fps}/1")
+
+
+def gst_launch_command(pipeline: str, sink: str) -> List[str]:
+    """argv for gst-launch-1.0 running pipeline ! sink quietly"""
+    return ['gst-launch-1.0', '-q'] + shlex.split(f"{pipeline} ! {sink}")
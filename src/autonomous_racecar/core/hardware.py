@@ -2,8 +2,13 @@
 #CHANGE CALLIBRATIONS FOR YOUR SYSTEM
 
 import time
-import smbus
-from typing import Optional
+from typing import Dict, Optional
+
+from .pca9685 import PCA9685
+from .actuator import ActuatorMailbox
+from .i2c import open_bus
+from .calibration import CalibrationTable, load_calibration
+from .esc import ESCStateMachine
 
 class AutonomousRacecar:
     """
@@ -14,15 +19,41 @@ class AutonomousRacecar:
     def __init__(self, 
                  steering_offset: float = 0.17, 
                  steering_gain: float = -0.65, 
-                 throttle_gain: float = 0.8):
-        """Initialize with your calibrated values"""
+                 throttle_gain: float = 0.8,
+                 i2c_bus: int = 7,
+                 i2c_address: int = 0x40,
+                 bus=None,
+                 calibration: Optional[Dict[str, CalibrationTable]] = None,
+                 esc: Optional[ESCStateMachine] = None):
+        """
+        Initialize with your calibrated values
+
+        bus: optional i2c backend (e.g. open_bus('sim')), defaults to
+        the real smbus backend on i2c_bus
+        calibration: compiled 'steering'/'throttle' tables (see
+        load_calibration), defaults to linear tables from the gains
+        esc: optional esc state machine; when given the esc is armed
+        without blocking and throttle goes through it (reverse rearm)
+        """
         
         self.steering_offset = steering_offset
         self.steering_gain = steering_gain  
         self.throttle_gain = throttle_gain
         
+        #compiled command -> tick lookup tables
+        if calibration is None:
+            calibration = load_calibration({
+                'steering': {'offset': steering_offset, 'gain': steering_gain},
+                'throttle': {'gain': throttle_gain},
+            })
+        self.steering_table = calibration['steering']
+        self.throttle_table = calibration['throttle']
+        self.esc = esc
+        
         #i2c setup
-        self.i2c_address = 0x40
+        self.i2c_bus = i2c_bus
+        self.i2c_address = i2c_address
+        self.bus = bus
         self.steering_channel = 0
         self.throttle_channel = 1
         self.center_pulse = 1500
@@ -39,26 +70,61 @@ class AutonomousRacecar:
         print(f"steering gain: {self.steering_gain}")
         print(f"throttle gain: {self.throttle_gain}")
     
+    @classmethod
+    def from_config(cls, path: Optional[str] = None, bus=None) -> 'AutonomousRacecar':
+        """Create a racecar from hardware_config.yaml (curves, i2c, esc)"""
+        from ..utils.config import load_hardware_config
+        
+        config = load_hardware_config(path)
+        steering = config.get('steering', {})
+        throttle = config.get('throttle', {})
+        i2c = config.get('i2c', {})
+        esc = config.get('esc', {})
+        
+        if esc.get('arm', False):
+            center = config.get('calibration', {}).get('center_pulse', 1500)
+            esc = ESCStateMachine(center=center,
+                                  arm_pulse=esc.get('arm_pulse', 1480),
+                                  forward_sign=esc.get('forward_sign', -1))
+        else:
+            esc = None
+        
+        return cls(steering_offset=steering.get('offset', 0.17),
+                   steering_gain=steering.get('gain', -0.65),
+                   throttle_gain=throttle.get('gain', 0.8),
+                   i2c_bus=i2c.get('bus', 7),
+                   i2c_address=i2c.get('address', 0x40),
+                   bus=bus,
+                   calibration=load_calibration(config),
+                   esc=esc)
+    
     def _init_hardware(self):
         """Initialize i2c and pca9685"""
         try:
             #initialize the i2c bus
-            self.bus = smbus.SMBus(7)
+            if self.bus is None:
+                self.bus = open_bus('smbus', self.i2c_bus)
             
-            #pca9685 pwm controller initialization
-            self.bus.write_byte_data(self.i2c_address, 0x00, 0x10)
-            time.sleep(0.005)
+            #pca9685 pwm controller at 50hz, auto-increment enabled
+            self.pwm = PCA9685(self.bus, self.i2c_address, frequency=50)
+            self.pwm.init()
             
-            #50hz pwm frequency
-            prescale = int(25000000 / (4096 * 50) - 1)
-            self.bus.write_byte_data(self.i2c_address, 0xFE, prescale)
-            self.bus.write_byte_data(self.i2c_address, 0x00, 0x20)
-            time.sleep(0.005)
-            self.bus.write_byte_data(self.i2c_address, 0x01, 0x04)
+            #setters deposit here, one flusher thread owns the bus
+            self.actuator = ActuatorMailbox(self.pwm)
             
-            #servo center initialization
-            self._set_servo_pulse(self.steering_channel, self.center_pulse)
-            self._set_servo_pulse(self.throttle_channel, self.center_pulse)
+            #servo center initialization (one transaction for both channels)
+            self._set_servo_pulses({
+                self.steering_channel: self.center_pulse,
+                self.throttle_channel: self.center_pulse,
+            })
+            
+            #esc walks neutral -> arm -> target on flusher ticks
+            if self.esc is not None:
+                self.esc.attach(self.actuator, self.throttle_channel)
+                self.esc.arm()
+            
+            self.actuator.flush()
+            self.actuator.start()
             
         except Exception as e:
             print(f"hardware initialization failed: {e}")
@@ -66,20 +132,15 @@ class AutonomousRacecar:
     
     def _set_servo_pulse(self, channel: int, pulse_us: int):
         """Set servo pulse width in microseconds"""
+        self._set_servo_pulses({channel: pulse_us})
+    
+    def _set_servo_pulses(self, pulses: Dict[int, float]):
+        """Deposit servo pulse widths for the flusher (non-blocking)"""
         #safety
-        pulse_us = max(1000, min(2000, pulse_us))
-        
-        #convert to pwm  value
-        pwm_value = int((pulse_us * 4096) / 20000)
-        base_reg = 0x06 + 4 * channel
+        pulses = {channel: max(1000, min(2000, pulse_us))
+                  for channel, pulse_us in pulses.items()}
         
-        try:
-            self.bus.write_byte_data(self.i2c_address, base_reg, 0)
-            self.bus.write_byte_data(self.i2c_address, base_reg + 1, 0)
-            self.bus.write_byte_data(self.i2c_address, base_reg + 2, pwm_value & 0xFF)
-            self.bus.write_byte_data(self.i2c_address, base_reg + 3, (pwm_value >> 8) & 0xFF)
-        except Exception as e:
-            print(f"servo control error: {e}")
+        self.actuator.put_pulses(pulses)
     
     @property
     def steering(self) -> float:
@@ -93,11 +154,8 @@ class AutonomousRacecar:
         value = max(-1.0, min(1.0, value))
         self._steering = value
         
-        #apply calibration
-        scaled = value * self.steering_gain + self.steering_offset
-        pulse_us = self.center_pulse + (scaled * 500)
-        
-        self._set_servo_pulse(self.steering_channel, pulse_us)
+        #calibration table lookup (clamps and converts in one step)
+        self.actuator.put(self.steering_channel, self.steering_table.ticks(value))
     
     @property
     def throttle(self) -> float:
@@ -111,24 +169,43 @@ class AutonomousRacecar:
         value = max(-1.0, min(1.0, value))
         self._throttle = value
         
-        #apply callibration
-        scaled = value * self.throttle_gain
-        
-        if scaled > 0:
-            pulse_us = self.center_pulse - (scaled * 200)
-        elif scaled < 0:
-            pulse_us = self.center_pulse + (abs(scaled) * 200)
+        if self.esc is not None:
+            self.esc.request(self.throttle_table.pulse(value))
         else:
-            pulse_us = self.center_pulse
+            self.actuator.put(self.throttle_channel, self.throttle_table.ticks(value))
+    
+    def set_controls(self, steering: float, throttle: float, trace=None):
+        """
+        set steering and throttle together (flushed as one i2c transaction)
+
+        trace: optional FrameTrace, marked when the command reaches the bus
+        """
+        #safety
+        self._steering = max(-1.0, min(1.0, steering))
+        self._throttle = max(-1.0, min(1.0, throttle))
+        
+        if self.esc is not None:
+            self.esc.request(self.throttle_table.pulse(self._throttle))
+            self.actuator.put(self.steering_channel, self.steering_table.ticks(self._steering),
+                              trace=trace)
+            return
         
-        self._set_servo_pulse(self.throttle_channel, pulse_us)
+        self.actuator.put_many({
+            self.steering_channel: self.steering_table.ticks(self._steering),
+            self.throttle_channel: self.throttle_table.ticks(self._throttle),
+        }, trace=trace)
     
     def stop(self):
         """safely stop the car"""
-        self.throttle = 0.0
-        self.steering = 0.0
+        self.set_controls(0.0, 0.0)
+        self.actuator.flush()
         time.sleep(0.1)
     
+    def close(self):
+        """stop the car and the actuator flusher thread"""
+        self.stop()
+        self.actuator.stop()
+    
     def test_steering(self, duration: float = 2.0):
         """test steering calibration"""
         print("testing steering")
@@ -181,7 +258,7 @@ class AutonomousRacecar:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         """context safe exit"""
-        self.stop()
+        self.close()
 
 
 #easy functions
@@ -201,3 +278,58 @@ def test_hardware() -> bool:
     except Exception as e:
         print(f"hardware test failed: {e}")
         return False
+
+def create_sim_car(latency: float = 0.0, **kwargs) -> AutonomousRacecar:
+    """Create a racecar on a simulated pca9685 (no hardware needed)"""
+    return AutonomousRacecar(bus=open_bus('sim', latency=latency), **kwargs)
+
+def benchmark_actuation(seconds: float = 2.0, rate_hz: float = 100.0,
+                        latency: float = 0.0005) -> Dict[str, float]:
+    """measure bus writes/sec and command-to-pulse latency on the simulator"""
+    import math
+    from ..utils.stats import summarize
+
+    print(f"actuation benchmark: {rate_hz}hz for {seconds}s, "
+          f"{latency * 1000:.2f}ms per transaction")
+
+    car = create_sim_car(latency=latency)
+    sim = car.bus
+    sim.reset_count()
+
+    #sweep steering so every command is a new pulse
+    commands = []
+    period = 1.0 / rate_hz
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < seconds:
+        value = math.sin(i * 0.05)
+        car.steering = value
+        ticks = car.steering_table.ticks(car.steering)
+        commands.append((time.monotonic_ns(), ticks * 1000000 / sim.frequency / 4096))
+        i += 1
+        time.sleep(max(0.0, start + i * period - time.monotonic()))
+    car.close()
+
+    #a command is delivered if the next pulse change on the bus is its value,
+    #otherwise a newer command superseded it (latest wins)
+    latencies = []
+    for t, pulse in commands:
+        seen = sim.first_pulse_after(car.steering_channel, t)
+        if seen is not None and sim.first_pulse_after(car.steering_channel, t, pulse) == seen:
+            latencies.append((seen - t) / 1e6)
+
+    stats = summarize(latencies)
+    result = {
+        'commands': len(commands),
+        'delivered': len(latencies),
+        'transactions': sim.count,
+        'writes_per_sec': sim.writes_per_second(),
+        'latency_p50_ms': stats['p50'],
+        'latency_p99_ms': stats['p99'],
+    }
+    print(f"commands: {result['commands']}, delivered: {result['delivered']}, "
+          f"transactions: {result['transactions']}")
+    print(f"writes/sec: {result['writes_per_sec']:.1f}")
+    print(f"command-to-pulse latency p50: {result['latency_p50_ms']:.2f}ms "
+          f"p99: {result['latency_p99_ms']:.2f}ms")
+    return result
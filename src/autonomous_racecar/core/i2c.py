@@ -0,0 +1,172 @@
+#src/autonomous_racecar/core/i2c.py
+#i2c bus backends: real smbus and a simulated pca9685 register model
+
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .pca9685 import (MODE1, LED0_ON_L, PRESCALE, MODE1_SLEEP, MODE1_AI,
+                      OSC_HZ, TICKS)
+
+NUM_CHANNELS = 16
+FULL_BIT = 0x10
+
+
+class SMBusBackend:
+    """real i2c bus through the smbus module"""
+
+    def __init__(self, bus: int = 7):
+        import smbus
+        self.bus_number = bus
+        self._bus = smbus.SMBus(bus)
+
+    def write_byte_data(self, address: int, register: int, value: int):
+        self._bus.write_byte_data(address, register, value)
+
+    def write_i2c_block_data(self, address: int, register: int, data: List[int]):
+        self._bus.write_i2c_block_data(address, register, data)
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        return self._bus.read_byte_data(address, register)
+
+    def close(self):
+        self._bus.close()
+
+
+class SimulatedPCA9685:
+    """
+    in-memory pca9685 on a fake bus
+
+    keeps the 256 byte register file, honours the MODE1 auto-increment and
+    sleep bits like the real chip, timestamps every transaction with
+    time.monotonic_ns and decodes LEDn registers into pulse widths.
+    latency (seconds) is slept inside every transaction to model a slow bus
+    """
+
+    def __init__(self, address: int = 0x40, latency: float = 0.0):
+        self.address = address
+        self.latency = latency
+        self.registers = bytearray(256)
+        self.registers[MODE1] = MODE1_SLEEP | 0x01  #power-on default
+        self.registers[PRESCALE] = 0x1E
+
+        #(timestamp_ns, kind, register, data)
+        self.transactions = []
+
+        #channel -> [(timestamp_ns, pulse_us)] whenever the pulse changes
+        self.pulse_history = {}
+
+    #bus interface
+
+    def write_byte_data(self, address: int, register: int, value: int):
+        self._transaction('byte', address, register, [value])
+
+    def write_i2c_block_data(self, address: int, register: int, data: List[int]):
+        if len(data) > 32:
+            raise ValueError("smbus block writes are limited to 32 bytes")
+        self._transaction('block', address, register, list(data))
+
+    def read_byte_data(self, address: int, register: int) -> int:
+        self._transaction('read', address, register, [])
+        return self.registers[register]
+
+    def close(self):
+        pass
+
+    def _transaction(self, kind: str, address: int, register: int, data: List[int]):
+        if self.latency:
+            time.sleep(self.latency)
+        if address != self.address:
+            raise OSError(f"no device at address {address:#x}")
+
+        now = time.monotonic_ns()
+        self.transactions.append((now, kind, register, data))
+
+        auto_increment = self.registers[MODE1] & MODE1_AI
+        reg = register
+        for value in data:
+            self._write_register(reg, value & 0xFF)
+            if auto_increment:
+                reg = (reg + 1) & 0xFF
+
+        if kind != 'read':
+            self._record_pulses(now)
+
+    def _write_register(self, register: int, value: int):
+        if register == PRESCALE and not self.registers[MODE1] & MODE1_SLEEP:
+            #prescale is only writable while the oscillator is asleep
+            return
+        self.registers[register] = value
+
+    def _record_pulses(self, now: int):
+        for channel in range(NUM_CHANNELS):
+            pulse = self.pulse_us(channel)
+            history = self.pulse_history.setdefault(channel, [])
+            if not history or history[-1][1] != pulse:
+                if history or pulse:
+                    history.append((now, pulse))
+
+    #decoded state
+
+    @property
+    def asleep(self) -> bool:
+        return bool(self.registers[MODE1] & MODE1_SLEEP)
+
+    @property
+    def frequency(self) -> float:
+        return OSC_HZ / (TICKS * (self.registers[PRESCALE] + 1))
+
+    def channel_ticks(self, channel: int) -> Tuple[int, int]:
+        """(on, off) tick counts for a channel"""
+        base = LED0_ON_L + 4 * channel
+        on = self.registers[base] | (self.registers[base + 1] << 8)
+        off = self.registers[base + 2] | (self.registers[base + 3] << 8)
+        return on, off
+
+    def pulse_us(self, channel: int) -> float:
+        """decoded high time of a channel in microseconds"""
+        on, off = self.channel_ticks(channel)
+        if off & (FULL_BIT << 8):
+            return 0.0
+        period_us = 1000000 / self.frequency
+        if on & (FULL_BIT << 8):
+            return period_us
+        high = ((off & 0xFFF) - (on & 0xFFF)) % TICKS
+        return high * period_us / TICKS
+
+    def pulses(self) -> Dict[int, float]:
+        return {channel: self.pulse_us(channel) for channel in range(NUM_CHANNELS)}
+
+    #stats
+
+    @property
+    def count(self) -> int:
+        return len(self.transactions)
+
+    def reset_count(self):
+        self.transactions = []
+
+    def writes_per_second(self) -> float:
+        writes = [t for t in self.transactions if t[1] != 'read']
+        if len(writes) < 2:
+            return 0.0
+        elapsed = (writes[-1][0] - writes[0][0]) / 1e9
+        return (len(writes) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def first_pulse_after(self, channel: int, timestamp_ns: int,
+                          pulse_us: Optional[float] = None,
+                          tolerance: float = 0.5) -> Optional[int]:
+        """timestamp of the first pulse change on a channel at or after a time"""
+        for t, pulse in self.pulse_history.get(channel, []):
+            if t >= timestamp_ns and (pulse_us is None or abs(pulse - pulse_us) <= tolerance):
+                return t
+        return None
+
+
+def open_bus(backend: str = 'smbus', bus: int = 7, address: int = 0x40,
+             latency: float = 0.0):
+    """open an i2c bus backend ('smbus' or 'sim')"""
+    if backend == 'smbus':
+        return SMBusBackend(bus)
+    if backend == 'sim':
+        return SimulatedPCA9685(address=address, latency=latency)
+    raise ValueError(f"unknown i2c backend: {backend}")
@@ -0,0 +1,130 @@
+#src/autonomous_racecar/core/pca9685.py
+#pca9685 pwm driver using auto-increment block writes
+
+import time
+from typing import Dict, List, Tuple
+
+#registers
+MODE1 = 0x00
+MODE2 = 0x01
+LED0_ON_L = 0x06
+ALL_LED_ON_L = 0xFA
+PRESCALE = 0xFE
+
+#mode bits
+MODE1_SLEEP = 0x10
+MODE1_AI = 0x20
+MODE2_OUTDRV = 0x04
+
+OSC_HZ = 25000000
+TICKS = 4096
+
+
+class PCA9685:
+    """
+    pca9685 driver that writes each channel as one i2c block transaction
+
+    with the MODE1 auto-increment bit set the chip advances the register
+    pointer after every byte, so ON_L/ON_H/OFF_L/OFF_H of a channel (and of
+    neighbouring channels) can be written with a single write_i2c_block_data
+    """
+
+    def __init__(self, bus, address: int = 0x40, frequency: int = 50):
+        self.bus = bus
+        self.address = address
+        self.frequency = frequency
+        self.period_us = 1000000 / frequency
+
+    def init(self):
+        """put the chip to sleep, set prescale, wake with auto-increment on"""
+        self.bus.write_byte_data(self.address, MODE1, MODE1_SLEEP)
+        time.sleep(0.005)
+
+        prescale = int(OSC_HZ / (TICKS * self.frequency) - 1)
+        self.bus.write_byte_data(self.address, PRESCALE, prescale)
+        self.bus.write_byte_data(self.address, MODE1, MODE1_AI)
+        time.sleep(0.005)
+        self.bus.write_byte_data(self.address, MODE2, MODE2_OUTDRV)
+
+    def enable_outputs(self):
+        """clear the ALL_LED registers in one block write"""
+        self.bus.write_i2c_block_data(self.address, ALL_LED_ON_L, [0, 0, 0, 0])
+
+    def pulse_to_ticks(self, pulse_us: float) -> int:
+        """convert a pulse width in microseconds to 12-bit off ticks"""
+        return int((pulse_us * TICKS) / self.period_us)
+
+    def set_ticks(self, channel: int, ticks: int):
+        """write one channel (on=0, off=ticks) in a single transaction"""
+        self.bus.write_i2c_block_data(self.address, LED0_ON_L + 4 * channel,
+                                      _channel_bytes(ticks))
+
+    def set_pulse(self, channel: int, pulse_us: float):
+        """write one channel pulse width in microseconds"""
+        self.set_ticks(channel, self.pulse_to_ticks(pulse_us))
+
+    def set_ticks_many(self, ticks: Dict[int, int]):
+        """
+        write several channels, merging contiguous channels into one
+        block transaction (e.g. steering on 0 and throttle on 1)
+        """
+        for first, values in _contiguous_runs(ticks):
+            data = []
+            for value in values:
+                data.extend(_channel_bytes(value))
+            self.bus.write_i2c_block_data(self.address, LED0_ON_L + 4 * first, data)
+
+    def set_pulses(self, pulses: Dict[int, float]):
+        """write several channel pulse widths in microseconds"""
+        self.set_ticks_many({channel: self.pulse_to_ticks(pulse_us)
+                             for channel, pulse_us in pulses.items()})
+
+
+def _channel_bytes(ticks: int) -> List[int]:
+    """ON_L, ON_H, OFF_L, OFF_H for a pulse that starts at tick 0"""
+    return [0, 0, ticks & 0xFF, (ticks >> 8) & 0xFF]
+
+
+def _contiguous_runs(ticks: Dict[int, int]) -> List[Tuple[int, List[int]]]:
+    """group channels into runs of consecutive channel numbers"""
+    runs = []
+    for channel in sorted(ticks):
+        if runs and runs[-1][0] + len(runs[-1][1]) == channel:
+            runs[-1][1].append(ticks[channel])
+        else:
+            runs.append((channel, [ticks[channel]]))
+    return runs
+
+
+def test_block_writes() -> bool:
+    """check that a steering+throttle update is one transaction, not eight"""
+    from .i2c import SimulatedPCA9685
+
+    print("testing pca9685 block writes")
+
+    bus = SimulatedPCA9685()
+    pwm = PCA9685(bus)
+    pwm.init()
+
+    #old path: four byte writes per channel
+    bus.reset_count()
+    for channel in (0, 1):
+        ticks = pwm.pulse_to_ticks(1600)
+        base_reg = LED0_ON_L + 4 * channel
+        bus.write_byte_data(pwm.address, base_reg, 0)
+        bus.write_byte_data(pwm.address, base_reg + 1, 0)
+        bus.write_byte_data(pwm.address, base_reg + 2, ticks & 0xFF)
+        bus.write_byte_data(pwm.address, base_reg + 3, (ticks >> 8) & 0xFF)
+    byte_writes = bus.count
+    expected = bus.pulses()
+
+    #new path: one combined block write
+    pwm.set_pulses({0: 1500, 1: 1500})
+    bus.reset_count()
+    pwm.set_pulses({0: 1600, 1: 1600})
+    block_writes = bus.count
+
+    print(f"byte writes: {byte_writes}, block writes: {block_writes}")
+    ok = block_writes == 1 and byte_writes == 8 and bus.pulses() == expected
+    print("block writes ok" if ok else "block writes mismatch")
+    return ok
@@ -0,0 +1,117 @@
+#src/autonomous_racecar/core/scheduler.py
+#drift-compensated fixed-rate scheduler with jitter statistics
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from ..utils.stats import percentile
+
+OVERRUN_POLICIES = ('skip', 'catch_up')
+
+
+class PeriodicScheduler:
+    """
+    runs a callback on absolute deadlines (start + n * period)
+
+    deadlines come from time.monotonic_ns, so the time spent in the
+    callback does not push later ticks back the way a bare sleep(period)
+    does. on overrun (callback finished after the next deadline):
+        'skip'     - drop the missed deadlines and resume on the next one
+        'catch_up' - run the missed ticks back to back until on schedule
+    """
+
+    def __init__(self,
+                 rate_hz: Optional[float] = None,
+                 period: Optional[float] = None,
+                 overrun: str = 'skip',
+                 history: int = 2000):
+        if (rate_hz is None) == (period is None):
+            raise ValueError("give exactly one of rate_hz or period")
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"overrun policy must be one of {OVERRUN_POLICIES}")
+
+        self.period = period if period is not None else 1.0 / rate_hz
+        self.period_ns = int(self.period * 1e9)
+        self.overrun = overrun
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        #stats (ns)
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self._jitter = deque(maxlen=history)
+        self._latency = deque(maxlen=history)
+
+    def run(self, callback: Callable[[], None], ticks: Optional[int] = None):
+        """run callback every period on this thread until stop() or `ticks` runs"""
+        self._stop.clear()
+        start = time.monotonic_ns()
+        deadline = start
+        count = 0
+
+        while not self._stop.is_set() and (ticks is None or count < ticks):
+            now = time.monotonic_ns()
+            if now < deadline:
+                if self._stop.wait((deadline - now) / 1e9):
+                    break
+                now = time.monotonic_ns()
+
+            self._jitter.append(now - deadline)
+            callback()
+            done = time.monotonic_ns()
+            self._latency.append(done - now)
+            self.ticks += 1
+            count += 1
+
+            deadline += self.period_ns
+            if done > deadline:
+                self.overruns += 1
+                if self.overrun == 'skip':
+                    missed = (done - deadline) // self.period_ns + 1
+                    self.skipped += missed
+                    deadline += missed * self.period_ns
+
+    def start(self, callback: Callable[[], None]):
+        """run the loop on a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(callback,), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """stop the loop and wait for the background thread"""
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> Dict[str, float]:
+        """tick count, overruns, and latency/jitter percentiles in ms"""
+        jitter = [j / 1e6 for j in self._jitter]
+        latency = [l / 1e6 for l in self._latency]
+        return {
+            'period_ms': self.period * 1000,
+            'ticks': self.ticks,
+            'overruns': self.overruns,
+            'skipped': self.skipped,
+            'latency_p50_ms': percentile(latency, 50),
+            'latency_p99_ms': percentile(latency, 99),
+            'jitter_p50_ms': percentile(jitter, 50),
+            'jitter_p99_ms': percentile(jitter, 99),
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"{s['ticks']} ticks @ {s['period_ms']:.1f}ms, "
+              f"overruns: {s['overruns']} (skipped {s['skipped']})")
+        print(f"latency p50: {s['latency_p50_ms']:.3f}ms p99: {s['latency_p99_ms']:.3f}ms | "
+              f"jitter p50: {s['jitter_p50_ms']:.3f}ms p99: {s['jitter_p99_ms']:.3f}ms")
@@ -1,8 +1,6 @@
 #src/autonomous_racecar/core/sys_test.py
 #SYSTEM TESTS
 
-import time
-
 def test_hardware():
     """test hardware system"""
     print("testing hardware")
@@ -52,6 +50,7 @@ def test_integration():
     try:
         from .hardware import create_car
         from .camera import create_inference_camera
+        from .scheduler import PeriodicScheduler
         
         car = create_car(steering_offset=0.17)
         camera = create_inference_camera()
@@ -59,17 +58,22 @@ def test_integration():
         if camera.start():
             print("camera started")
             
-            #test autonomous-ready loop
-            for i in range(3):
+            #test autonomous-ready loop on fixed 2hz deadlines
+            frames = []
+            def step():
                 img = camera.read()
                 if img is not None:
-                    print(f"frame {i+1}: {img.shape}")
+                    frames.append(img)
+                    print(f"frame {len(frames)}: {img.shape}")
                     
                     #simulate ai steering
-                    ai_steering = 0.1 if i == 1 else 0.0
+                    ai_steering = 0.1 if len(frames) == 2 else 0.0
                     car.steering = ai_steering
                     print(f"steering: {ai_steering}")
-                    time.sleep(0.5)
+            
+            scheduler = PeriodicScheduler(rate_hz=2)
+            scheduler.run(step, ticks=3)
+            scheduler.print_stats()
             
             car.stop()
             camera.stop()
@@ -0,0 +1,204 @@
+#src/autonomous_racecar/core/trace.py
+#per-frame latency tracing from capture to actuation
+
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..utils.stats import summarize
+
+#stages in the order a frame goes through them
+STAGES = ('capture', 'dequeue', 'preprocess', 'inference', 'actuation')
+
+#histogram bucket upper edges in ms (last bucket is open ended)
+BUCKET_EDGES_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class FrameTrace:
+    """
+    monotonic_ns timestamps for one frame as it moves through the loop
+
+    capture comes from the camera, the control loop marks dequeue,
+    preprocess and inference, and the actuator mailbox marks actuation when
+    the command reaches the bus. marking actuation hands the trace to its
+    recorder
+    """
+
+    __slots__ = ('seq', 'stamps', 'recorder')
+
+    def __init__(self, seq: int, capture_ns: int, recorder: Optional['TraceRecorder'] = None):
+        self.seq = seq
+        self.stamps = {'capture': capture_ns}
+        self.recorder = recorder
+
+    def mark(self, stage: str, timestamp_ns: Optional[int] = None):
+        """record that `stage` finished now (or at timestamp_ns)"""
+        if stage not in STAGES:
+            raise ValueError(f"unknown trace stage '{stage}', expected one of {STAGES}")
+        self.stamps[stage] = time.monotonic_ns() if timestamp_ns is None else timestamp_ns
+        if stage == STAGES[-1] and self.recorder is not None:
+            self.recorder.record(self)
+
+    def drop(self):
+        """the command for this frame was superseded before reaching the bus"""
+        if self.recorder is not None:
+            self.recorder.drop(self)
+
+    def spans(self) -> List[Tuple[str, int, int]]:
+        """(stage, start_ns, end_ns) for each marked stage after capture"""
+        spans = []
+        previous = self.stamps['capture']
+        for stage in STAGES[1:]:
+            end = self.stamps.get(stage)
+            if end is None:
+                continue
+            spans.append((stage, previous, end))
+            previous = end
+        return spans
+
+    def age_ms(self, now_ns: Optional[int] = None) -> float:
+        """time since capture"""
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        return (now_ns - self.stamps['capture']) / 1e6
+
+    def __repr__(self):
+        parts = ', '.join(f"{stage}={(end - start) / 1e6:.2f}ms"
+                          for stage, start, end in self.spans())
+        return f"FrameTrace(seq={self.seq}, {parts})"
+
+
+class TraceRecorder:
+    """
+    collects finished frame traces
+
+    keeps per-stage duration histograms (fixed ms buckets, all time) plus
+    the last `history` traces for percentiles and chrome trace export.
+    open the dumped json in chrome://tracing or ui.perfetto.dev
+    """
+
+    def __init__(self, history: int = 2000,
+                 bucket_edges_ms: Tuple[float, ...] = BUCKET_EDGES_MS):
+        self.bucket_edges_ms = tuple(bucket_edges_ms)
+        self._lock = threading.Lock()
+        self._traces = deque(maxlen=history)
+        self._names = STAGES[1:] + ('total',)
+        self._durations = {name: deque(maxlen=history) for name in self._names}
+        self._histograms = {name: [0] * (len(self.bucket_edges_ms) + 1)
+                            for name in self._names}
+
+        #stats
+        self.recorded = 0
+        self.superseded = 0
+
+    def begin(self, frame) -> FrameTrace:
+        """start tracing a dequeued camera Frame (marks capture and dequeue)"""
+        trace = FrameTrace(frame.seq, frame.timestamp_ns, self)
+        trace.mark('dequeue')
+        frame.trace = trace
+        return trace
+
+    def record(self, trace: FrameTrace):
+        """add a finished trace to the histograms"""
+        spans = trace.spans()
+        if not spans:
+            return
+        with self._lock:
+            for stage, start, end in spans:
+                self._add(stage, (end - start) / 1e6)
+            self._add('total', (spans[-1][2] - trace.stamps['capture']) / 1e6)
+            self._traces.append(trace)
+            self.recorded += 1
+
+    def _add(self, name: str, duration_ms: float):
+        self._durations[name].append(duration_ms)
+        self._histograms[name][bisect.bisect_left(self.bucket_edges_ms, duration_ms)] += 1
+
+    def drop(self, trace: FrameTrace):
+        with self._lock:
+            self.superseded += 1
+
+    def histogram(self, stage: str) -> List[Tuple[float, int]]:
+        """(bucket upper edge ms, count) pairs, the last edge is inf"""
+        with self._lock:
+            counts = list(self._histograms[stage])
+        return list(zip(self.bucket_edges_ms + (float('inf'),), counts))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """count, mean, p50, p99 and max in ms per stage and end to end"""
+        with self._lock:
+            return {name: summarize(list(values))
+                    for name, values in self._durations.items()}
+
+    def print_stats(self):
+        print(f"traced frames: {self.recorded} (superseded: {self.superseded})")
+        for name, s in self.stats().items():
+            if s['count']:
+                print(f"{name:>10}: p50 {s['p50']:.2f}ms p99 {s['p99']:.2f}ms "
+                      f"max {s['max']:.2f}ms")
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """trace-event format, one complete event per stage, one row per stage"""
+        pid = os.getpid()
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                   'args': {'name': stage}}
+                  for tid, stage in enumerate(STAGES[1:], start=1)]
+        with self._lock:
+            traces = list(self._traces)
+        for trace in traces:
+            for stage, start, end in trace.spans():
+                events.append({
+                    'name': stage,
+                    'cat': 'frame',
+                    'ph': 'X',
+                    'ts': start / 1000,
+                    'dur': (end - start) / 1000,
+                    'pid': pid,
+                    'tid': STAGES.index(stage),
+                    'args': {'seq': trace.seq},
+                })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, path: str) -> str:
+        """write the chrome trace json, returns the path"""
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+def test_trace(frames: int = 50, rate_hz: float = 30.0,
+               path: str = '/tmp/racecar_trace.json') -> bool:
+    """trace simulated frames through a fake model into the simulated bus"""
+    from .frame import Frame
+    from .hardware import create_sim_car
+
+    print(f"testing frame trace: {frames} frames @ {rate_hz}hz")
+
+    recorder = TraceRecorder()
+    car = create_sim_car()
+    image = None
+
+    for seq in range(1, frames + 1):
+        #camera side: frame captured a little before the loop picks it up
+        frame = Frame(image, seq, time.monotonic_ns() - 2000000)
+
+        trace = recorder.begin(frame)
+        time.sleep(0.001)
+        trace.mark('preprocess')
+        time.sleep(0.004)
+        trace.mark('inference')
+        car.set_controls(0.1 * (seq % 10) - 0.5, 0.0, trace=trace)
+
+        time.sleep(1.0 / rate_hz)
+
+    car.close()
+    recorder.print_stats()
+    recorder.dump_chrome_trace(path)
+    print(f"chrome trace written to {path}")
+
+    ok = recorder.recorded + recorder.superseded == frames and recorder.recorded > 0
+    print("frame trace ok" if ok else "frame trace lost frames")
+    return ok
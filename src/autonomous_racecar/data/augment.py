@@ -0,0 +1,175 @@
+#src/autonomous_racecar/data/augment.py
+#vectorized batch augmentation with steering-aware horizontal flip
+
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import torch
+
+from ..models.preprocess import IMAGENET_MEAN, IMAGENET_STD
+
+#rgb -> luma weights (itu-r 601, same as torchvision rgb_to_grayscale)
+_GRAY_WEIGHTS = (0.299, 0.587, 0.114)
+
+
+class BatchAugmentation:
+    """
+    augments and normalizes whole collated batches at once
+
+    input is a Bx3xHxW rgb uint8 batch (SessionDataset(dtype='uint8')) and
+    a BxN target batch whose columns are named by labels (for a dataset
+    pass labels=(dataset.label,)). a random mask of the batch is flipped
+    left-right and the steering column of those rows is negated (other
+    labels such as throttle are left as is), then brightness, contrast and
+    saturation factors in [1 - jitter, 1 + jitter] are drawn per image and
+    applied with broadcast ops, and the batch is normalized like
+    models.preprocess. every step is a handful of tensor ops on the whole
+    batch, no per-sample python. with enabled=False (validation) it only
+    normalizes
+    """
+
+    def __init__(self,
+                 horizontal_flip: float = 0.5,
+                 color_jitter: float = 0.2,
+                 enabled: bool = True,
+                 labels: Sequence[str] = ('steering',),
+                 mean: Tuple[float, float, float] = IMAGENET_MEAN,
+                 std: Tuple[float, float, float] = IMAGENET_STD,
+                 generator: Optional[torch.Generator] = None):
+        self.horizontal_flip = horizontal_flip
+        self.color_jitter = color_jitter
+        self.enabled = enabled
+        self.labels = tuple(labels)
+        #target column mirrored by a flip, None when steering is not a target
+        self._steering = self.labels.index('steering') if 'steering' in self.labels else None
+        self.generator = generator
+
+        #x / 255 then (x - mean) / std folded into one multiply-add
+        std_t = torch.tensor(std).view(1, 3, 1, 1)
+        self._scale = 1.0 / (255.0 * std_t)
+        self._shift = -torch.tensor(mean).view(1, 3, 1, 1) / std_t
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None,
+                    train: bool = True, **kwargs) -> 'BatchAugmentation':
+        """augmentation section of training_config.yaml"""
+        if config is None:
+            from ..utils.config import load_training_config
+            config = load_training_config()
+        augmentation = config.get('augmentation', {})
+        return cls(horizontal_flip=augmentation.get('horizontal_flip', 0.5),
+                   color_jitter=augmentation.get('color_jitter', 0.2),
+                   enabled=train and augmentation.get('enabled', True),
+                   **kwargs)
+
+    def _uniform(self, n: int, spread: float) -> torch.Tensor:
+        factors = torch.rand(n, 1, 1, 1, generator=self.generator)
+        return factors.mul_(2 * spread).add_(1 - spread)
+
+    def flip(self, images: torch.Tensor, targets: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """flip a random subset left-right (images in place) and negate their steering"""
+        mask = torch.rand(len(images), generator=self.generator) < self.horizontal_flip
+        index = mask.nonzero().squeeze(1)
+        if len(index):
+            images.index_copy_(0, index, images.index_select(0, index).flip(3))
+            if self._steering is not None:
+                targets = targets.clone()
+                targets[index, self._steering] = -targets[index, self._steering]
+        return images, targets
+
+    def jitter(self, x: torch.Tensor) -> torch.Tensor:
+        """brightness, contrast and saturation on a float 0-255 batch, in place"""
+        n = len(x)
+        j = self.color_jitter
+        brightness, contrast, saturation = (self._uniform(n, j) for _ in range(3))
+
+        #all three are linear in x and in the gray image, so they fold into
+        #one per-image multiply-add (clamped once at the end):
+        #  brightness  x * b
+        #  contrast    (x - m) * c + m, m the mean gray level
+        #  saturation  (x - g) * s + g, g the per pixel gray level
+        r, g, b = _GRAY_WEIGHTS
+        gray = x[:, 0:1] * r
+        gray.add_(x[:, 1:2], alpha=g).add_(x[:, 2:3], alpha=b)
+        mean = gray.mean((2, 3), keepdim=True)
+        scale = brightness * contrast
+        offset = mean * brightness * (1 - contrast)
+        gray.mul_(scale * (1 - saturation)).add_(offset)
+        x.mul_(scale * saturation).add_(gray)
+        return x.clamp_(0, 255)
+
+    def __call__(self, images: torch.Tensor,
+                 targets: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """uint8 batch -> augmented, normalized float32 batch"""
+        #one float copy of the batch, everything after works in place on it
+        x = images.float()
+        if self.enabled and self.horizontal_flip > 0:
+            x, targets = self.flip(x, targets)
+        if self.enabled and self.color_jitter > 0:
+            self.jitter(x)
+        x.mul_(self._scale).add_(self._shift)
+        return x, targets
+
+
+def _per_sample(augment: BatchAugmentation, images: torch.Tensor, targets: torch.Tensor):
+    #same ops one image at a time, the shape of a per-sample transform pipeline
+    out_images, out_targets = [], []
+    for image, target in zip(images, targets):
+        x, t = augment(image.unsqueeze(0), target.unsqueeze(0))
+        out_images.append(x)
+        out_targets.append(t)
+    return torch.cat(out_images), torch.cat(out_targets)
+
+
+def benchmark_augmentation(batch_sizes=(8, 16, 64), size: int = 224,
+                           repeats: int = 20) -> Dict[int, Dict[str, float]]:
+    """ms per batch, vectorized vs per-sample, for a few batch sizes"""
+    augment = BatchAugmentation()
+    results = {}
+    print(f"augmentation benchmark: {size}x{size}, flip 0.5, jitter 0.2")
+
+    for batch_size in batch_sizes:
+        images = torch.randint(0, 256, (batch_size, 3, size, size), dtype=torch.uint8)
+        targets = torch.rand(batch_size, 1) * 2 - 1
+        row = {}
+        for name, fn in (('batched', augment), ('per_sample', lambda i, t: _per_sample(augment, i, t))):
+            fn(images, targets)
+            t0 = time.perf_counter()
+            for _ in range(repeats):
+                fn(images, targets)
+            row[f'{name}_ms'] = (time.perf_counter() - t0) * 1000 / repeats
+        results[batch_size] = row
+        print(f"batch {batch_size:>3}: batched {row['batched_ms']:.2f}ms "
+              f"({row['batched_ms'] / batch_size:.3f}ms/sample), "
+              f"per-sample {row['per_sample_ms']:.2f}ms")
+    return results
+
+
+def test_flip_labels(batch_size: int = 256) -> bool:
+    """flipped images must come back with negated steering and unchanged throttle"""
+    augment = BatchAugmentation(horizontal_flip=0.5, color_jitter=0.0,
+                                labels=('steering', 'throttle'))
+    images = torch.zeros(batch_size, 3, 4, 4, dtype=torch.uint8)
+    images[:, :, :, 0] = 255  #bright left column marks orientation
+    targets = torch.rand(batch_size, 2) * 0.9 + 0.1
+
+    out, flipped_targets = augment.flip(images.clone(), targets)
+    flipped = out[:, 0, 0, 3] == 255
+    steering, throttle = flipped_targets[:, 0], flipped_targets[:, 1]
+    ok = bool(torch.all(steering[flipped] == -targets[flipped, 0]) and
+              torch.all(steering[~flipped] == targets[~flipped, 0]) and
+              torch.all(throttle == targets[:, 1]) and
+              0 < int(flipped.sum()) < batch_size)
+
+    #a throttle-only target is never negated
+    throttle_only = BatchAugmentation(horizontal_flip=1.0, color_jitter=0.0, labels=('throttle',))
+    _, kept = throttle_only.flip(images.clone(), targets[:, 1:])
+    ok = ok and bool(torch.all(kept == targets[:, 1:]))
+    print(f"flipped {int(flipped.sum())}/{batch_size}, labels "
+          f"{'negated correctly' if ok else 'wrong'}")
+    return ok
+
+
+if __name__ == "__main__":
+    test_flip_labels()
+    benchmark_augmentation()
@@ -0,0 +1,313 @@
+#src/autonomous_racecar/data/columnar.py
+#append-only memory-mapped columnar session format and multi-session reader
+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+FRAMES_FILE = 'frames.npy'
+
+#label columns, one .npy per column, row i belongs to frame i
+COLUMNS = {
+    'seq': np.int64,
+    'capture_ns': np.int64,
+    'record_ns': np.int64,
+    'steering': np.float32,
+    'throttle': np.float32,
+}
+
+#fixed npy header size so the row count can be patched in place on close
+HEADER_BYTES = 128
+_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def _npy_header(dtype, shape: Tuple[int, ...]) -> bytes:
+    """npy v1.0 header padded to HEADER_BYTES"""
+    header = repr({'descr': np.dtype(dtype).str, 'fortran_order': False,
+                   'shape': tuple(shape)})
+    pad = HEADER_BYTES - len(_MAGIC) - 2 - len(header) - 1
+    if pad < 0:
+        raise ValueError(f"npy header for shape {shape} does not fit in {HEADER_BYTES} bytes")
+    header = header + ' ' * pad + '\n'
+    return _MAGIC + struct.pack('<H', len(header)) + header.encode('latin1')
+
+
+class _AppendFile:
+    """npy file with a fixed header, rows appended, header patched on close"""
+
+    def __init__(self, path: Path, dtype, row_shape: Tuple[int, ...] = ()):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.row_shape = tuple(row_shape)
+        self.row_bytes = self.dtype.itemsize * int(np.prod(self.row_shape, dtype=np.int64))
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        size = os.fstat(self.fd).st_size
+        if size == 0:
+            os.write(self.fd, _npy_header(self.dtype, (0,) + self.row_shape))
+            size = HEADER_BYTES
+        #resume after the last complete row (e.g. after a crash)
+        self.rows = (size - HEADER_BYTES) // self.row_bytes
+        os.lseek(self.fd, HEADER_BYTES + self.rows * self.row_bytes, os.SEEK_SET)
+
+    def truncate(self, rows: int):
+        """drop rows past `rows`"""
+        self.rows = rows
+        os.ftruncate(self.fd, HEADER_BYTES + rows * self.row_bytes)
+        os.lseek(self.fd, HEADER_BYTES + rows * self.row_bytes, os.SEEK_SET)
+
+    def append(self, buffers: Sequence) -> int:
+        """append rows from buffer-protocol objects with one writev"""
+        views = [memoryview(b).cast('B') for b in buffers]
+        total = sum(len(v) for v in views)
+        written = 0
+        while written < total:
+            #writev may be partial, drop what is already on disk
+            skip = written
+            remaining = []
+            for view in views:
+                if skip >= len(view):
+                    skip -= len(view)
+                    continue
+                remaining.append(view[skip:])
+                skip = 0
+            written += os.writev(self.fd, remaining)
+        self.rows += total // self.row_bytes
+        return total
+
+    def close(self):
+        os.pwrite(self.fd, _npy_header(self.dtype, (self.rows,) + self.row_shape), 0)
+        os.fsync(self.fd)
+        os.close(self.fd)
+
+
+class ColumnarWriter:
+    """
+    append-only writer for one session directory
+
+    session layout:
+        frames.npy     - N x H x W x 3 uint8, fixed stride, one row per frame
+        <column>.npy   - N values per label column (COLUMNS)
+        manifest.json  - format version, frame shape, columns and row count
+
+    files are plain .npy (np.load works on a closed session). the header
+    is rewritten on close; until then, and after a crash, readers take the
+    row count from the file sizes, so every fully written row is usable
+    """
+
+    def __init__(self, path: Union[str, Path], frame_shape: Tuple[int, int, int]):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.frame_shape = tuple(frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+
+        self._frames = _AppendFile(self.path / FRAMES_FILE, np.uint8, self.frame_shape)
+        self._columns = {name: _AppendFile(self.path / f"{name}.npy", dtype)
+                         for name, dtype in COLUMNS.items()}
+        #rows only partly written before a crash are cut back everywhere
+        self.rows = min([self._frames.rows] + [c.rows for c in self._columns.values()])
+        for f in [self._frames] + list(self._columns.values()):
+            if f.rows != self.rows:
+                f.truncate(self.rows)
+        self._write_manifest()
+
+    def append(self, frames: Sequence[np.ndarray], labels: Dict[str, Sequence]) -> int:
+        """
+        append frames and their label rows, returns bytes written
+
+        everything is validated before the first write, and a failed write
+        (e.g. disk full) cuts every file back to the last complete row, so
+        frames and labels never drift apart
+        """
+        n = len(frames)
+        missing = [name for name in self._columns if name not in labels]
+        if missing:
+            raise ValueError(f"missing label columns: {', '.join(missing)}")
+        for i, frame in enumerate(frames):
+            if (not isinstance(frame, np.ndarray) or frame.dtype != np.uint8
+                    or frame.shape != self.frame_shape or not frame.flags.c_contiguous):
+                shape = getattr(frame, 'shape', None)
+                dtype = getattr(frame, 'dtype', type(frame).__name__)
+                raise ValueError(f"frame {i} is {dtype} {shape}, expected contiguous "
+                                 f"uint8 {self.frame_shape}")
+        values = {}
+        for name, column in self._columns.items():
+            values[name] = np.ascontiguousarray(labels[name], dtype=column.dtype)
+            if values[name].shape != (n,):
+                raise ValueError(f"label column '{name}' has shape {values[name].shape} "
+                                 f"for {n} frames")
+
+        try:
+            written = self._frames.append(frames)
+            for name, column in self._columns.items():
+                written += column.append([values[name]])
+        except OSError:
+            for f in [self._frames] + list(self._columns.values()):
+                f.truncate(self.rows)
+            raise
+        self.rows += n
+        return written
+
+    def _write_manifest(self):
+        manifest = {
+            'version': FORMAT_VERSION,
+            'frame_shape': list(self.frame_shape),
+            'frame_dtype': 'uint8',
+            'header_bytes': HEADER_BYTES,
+            'columns': {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+            'rows': self.rows,
+        }
+        with open(self.path / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    def close(self):
+        self._frames.close()
+        for column in self._columns.values():
+            column.close()
+        self._write_manifest()
+
+
+class Session:
+    """
+    one recorded session, memory mapped read-only
+
+    frames[i] is a zero-copy HxWx3 view, columns['steering'][i] etc. are the
+    matching labels. nothing is read from disk until it is indexed
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with open(self.path / MANIFEST_FILE) as f:
+            self.manifest = json.load(f)
+        if self.manifest['version'] != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: unsupported session format "
+                             f"{self.manifest['version']}")
+
+        self.frame_shape = tuple(self.manifest['frame_shape'])
+        header = self.manifest['header_bytes']
+        frame_bytes = int(np.prod(self.frame_shape))
+
+        #rows fully present in every file
+        rows = (os.path.getsize(self.path / FRAMES_FILE) - header) // frame_bytes
+        dtypes = {name: np.dtype(descr) for name, descr in self.manifest['columns'].items()}
+        for name, dtype in dtypes.items():
+            rows = min(rows, (os.path.getsize(self.path / f"{name}.npy") - header) // dtype.itemsize)
+        self.rows = int(rows)
+
+        self.frames = self._map(FRAMES_FILE, np.uint8, (self.rows,) + self.frame_shape, header)
+        self.columns = {name: self._map(f"{name}.npy", dtype, (self.rows,), header)
+                        for name, dtype in dtypes.items()}
+
+    def _map(self, name: str, dtype, shape, offset: int) -> np.ndarray:
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.path / name, dtype=dtype, mode='r', offset=offset, shape=shape)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, Dict[str, float]]:
+        """(frame view, labels) for one row"""
+        return self.frames[index], {name: column[index].item()
+                                    for name, column in self.columns.items()}
+
+    def __repr__(self):
+        return f"Session({self.path.name}, rows={self.rows}, frame_shape={self.frame_shape})"
+
+
+def find_sessions(root: Union[str, Path]) -> List[Path]:
+    """session directories (containing a manifest) under root, sorted"""
+    return sorted(p.parent for p in Path(root).glob(f"**/{MANIFEST_FILE}"))
+
+
+class MultiSessionDataset:
+    """
+    many sessions behind one virtual index
+
+    global index i maps to (session, row) with a binary search over the
+    cumulative row counts; frames stay memory mapped in their own files,
+    nothing is concatenated or loaded into RAM
+    """
+
+    def __init__(self, sessions: Iterable[Union[str, Path, Session]]):
+        self.sessions = [s if isinstance(s, Session) else Session(s) for s in sessions]
+        shapes = {s.frame_shape for s in self.sessions if len(s)}
+        if len(shapes) > 1:
+            raise ValueError(f"sessions have different frame shapes: {sorted(shapes)}")
+        self.frame_shape = shapes.pop() if shapes else None
+        #offsets[k] is the global index of session k's first row
+        self.offsets = np.cumsum([0] + [len(s) for s in self.sessions])
+
+    @classmethod
+    def from_root(cls, root: Optional[Union[str, Path]] = None) -> 'MultiSessionDataset':
+        """every session under root (default DATA_DIR)"""
+        if root is None:
+            from ..utils.config import DATA_DIR
+            root = DATA_DIR
+        return cls(find_sessions(root))
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def locate(self, index: int) -> Tuple[int, int]:
+        """(session index, row in session) for a global index"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"index {index} out of range for {len(self)} frames")
+        session = int(np.searchsorted(self.offsets, index, side='right')) - 1
+        return session, index - int(self.offsets[session])
+
+    def frame(self, index: int) -> np.ndarray:
+        session, row = self.locate(index)
+        return self.sessions[session].frames[row]
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, Dict[str, float]]:
+        session, row = self.locate(index)
+        return self.sessions[session][row]
+
+    def column(self, name: str) -> np.ndarray:
+        """one label column across all sessions (labels are small, frames are not)"""
+        if not self.sessions:
+            return np.empty(0, dtype=COLUMNS[name])
+        return np.concatenate([s.columns[name] for s in self.sessions])
+
+    def session_of(self, index: int) -> int:
+        return self.locate(index)[0]
+
+    def __repr__(self):
+        return f"MultiSessionDataset(sessions={len(self.sessions)}, frames={len(self)})"
+
+
+def benchmark_random_access(root: Optional[Union[str, Path]] = None,
+                            reads: int = 10000) -> Dict[str, float]:
+    """random frame + label reads across every session under root"""
+    import time
+
+    dataset = MultiSessionDataset.from_root(root)
+    print(f"random access benchmark: {dataset}")
+    if not len(dataset):
+        print("no sessions found")
+        return {}
+
+    indices = np.random.randint(0, len(dataset), reads)
+    checksum = 0
+    t0 = time.perf_counter()
+    for i in indices:
+        frame, labels = dataset[int(i)]
+        checksum += int(frame[0, 0, 0])
+    elapsed = time.perf_counter() - t0
+
+    result = {
+        'frames': len(dataset),
+        'reads_per_s': reads / elapsed,
+        'us_per_read': elapsed * 1e6 / reads,
+    }
+    print(f"{result['reads_per_s']:.0f} reads/s ({result['us_per_read']:.1f}us per frame + labels)")
+    return result
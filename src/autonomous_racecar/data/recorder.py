@@ -0,0 +1,279 @@
+#src/autonomous_racecar/data/recorder.py
+#asynchronous session recorder: bounded queue, chunked sequential writes
+
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from ..utils.stats import summarize
+from .columnar import ColumnarWriter
+
+DROP_POLICIES = ('drop_newest', 'drop_oldest')
+
+STATS_FILE = 'recorder_stats.json'
+
+
+class SessionRecorder:
+    """
+    records (frame, steering, throttle, timestamps) from the control loop
+
+    record() copies the frame into one of `queue_size` preallocated buffers
+    and returns immediately, it never blocks and never touches the disk. a
+    writer thread takes up to `chunk_frames` queued frames at a time and
+    appends them to the session's frames.npy with one writev (large
+    sequential writes are what sd cards are fast at) and the labels to
+    their column files, see columnar.ColumnarWriter for the layout. when
+    every buffer is queued the drop policy decides: 'drop_newest' rejects
+    the new frame, 'drop_oldest' overwrites the oldest unwritten one.
+    if a write fails (e.g. the card is full) the error is kept in `error`,
+    queued and later samples are dropped, and stop() raises it
+    """
+
+    def __init__(self,
+                 root: Optional[str] = None,
+                 name: Optional[str] = None,
+                 frame_shape: Tuple[int, int, int] = (224, 224, 3),
+                 queue_size: int = 64,
+                 chunk_frames: int = 16,
+                 drop_policy: str = 'drop_newest',
+                 flush_interval: float = 0.5):
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"drop policy must be one of {DROP_POLICIES}")
+        if root is None:
+            from ..utils.config import DATA_DIR
+            root = DATA_DIR
+        self.path = Path(root) / (name or time.strftime('session_%Y%m%d_%H%M%S'))
+        self.frame_shape = tuple(frame_shape)
+        self.frame_bytes = int(np.prod(self.frame_shape))
+        self.queue_size = max(queue_size, chunk_frames)
+        self.chunk_frames = chunk_frames
+        self.drop_policy = drop_policy
+        self.flush_interval = flush_interval
+
+        self._cond = threading.Condition()
+        self._free = []
+        self._pending = deque()
+        self._thread = None
+        self._running = False
+        self._seq = 0
+        self.error = None
+
+        #stats
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.bytes_written = 0
+        self.queue_high_water = 0
+        self._write_time = 0.0
+        self._chunk_ms = deque(maxlen=1000)
+        self._record_us = deque(maxlen=5000)
+        self._started = None
+        self._stopped = None
+
+    def start(self) -> bool:
+        """create the session directory and start the writer thread"""
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._free = [np.empty(self.frame_shape, dtype=np.uint8)
+                      for _ in range(self.queue_size)]
+        self._pending.clear()
+        self.error = None
+        self._writer = ColumnarWriter(self.path, self.frame_shape)
+        self._seq = self._writer.rows
+
+        self._running = True
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+        print(f"recording session to {self.path}")
+        return True
+
+    def record(self, image: np.ndarray, steering: float, throttle: float,
+               capture_ns: Optional[int] = None) -> bool:
+        """queue one sample without blocking, False if it was dropped"""
+        t0 = time.perf_counter()
+        if image.shape != self.frame_shape:
+            self.rejected += 1
+            return False
+
+        with self._cond:
+            if not self._running:
+                return False
+            if self.error is not None:
+                #the writer is gone, nothing would reach the disk
+                self.dropped += 1
+                return False
+            if self._free:
+                buffer = self._free.pop()
+            elif self.drop_policy == 'drop_oldest' and self._pending:
+                buffer = self._pending.popleft()[0]
+                self.dropped += 1
+            else:
+                #every buffer is queued (or being written)
+                self.dropped += 1
+                return False
+
+            np.copyto(buffer, image)
+            self._seq += 1
+            record_ns = time.monotonic_ns()
+            self._pending.append((buffer, self._seq,
+                                  capture_ns if capture_ns is not None else record_ns,
+                                  record_ns, steering, throttle))
+            self.recorded += 1
+            depth = len(self._pending)
+            if depth > self.queue_high_water:
+                self.queue_high_water = depth
+            if depth >= self.chunk_frames:
+                self._cond.notify()
+
+        self._record_us.append((time.perf_counter() - t0) * 1e6)
+        return True
+
+    def record_frame(self, frame, steering: float, throttle: float) -> bool:
+        """record a camera Frame, keeping its capture timestamp"""
+        return self.record(frame.image, steering, throttle, frame.timestamp_ns)
+
+    def _writer_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.chunk_frames or not self._running,
+                    self.flush_interval)
+                chunk = [self._pending.popleft()
+                         for _ in range(min(self.chunk_frames, len(self._pending)))]
+                done = not self._running and not self._pending
+
+            if chunk:
+                try:
+                    self._write_chunk(chunk)
+                except Exception as e:
+                    print(f"recording failed: {e!r}")
+                    with self._cond:
+                        self.error = e
+                        #the chunk and everything still queued is lost
+                        self.dropped += len(chunk) + len(self._pending)
+                        self._free.extend(item[0] for item in self._pending)
+                        self._pending.clear()
+                finally:
+                    with self._cond:
+                        self._free.extend(item[0] for item in chunk)
+                if self.error is not None:
+                    break
+            if done:
+                break
+
+    def _write_chunk(self, chunk):
+        t0 = time.perf_counter()
+        _, seq, capture_ns, record_ns, steering, throttle = zip(*chunk)
+        written = self._writer.append(
+            [item[0] for item in chunk],
+            {'seq': seq, 'capture_ns': capture_ns, 'record_ns': record_ns,
+             'steering': steering, 'throttle': throttle})
+
+        elapsed = time.perf_counter() - t0
+        self._write_time += elapsed
+        self._chunk_ms.append(elapsed * 1000)
+        self.written += len(chunk)
+        self.bytes_written += written
+
+    def stop(self) -> Dict[str, float]:
+        """
+        write everything still queued, close the files and save session.json,
+        raises RuntimeError if a write failed (what reached the disk is kept)
+        """
+        with self._cond:
+            if not self._running:
+                return self.stats()
+            self._running = False
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+        self._stopped = time.monotonic()
+
+        try:
+            self._writer.close()
+            stats = self.stats()
+            with open(self.path / STATS_FILE, 'w') as f:
+                json.dump(stats, f, indent=2)
+        except OSError as e:
+            if self.error is None:
+                self.error = e
+        if self.error is not None:
+            print(f"session incomplete: {self.written} frames written, {self.dropped} dropped")
+            raise RuntimeError(f"recording to {self.path} failed: {self.error!r}") from self.error
+        print(f"session saved: {self.written} frames, {self.dropped} dropped")
+        return stats
+
+    @property
+    def running(self) -> bool:
+        return self._running and self.error is None
+
+    def stats(self) -> Dict[str, float]:
+        """counts, queue pressure and write throughput"""
+        end = self._stopped or time.monotonic()
+        elapsed = end - self._started if self._started else 0.0
+        chunk = summarize(list(self._chunk_ms))
+        record = summarize(list(self._record_us))
+        return {
+            'recorded': self.recorded,
+            'written': self.written,
+            'dropped': self.dropped,
+            'rejected': self.rejected,
+            'queued': len(self._pending),
+            'queue_high_water': self.queue_high_water,
+            'mb_written': self.bytes_written / 1e6,
+            'write_mb_per_s': self.bytes_written / 1e6 / self._write_time if self._write_time else 0.0,
+            'sustained_fps': self.written / elapsed if elapsed else 0.0,
+            'chunk_p99_ms': chunk['p99'],
+            'record_p99_us': record['p99'],
+            'error': repr(self.error) if self.error is not None else None,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"recorded: {s['recorded']}, written: {s['written']}, dropped: {s['dropped']}, "
+              f"queue high water: {s['queue_high_water']}/{self.queue_size}")
+        print(f"disk: {s['mb_written']:.1f}MB at {s['write_mb_per_s']:.1f}MB/s while writing, "
+              f"{s['sustained_fps']:.1f} frames/s sustained")
+        print(f"chunk write p99: {s['chunk_p99_ms']:.2f}ms, record() p99: {s['record_p99_us']:.1f}us")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def benchmark_recorder(seconds: float = 5.0,
+                       fps: float = 21.0,
+                       frame_shape: Tuple[int, int, int] = (224, 224, 3),
+                       root: Optional[str] = None,
+                       **kwargs) -> Dict[str, float]:
+    """record synthetic frames at camera rate from a paced control loop"""
+    import tempfile
+
+    print(f"recorder benchmark: {frame_shape} @ {fps}fps for {seconds}s")
+    root = root or tempfile.mkdtemp(prefix='racecar_rec_')
+    image = np.random.randint(0, 256, frame_shape, dtype=np.uint8)
+
+    recorder = SessionRecorder(root, 'benchmark', frame_shape=frame_shape, **kwargs)
+    recorder.start()
+    start = time.monotonic()
+    i = 0
+    while time.monotonic() - start < seconds:
+        recorder.record(image, 0.0, 0.0)
+        i += 1
+        time.sleep(max(0.0, start + i / fps - time.monotonic()))
+    recorder.stop()
+    recorder.print_stats()
+    return recorder.stats()
+
+
+if __name__ == "__main__":
+    benchmark_recorder()
@@ -0,0 +1,339 @@
+#src/autonomous_racecar/data/torch_dataset.py
+#torch Dataset/Sampler over recorded sessions with an lru frame cache
+
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+from .columnar import MultiSessionDataset, find_sessions
+
+
+class FrameCache:
+    """
+    bounded lru cache of resized uint8 frames, keyed by global index
+
+    lives inside each loader worker; with persistent_workers the workers
+    (and their caches) survive between epochs. the loader hands batch k to
+    worker k % num_workers, so a plain shuffle sends a frame to a different
+    worker (and cache) each epoch and only ~1/num_workers of the lookups
+    can hit. SessionSampler(num_workers=..., batch_size=...) shards the
+    rows by worker so every frame is revisited by the worker that cached it
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self.bytes = 0
+
+        #stats
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, index: int) -> Optional[np.ndarray]:
+        frame = self._frames.get(index)
+        if frame is None:
+            self.misses += 1
+            return None
+        self._frames.move_to_end(index)
+        self.hits += 1
+        return frame
+
+    def put(self, index: int, frame: np.ndarray):
+        if frame.nbytes > self.max_bytes:
+            return
+        self._frames[index] = frame
+        self.bytes += frame.nbytes
+        while self.bytes > self.max_bytes:
+            _, evicted = self._frames.popitem(last=False)
+            self.bytes -= evicted.nbytes
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+
+class SessionDataset(Dataset):
+    """
+    (image, steering) samples from recorded sessions
+
+    holds only session paths, the memory maps are opened lazily in each
+    process (np.memmap would otherwise be pickled into every worker as a
+    full copy). samples are the model input: 3xHxW float32 normalized with
+    models.preprocess.Preprocessor, target is a 1 element float32 tensor.
+    dtype='uint8' returns 3xHxW rgb uint8 instead, for batch augmentation
+    and normalization after collation (data.augment.BatchAugmentation with
+    labels=(dataset.label,), so a flip only negates steering targets)
+
+    cache_bytes is the budget of all loader workers together, each worker
+    gets cache_bytes / num_workers. frames already recorded at target_size
+    are not cached, they are read straight from the memory map
+    """
+
+    def __init__(self,
+                 sessions: Sequence[Union[str, Path]],
+                 target_size: Tuple[int, int] = (224, 224),
+                 cache_bytes: int = 256 * 1024 * 1024,
+                 label: str = 'steering',
+                 dtype: str = 'float32'):
+        if dtype not in ('float32', 'uint8'):
+            raise ValueError("dataset dtype must be 'float32' or 'uint8'")
+        self.session_paths = [Path(s) for s in sessions]
+        self.target_size = tuple(target_size)
+        self.cache_bytes = cache_bytes
+        self.label = label
+        self.dtype = getattr(torch, dtype)
+
+        #row counts without keeping the maps around
+        index = MultiSessionDataset(self.session_paths)
+        self.offsets = index.offsets
+        self.session_rows = [len(s) for s in index.sessions]
+
+        self._pid = None
+        self._index = None
+        self._cache = None
+        self._preprocess = None
+
+    @classmethod
+    def from_root(cls, root: Optional[Union[str, Path]] = None, **kwargs) -> 'SessionDataset':
+        if root is None:
+            from ..utils.config import DATA_DIR
+            root = DATA_DIR
+        return cls(find_sessions(root), **kwargs)
+
+    def _open(self):
+        #once per process (main or loader worker)
+        from ..models.preprocess import Preprocessor
+
+        self._pid = os.getpid()
+        self._index = MultiSessionDataset(self.session_paths)
+        worker = torch.utils.data.get_worker_info()
+        workers = worker.num_workers if worker is not None else 1
+        self._cache = FrameCache(self.cache_bytes // workers)
+        self._preprocess = Preprocessor(self.target_size, as_tensor=False)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def frame(self, index: int) -> np.ndarray:
+        """resized uint8 HxWx3 frame, from the cache when possible"""
+        if self._pid != os.getpid():
+            self._open()
+        frame = self._index.frame(index)
+        if frame.shape[1::-1] == self.target_size:
+            #zero-copy view of the map, nothing to save by caching it
+            return frame
+        resized = self._cache.get(index)
+        if resized is None:
+            import cv2
+            resized = cv2.resize(frame, self.target_size)
+            self._cache.put(index, resized)
+        return resized
+
+    def __getitem__(self, index: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        frame = self.frame(index)
+        width, height = self.target_size
+        image = torch.empty((3, height, width), dtype=self.dtype)
+        self._preprocess.process_into(frame, image.numpy())
+
+        session, row = self._index.locate(index)
+        target = float(self._index.sessions[session].columns[self.label][row])
+        return image, torch.tensor([target], dtype=torch.float32)
+
+    def cache_stats(self) -> Dict[str, int]:
+        """cache of this process (the main process when num_workers is 0)"""
+        if self._cache is None:
+            return {'frames': 0, 'bytes': 0, 'hits': 0, 'misses': 0}
+        return {'frames': len(self._cache), 'bytes': self._cache.bytes,
+                'hits': self._cache.hits, 'misses': self._cache.misses}
+
+
+def split_sessions(num_sessions: int, train_split: float = 0.8,
+                   seed: int = 0) -> Tuple[List[int], List[int]]:
+    """
+    train/val session indices, whole sessions go to one side
+
+    neighbouring frames are nearly identical, so a per-frame split would
+    leak validation frames into training. with a single session it falls
+    back to train only
+    """
+    order = np.random.default_rng(seed).permutation(num_sessions).tolist()
+    n_train = max(1, int(round(num_sessions * train_split))) if num_sessions else 0
+    if num_sessions > 1:
+        n_train = min(n_train, num_sessions - 1)
+    return sorted(order[:n_train]), sorted(order[n_train:])
+
+
+class SessionSampler(Sampler):
+    """
+    global indices of the rows belonging to a subset of sessions
+
+    works on the dataset's row offsets only (no copies of the data).
+    shuffle draws a new permutation every epoch, call set_epoch(epoch) for
+    a reproducible order
+
+    with num_workers > 1 and the loader's batch_size the shuffled rows are
+    split once into one fixed shard per worker, each batch is drawn from a
+    single shard and batches are interleaved in the loader's round robin
+    order, so a row is loaded by the same worker (and its FrameCache) every
+    epoch. only the last few batches of an epoch (leftovers of uneven
+    shards) can land on another worker
+    """
+
+    def __init__(self, dataset: SessionDataset, sessions: Sequence[int],
+                 shuffle: bool = True, seed: int = 0,
+                 num_workers: int = 0, batch_size: int = 1):
+        self.offsets = dataset.offsets
+        self.sessions = list(sessions)
+        self.shuffle = shuffle
+        self.seed = seed
+        self.epoch = 0
+        self.num_workers = num_workers
+        self.batch_size = batch_size
+        self._shards = None
+
+    def set_epoch(self, epoch: int):
+        self.epoch = epoch
+
+    def _indices(self) -> np.ndarray:
+        ranges = [np.arange(self.offsets[s], self.offsets[s + 1]) for s in self.sessions]
+        return np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+
+    def _sharded(self, rng: np.random.Generator) -> np.ndarray:
+        if self._shards is None:
+            indices = self._indices()
+            indices = indices[np.random.default_rng(self.seed).permutation(len(indices))]
+            self._shards = np.array_split(indices, self.num_workers)
+        size = self.batch_size
+        batches = []
+        leftovers = []
+        for shard in self._shards:
+            shard = shard[rng.permutation(len(shard))]
+            full = len(shard) // size * size
+            batches.append(np.split(shard[:full], full // size) if full else [])
+            leftovers.append(shard[full:])
+
+        #batch k goes to worker k % num_workers
+        rounds = min(len(b) for b in batches)
+        order = [b[r] for r in range(rounds) for b in batches]
+        order += [batch for b in batches for batch in b[rounds:]]
+        order += leftovers
+        return np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+
+    def __iter__(self) -> Iterator[int]:
+        if self.shuffle:
+            rng = np.random.default_rng(self.seed + self.epoch)
+            self.epoch += 1
+            if self.num_workers > 1:
+                indices = self._sharded(rng)
+            else:
+                indices = self._indices()
+                indices = indices[rng.permutation(len(indices))]
+        else:
+            #fixed order, batch k always goes to the same worker
+            indices = self._indices()
+        return iter(indices.tolist())
+
+    def __len__(self) -> int:
+        return int(sum(self.offsets[s + 1] - self.offsets[s] for s in self.sessions))
+
+
+def create_loaders(root: Optional[Union[str, Path]] = None,
+                   config: Optional[Dict[str, Any]] = None,
+                   target_size: Optional[Tuple[int, int]] = None,
+                   cache_bytes: int = 256 * 1024 * 1024,
+                   prefetch_factor: int = 4,
+                   seed: int = 0,
+                   dtype: str = 'float32') -> Tuple[DataLoader, DataLoader]:
+    """
+    train/val loaders from training_config.yaml (batch_size, num_workers,
+    train_split). dtype='uint8' yields uint8 batches for BatchAugmentation.
+    cache_bytes is shared by the workers of each loader
+    """
+    if config is None:
+        from ..utils.config import load_training_config
+        config = load_training_config()
+    data = config.get('data', {})
+    if target_size is None:
+        from ..utils.config import load_hardware_config
+        target_size = load_hardware_config().get('camera', {}).get('target_size', (224, 224))
+
+    dataset = SessionDataset.from_root(root, target_size=target_size,
+                                       cache_bytes=cache_bytes, dtype=dtype)
+    train, val = split_sessions(len(dataset.session_paths), data.get('train_split', 0.8), seed)
+
+    num_workers = data.get('num_workers', 2)
+    batch_size = data.get('batch_size', 16)
+    loader_args = {
+        'batch_size': batch_size,
+        'num_workers': num_workers,
+        'pin_memory': torch.cuda.is_available(),
+    }
+    if num_workers > 0:
+        #workers keep their frame caches between epochs
+        loader_args.update(prefetch_factor=prefetch_factor, persistent_workers=True)
+
+    print(f"dataset: {len(dataset)} frames in {len(dataset.session_paths)} sessions "
+          f"({len(train)} train / {len(val)} val)")
+    train_sampler = SessionSampler(dataset, train, True, seed,
+                                   num_workers=num_workers, batch_size=batch_size)
+    return (DataLoader(dataset, sampler=train_sampler, **loader_args),
+            DataLoader(dataset, sampler=SessionSampler(dataset, val, False), **loader_args))
+
+
+def benchmark_loader(loader: DataLoader, epochs: int = 2,
+                     model: Optional[torch.nn.Module] = None,
+                     transform=None) -> Dict[str, float]:
+    """
+    samples/sec per epoch, and with a model the share of each step spent
+    waiting for data (data-bound if it dominates, compute-bound otherwise).
+    transform(images, targets) runs on each batch and counts as data time
+    """
+    results = {}
+    if model is not None:
+        optimizer = torch.optim.SGD(model.parameters(), lr=1e-3)
+        loss_fn = torch.nn.MSELoss()
+
+    for epoch in range(epochs):
+        samples = 0
+        data_time = compute_time = 0.0
+        t0 = time.perf_counter()
+        end = t0
+        for images, targets in loader:
+            if transform is not None:
+                images, targets = transform(images, targets)
+            loaded = time.perf_counter()
+            data_time += loaded - end
+            if model is not None:
+                optimizer.zero_grad()
+                loss = loss_fn(model(images), targets)
+                loss.backward()
+                optimizer.step()
+            end = time.perf_counter()
+            compute_time += end - loaded
+            samples += len(images)
+        elapsed = time.perf_counter() - t0
+
+        rate = samples / elapsed if elapsed else 0.0
+        data_share = data_time / elapsed if elapsed else 0.0
+        results[f'epoch{epoch}_samples_per_s'] = rate
+        results[f'epoch{epoch}_data_share'] = data_share
+        line = f"epoch {epoch}: {samples} samples, {rate:.0f} samples/s"
+        if model is not None:
+            line += f", {data_share * 100:.0f}% waiting for data"
+        print(line)
+
+    if model is not None:
+        bound = 'data' if results[f'epoch{epochs - 1}_data_share'] > 0.5 else 'compute'
+        print(f"training is {bound}-bound")
+        results['bound'] = bound
+    return results
+
+
+if __name__ == "__main__":
+    train_loader, _ = create_loaders()
+    benchmark_loader(train_loader)
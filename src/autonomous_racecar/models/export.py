@@ -0,0 +1,341 @@
+#src/autonomous_racecar/models/export.py
+#checkpoint -> torchscript / onnx artifacts, optionally int8, plus a benchmark
+
+import copy
+import importlib.util
+import inspect
+import time
+import warnings
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+
+from ..utils.stats import summarize
+from .inference import EagerRunner, InferenceRunner, load_runner
+from .networks import SteeringModel, load_checkpoint
+
+VARIANTS = (
+    'torchscript',
+    'torchscript_dynamic_int8',
+    'torchscript_static_int8',
+    'onnx',
+    'onnx_dynamic_int8',
+    'onnx_static_int8',
+)
+
+ONNX_OPSET = 13
+
+
+@contextmanager
+def _quiet():
+    #torch.jit / torch.ao deprecation warnings on newer torch, not actionable on the jetson
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        yield
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def quantize_dynamic(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    int8 weights for the linear layers, activations quantized on the fly.
+    no calibration needed, but convolutions stay fp32, so on a conv
+    backbone this mostly shrinks and speeds up the head
+    """
+    from torch.ao.quantization import quantize_dynamic as ao_quantize_dynamic
+
+    with _quiet():
+        return ao_quantize_dynamic(copy.deepcopy(model).eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+
+@torch.no_grad()
+def quantize_static(model: torch.nn.Module, calibration: Sequence[torch.Tensor],
+                    example: torch.Tensor) -> torch.nn.Module:
+    """
+    int8 weights and activations for the whole network (fx graph mode).
+    activation ranges come from running the calibration batches, which
+    should be real recorded frames. uses the active quantized engine
+    (qnnpack on arm, x86/fbgemm on a desktop)
+    """
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    engine = torch.backends.quantized.engine
+    with _quiet():
+        prepared = prepare_fx(copy.deepcopy(model).eval(),
+                              get_default_qconfig_mapping(engine), (example,))
+        for batch in calibration:
+            prepared(batch)
+        return convert_fx(prepared)
+
+
+@torch.no_grad()
+def export_torchscript(model: torch.nn.Module, path: Union[str, Path],
+                       example: torch.Tensor) -> Path:
+    """traced and frozen (weights inlined, conv+bn folded) torchscript module"""
+    path = Path(path)
+    with _quiet():
+        traced = torch.jit.trace(model.eval(), example)
+        frozen = torch.jit.freeze(traced)
+        torch.jit.save(frozen, str(path))
+    return path
+
+
+def export_onnx(model: torch.nn.Module, path: Union[str, Path],
+                example: torch.Tensor, opset: int = ONNX_OPSET) -> Path:
+    """fp32 onnx graph with a dynamic batch dimension (needs the onnx package)"""
+    path = Path(path)
+    kwargs = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        #torchscript based exporter, the dynamo one needs onnxscript
+        kwargs['dynamo'] = False
+    with _quiet(), torch.no_grad():
+        torch.onnx.export(model.eval(), (example,), str(path),
+                          input_names=['image'], output_names=['controls'],
+                          dynamic_axes={'image': {0: 'batch'}, 'controls': {0: 'batch'}},
+                          opset_version=opset, **kwargs)
+    return path
+
+
+def quantize_onnx(source: Union[str, Path], path: Union[str, Path], mode: str = 'dynamic',
+                  calibration: Optional[Sequence[torch.Tensor]] = None) -> Path:
+    """onnxruntime int8 quantization, 'dynamic' or 'static' (needs calibration)"""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic as ort_quantize_dynamic,
+                                          quantize_static as ort_quantize_static)
+
+    path = Path(path)
+    if mode == 'dynamic':
+        ort_quantize_dynamic(str(source), str(path), weight_type=QuantType.QInt8)
+        return path
+    if mode != 'static':
+        raise ValueError("onnx quantization mode must be 'dynamic' or 'static'")
+    if not calibration:
+        raise ValueError("static quantization needs calibration batches")
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = iter(calibration)
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {'image': batch.numpy()}
+
+    ort_quantize_static(str(source), str(path), Reader(),
+                        quant_format=QuantFormat.QDQ,
+                        activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8)
+    return path
+
+
+def export_all(model: torch.nn.Module,
+               out_dir: Union[str, Path],
+               target_size: Tuple[int, int] = (224, 224),
+               calibration: Optional[Sequence[torch.Tensor]] = None,
+               variants: Sequence[str] = VARIANTS,
+               name: str = 'steering') -> Dict[str, Path]:
+    """
+    write every requested variant to out_dir/<name>_<variant>.(pt|onnx).
+    variants whose dependency (onnx, onnxruntime) or input (calibration
+    batches for static int8) is missing are skipped with a message
+    """
+    unknown = set(variants) - set(VARIANTS)
+    if unknown:
+        raise ValueError(f"unknown export variants {sorted(unknown)}, expected {VARIANTS}")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    width, height = target_size
+    example = torch.randn(1, 3, height, width)
+    model = model.eval()
+
+    artifacts = {}
+    onnx_fp32 = None
+    for variant in variants:
+        if variant.endswith('static_int8') and not calibration:
+            print(f"{variant}: skipped, no calibration frames")
+            continue
+        if variant.startswith('onnx') and not _available('onnx'):
+            print(f"{variant}: skipped, onnx is not installed")
+            continue
+        if variant.startswith('onnx_') and not _available('onnxruntime'):
+            print(f"{variant}: skipped, onnxruntime is not installed")
+            continue
+
+        t0 = time.perf_counter()
+        if variant == 'torchscript':
+            path = export_torchscript(model, out_dir / f"{name}_{variant}.pt", example)
+        elif variant == 'torchscript_dynamic_int8':
+            path = export_torchscript(quantize_dynamic(model), out_dir / f"{name}_{variant}.pt", example)
+        elif variant == 'torchscript_static_int8':
+            path = export_torchscript(quantize_static(model, calibration, example),
+                                      out_dir / f"{name}_{variant}.pt", example)
+        else:
+            #the int8 onnx variants are quantized from the fp32 graph
+            if onnx_fp32 is None:
+                onnx_fp32 = export_onnx(model, out_dir / f"{name}_onnx.onnx", example)
+            if variant == 'onnx':
+                path = onnx_fp32
+            else:
+                mode = 'dynamic' if variant == 'onnx_dynamic_int8' else 'static'
+                path = quantize_onnx(onnx_fp32, out_dir / f"{name}_{variant}.onnx", mode, calibration)
+        artifacts[variant] = path
+        print(f"{variant}: {path} ({path.stat().st_size / 1e6:.1f}MB, "
+              f"{time.perf_counter() - t0:.1f}s)")
+    return artifacts
+
+
+def _session_frames(dataset, sessions: Sequence[int], count: int, seed: int) -> np.ndarray:
+    #up to `count` random global indices from the given sessions, sorted
+    ranges = [np.arange(dataset.offsets[s], dataset.offsets[s + 1]) for s in sessions]
+    indices = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+    if len(indices) > count:
+        indices = np.random.default_rng(seed).choice(indices, count, replace=False)
+    return np.sort(indices)
+
+
+def recorded_frames(root: Optional[Union[str, Path]] = None,
+                    target_size: Tuple[int, int] = (224, 224),
+                    calibration_frames: int = 64,
+                    validation_frames: int = 256,
+                    batch_size: int = 8,
+                    train_split: float = 0.8,
+                    seed: int = 0) -> Tuple[List[torch.Tensor], Optional[torch.Tensor], Optional[torch.Tensor]]:
+    """
+    calibration batches from the training sessions and a validation set
+    (images, steering) from the held out ones, preprocessed exactly like
+    the car does. with a single session there is nothing held out: the
+    images come from the training session and steering is None, so no
+    accuracy is reported on frames the model was trained on
+    """
+    from ..data.columnar import MultiSessionDataset
+    from ..data.torch_dataset import SessionDataset, split_sessions
+
+    dataset = SessionDataset.from_root(root, target_size=target_size, cache_bytes=0)
+    if not len(dataset):
+        return [], None, None
+    train, val = split_sessions(len(dataset.session_paths), train_split, seed)
+
+    calibration = [torch.stack([dataset[int(i)][0] for i in chunk])
+                   for chunk in np.array_split(_session_frames(dataset, train, calibration_frames, seed),
+                                               max(1, calibration_frames // batch_size))
+                   if len(chunk)]
+
+    indices = _session_frames(dataset, val or train, validation_frames, seed + 1)
+    images = torch.stack([dataset[int(i)][0] for i in indices])
+    if not val:
+        print("single session, no held out frames: accuracy not reported")
+        return calibration, images, None
+    steering = MultiSessionDataset(dataset.session_paths).column('steering')[indices]
+    return calibration, images, torch.from_numpy(steering.astype(np.float32))
+
+
+def benchmark_variants(runners: Dict[str, InferenceRunner],
+                       images: torch.Tensor,
+                       targets: Optional[torch.Tensor] = None,
+                       runs: int = 100,
+                       batch_size: int = 16) -> Dict[str, Dict[str, float]]:
+    """
+    per runner: batch-1 latency, batched throughput, steering mae on the
+    validation set and its drift from the first runner (the fp32 reference).
+    targets must come from held out sessions, pass None to skip the mae
+    """
+    results = {}
+    reference = None
+    reference_mae = None
+    print(f"benchmark: {len(images)} validation frames, {runs} single-frame runs, "
+          f"batch {batch_size} for throughput")
+
+    for name, runner in runners.items():
+        runner.warmup(images[:1])
+        latencies = []
+        for i in range(runs):
+            x = images[i % len(images):i % len(images) + 1]
+            t0 = time.perf_counter()
+            runner(x)
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+        predictions = []
+        t0 = time.perf_counter()
+        for batch in images.split(batch_size):
+            predictions.append(runner(batch)[:, 0].float())
+        elapsed = time.perf_counter() - t0
+        steering = torch.cat(predictions)
+        if reference is None:
+            reference = steering
+
+        latency = summarize(latencies)
+        row = {
+            'latency_p50_ms': latency['p50'],
+            'latency_p99_ms': latency['p99'],
+            'frames_per_s': len(images) / elapsed if elapsed else 0.0,
+            'max_diff_vs_reference': float((steering - reference).abs().max()),
+        }
+        if targets is not None:
+            row['steering_mae'] = float((steering - targets).abs().mean())
+            if reference_mae is None:
+                reference_mae = row['steering_mae']
+            row['mae_drift'] = row['steering_mae'] - reference_mae
+        path = getattr(runner, 'path', None)
+        row['size_mb'] = path.stat().st_size / 1e6 if path is not None else 0.0
+        results[name] = row
+
+        line = (f"{name:>26}: p50 {row['latency_p50_ms']:6.2f}ms p99 {row['latency_p99_ms']:6.2f}ms "
+                f"{row['frames_per_s']:7.1f} frames/s")
+        if targets is not None:
+            line += f", mae {row['steering_mae']:.4f} (drift {row['mae_drift']:+.4f})"
+        line += f", max diff {row['max_diff_vs_reference']:.4f}"
+        print(line)
+    return results
+
+
+def export_and_benchmark(checkpoint: Optional[Union[str, Path]] = None,
+                         model: Optional[SteeringModel] = None,
+                         root: Optional[Union[str, Path]] = None,
+                         out_dir: Optional[Union[str, Path]] = None,
+                         variants: Sequence[str] = VARIANTS,
+                         calibration_frames: int = 64,
+                         validation_frames: int = 256) -> Dict[str, Dict[str, float]]:
+    """
+    export a trained checkpoint (default MODEL_DIR/steering.pth) to every
+    variant, calibrating and validating on recorded sessions under root,
+    and benchmark them against the eager fp32 model
+    """
+    from ..utils.config import MODEL_DIR
+
+    if checkpoint is None and model is None:
+        checkpoint = MODEL_DIR / 'steering.pth'
+    if checkpoint is not None:
+        model = load_checkpoint(checkpoint, model)
+    model.eval()
+    out_dir = Path(out_dir) if out_dir else MODEL_DIR
+    target_size = model.target_size
+    if target_size is None:
+        from ..utils.config import load_hardware_config
+        target_size = tuple(load_hardware_config().get('camera', {}).get('target_size', (224, 224)))
+
+    calibration, images, targets = recorded_frames(root, target_size, calibration_frames,
+                                                   validation_frames)
+    if images is None:
+        #random inputs are fine for timing but would calibrate static int8
+        #on noise, so those variants are skipped
+        print("no recorded sessions, using random inputs (no accuracy numbers, "
+              "no static int8)")
+        width, height = target_size
+        calibration = []
+        images = torch.randn(validation_frames, 3, height, width)
+
+    artifacts = export_all(model, out_dir, target_size, calibration, variants,
+                           name=Path(checkpoint).stem if checkpoint else 'steering')
+    runners = {'eager_fp32': EagerRunner(model)}
+    for variant, path in artifacts.items():
+        runners[variant] = load_runner(path)
+    return benchmark_variants(runners, images, targets)
+
+
+if __name__ == "__main__":
+    export_and_benchmark()
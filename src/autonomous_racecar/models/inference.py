@@ -0,0 +1,104 @@
+#src/autonomous_racecar/models/inference.py
+#one inference interface over eager, torchscript and onnx models
+
+import zipfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Union
+
+import torch
+
+
+class InferenceRunner(ABC):
+    """
+    Bx3xHxW preprocessed float tensor -> Bx2 (steering, throttle) tensor
+
+    every backend is called the same way, so AutonomousDriver (or a
+    benchmark) can take any of them as its model
+    """
+
+    name = 'runner'
+
+    @abstractmethod
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        ...
+
+    def warmup(self, x: torch.Tensor, runs: int = 5):
+        """first calls allocate, tune kernels and (torchscript) optimize the graph"""
+        for _ in range(runs):
+            self(x)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name})"
+
+
+class EagerRunner(InferenceRunner):
+    """plain nn.Module (fp32 or quantized in eager/fx form)"""
+
+    def __init__(self, model: torch.nn.Module, name: str = 'eager'):
+        self.model = model.eval()
+        self.name = name
+
+    @torch.inference_mode()
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return self.model(x)
+
+
+class TorchScriptRunner(InferenceRunner):
+    """frozen torchscript module from models.export.export_torchscript"""
+
+    def __init__(self, path: Union[str, Path], name: Optional[str] = None):
+        self.path = Path(path)
+        self.module = torch.jit.load(str(self.path), map_location='cpu').eval()
+        self.name = name or self.path.stem
+
+    @torch.inference_mode()
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        return self.module(x)
+
+
+class OnnxRunner(InferenceRunner):
+    """onnxruntime session on the cpu execution provider"""
+
+    def __init__(self, path: Union[str, Path], name: Optional[str] = None,
+                 threads: Optional[int] = None):
+        import onnxruntime
+
+        self.path = Path(path)
+        self.name = name or self.path.stem
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(str(self.path), options,
+                                                    providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        output = self.session.run(None, {self.input_name: x.detach().cpu().numpy()})[0]
+        return torch.from_numpy(output)
+
+
+def _is_torchscript(path: Path) -> bool:
+    #torchscript archives carry their code, torch.save checkpoints do not
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return any('/code/' in name for name in archive.namelist())
+    except zipfile.BadZipFile:
+        return False
+
+
+def load_runner(path: Union[str, Path], model: Optional[torch.nn.Module] = None) -> InferenceRunner:
+    """
+    runner for any artifact: .onnx -> onnxruntime, torchscript archive ->
+    TorchScriptRunner, anything else is a checkpoint (models.networks)
+    loaded into an EagerRunner (pass model for custom backbones)
+    """
+    path = Path(path)
+    if path.suffix == '.onnx':
+        return OnnxRunner(path)
+    if _is_torchscript(path):
+        return TorchScriptRunner(path)
+
+    from .networks import load_checkpoint
+    return EagerRunner(load_checkpoint(path, model), name=path.stem)
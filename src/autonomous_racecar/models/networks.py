@@ -0,0 +1,116 @@
+#src/autonomous_racecar/models/networks.py
+#steering model: pretrained backbone + small (steering, throttle) head
+
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+import torch.nn as nn
+
+OUTPUTS = ('steering', 'throttle')
+
+
+def build_backbone(architecture: str = 'resnet18', pretrained: bool = True) -> Tuple[nn.Module, int]:
+    """torchvision classifier with its fc layer removed, and its feature size"""
+    import torchvision
+
+    constructor = getattr(torchvision.models, architecture)
+    try:
+        net = constructor(weights='DEFAULT' if pretrained else None)
+    except TypeError:
+        #torchvision < 0.13 (jetpack wheels)
+        net = constructor(pretrained=pretrained)
+    feature_dim = net.fc.in_features
+    net.fc = nn.Identity()
+    return net, feature_dim
+
+
+class SteeringModel(nn.Module):
+    """
+    image -> pooled backbone features -> (steering, throttle)
+
+    backbone and head are separate modules so the backbone can be frozen
+    and its features cached (training.feature_cache). pass a backbone and
+    feature_dim to use something other than a torchvision model
+    """
+
+    def __init__(self,
+                 architecture: str = 'resnet18',
+                 pretrained: bool = True,
+                 dropout: float = 0.2,
+                 backbone: Optional[nn.Module] = None,
+                 feature_dim: Optional[int] = None):
+        super().__init__()
+        custom = backbone is not None
+        if backbone is None:
+            backbone, feature_dim = build_backbone(architecture, pretrained)
+        elif feature_dim is None:
+            raise ValueError("feature_dim is required with a custom backbone")
+        self.architecture = architecture
+        #what actually runs: the torchvision name or the custom module's class
+        self.backbone_name = type(backbone).__name__.lower() if custom else architecture
+        self.backbone = backbone
+        self.feature_dim = feature_dim
+        #input size the weights were trained at, kept in checkpoints
+        self.target_size = None
+        self.head = nn.Sequential(nn.Dropout(dropout), nn.Linear(feature_dim, len(OUTPUTS)))
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]] = None, **kwargs) -> 'SteeringModel':
+        """model section of training_config.yaml"""
+        if config is None:
+            from ..utils.config import load_training_config
+            config = load_training_config()
+        model = config.get('model', {})
+        kwargs.setdefault('architecture', model.get('architecture', 'resnet18'))
+        kwargs.setdefault('pretrained', model.get('pretrained', True))
+        kwargs.setdefault('dropout', model.get('dropout', 0.2))
+        return cls(**kwargs)
+
+    def features(self, x: torch.Tensor) -> torch.Tensor:
+        """pooled backbone features, Bxfeature_dim"""
+        return torch.flatten(self.backbone(x), 1)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.head(self.features(x))
+
+    def freeze_backbone(self):
+        """no gradients and fixed batchnorm statistics in the backbone"""
+        for p in self.backbone.parameters():
+            p.requires_grad = False
+        self.backbone.eval()
+
+    def train(self, mode: bool = True):
+        super().train(mode)
+        #a frozen backbone stays in eval mode
+        if not any(p.requires_grad for p in self.backbone.parameters()):
+            self.backbone.eval()
+        return self
+
+
+def save_checkpoint(model: SteeringModel, path, target_size: Optional[Tuple[int, int]] = None, **extra):
+    """weights plus what is needed to rebuild the model and its input"""
+    checkpoint = {
+        'state_dict': model.state_dict(),
+        'architecture': model.architecture,
+        'feature_dim': model.feature_dim,
+        'dropout': model.head[0].p,
+        'outputs': list(OUTPUTS),
+        'target_size': list(target_size or model.target_size or ()) or None,
+    }
+    checkpoint.update(extra)
+    torch.save(checkpoint, path)
+    return path
+
+
+def load_checkpoint(path, model: Optional[SteeringModel] = None) -> SteeringModel:
+    """
+    rebuild a SteeringModel from save_checkpoint, in eval mode. pass model
+    for custom backbones (only the weights are loaded into it)
+    """
+    checkpoint = torch.load(path, map_location='cpu')
+    if model is None:
+        model = SteeringModel(architecture=checkpoint['architecture'], pretrained=False,
+                              dropout=checkpoint['dropout'])
+    model.load_state_dict(checkpoint['state_dict'])
+    model.target_size = tuple(checkpoint['target_size']) if checkpoint.get('target_size') else None
+    return model.eval()
@@ -0,0 +1,335 @@
+#src/autonomous_racecar/training/feature_cache.py
+#frozen-backbone feature cache and head-only training on cached features
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from ..data.torch_dataset import SessionDataset, split_sessions
+from ..models.networks import OUTPUTS, SteeringModel, save_checkpoint
+from ..models.preprocess import IMAGENET_MEAN, IMAGENET_STD
+from ..utils.process import pid_alive
+
+CACHE_VERSION = 1
+META_FILE = 'cache.json'
+FEATURES_FILE = 'features.npy'
+FLIPPED_FILE = 'features_flipped.npy'
+
+
+def weights_hash(module: torch.nn.Module) -> str:
+    """sha256 over parameter and buffer names, shapes and values"""
+    digest = hashlib.sha256()
+    for name, tensor in module.state_dict().items():
+        tensor = tensor.detach().cpu().contiguous()
+        digest.update(f"{name}:{tensor.dtype}:{tuple(tensor.shape)}".encode())
+        digest.update(tensor.numpy().tobytes())
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(dataset: SessionDataset) -> list:
+    """
+    identity of the frames without reading them: session path, row count and
+    frames.npy size + mtime (sessions are append-only, any new or rewritten
+    frame changes one of these)
+    """
+    from ..data.columnar import FRAMES_FILE
+
+    sessions = []
+    for path, rows in zip(dataset.session_paths, dataset.session_rows):
+        stat = os.stat(path / FRAMES_FILE)
+        sessions.append([str(path.resolve()), rows, stat.st_size, stat.st_mtime_ns])
+    return sessions
+
+
+class FeatureCache:
+    """
+    pooled backbone features for every frame of a dataset, memory mapped
+
+    the cache directory is named by a hash of everything the features
+    depend on: backbone weights, preprocessing (target size, mean/std) and
+    the recorded frames, so a changed backbone, preprocessing or session
+    simply misses and is rebuilt, there is nothing to invalidate by hand.
+    features are written to a temporary directory that is renamed into
+    place when complete, an interrupted build is never picked up.
+    superseded caches are not deleted on a miss, prune_caches() removes
+    all but the most recently used ones per backbone (train_cached runs it).
+    with flip=True the features of the mirrored frames are stored too, so
+    horizontal flip augmentation still works when training on the cache
+    """
+
+    def __init__(self,
+                 model: SteeringModel,
+                 dataset: SessionDataset,
+                 root: Optional[Union[str, Path]] = None,
+                 flip: bool = False,
+                 batch_size: int = 64,
+                 num_workers: int = 0,
+                 device: str = 'cpu'):
+        if root is None:
+            from ..utils.config import FEATURE_DIR
+            root = FEATURE_DIR
+        if dataset.dtype != torch.float32:
+            raise ValueError("feature cache needs a float32 (normalized) dataset")
+        self.model = model
+        self.dataset = dataset
+        self.root = Path(root)
+        self.flip = flip
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.device = device
+
+        self.spec = {
+            'version': CACHE_VERSION,
+            'architecture': model.backbone_name,
+            'backbone': weights_hash(model.backbone),
+            'preprocess': {'target_size': list(dataset.target_size),
+                           'mean': list(IMAGENET_MEAN), 'std': list(IMAGENET_STD)},
+            'frames': dataset_fingerprint(dataset),
+            'flip': flip,
+        }
+        self.key = hashlib.sha256(json.dumps(self.spec, sort_keys=True).encode()).hexdigest()[:16]
+        self.path = self.root / f"{model.backbone_name}_{self.key}"
+
+        self.features = None
+        self.flipped = None
+        self.build_time = 0.0
+
+    @property
+    def valid(self) -> bool:
+        return (self.path / META_FILE).exists()
+
+    def load(self) -> 'FeatureCache':
+        """map the cached features, building them first on a miss"""
+        if self.valid:
+            print(f"feature cache hit: {self.path}")
+            #last use, for prune_caches
+            os.utime(self.path / META_FILE)
+        else:
+            self.build()
+        self.features = np.load(self.path / FEATURES_FILE, mmap_mode='r')
+        if self.flip:
+            self.flipped = np.load(self.path / FLIPPED_FILE, mmap_mode='r')
+        return self
+
+    @torch.no_grad()
+    def build(self):
+        """one frozen backbone pass over every frame"""
+        n = len(self.dataset)
+        print(f"feature cache miss, running {self.model.backbone_name} over {n} frames"
+              f"{' (and mirrored)' if self.flip else ''}")
+        tmp = self.path.with_name(self.path.name + f'.tmp{os.getpid()}')
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        shape = (n, self.model.feature_dim)
+        features = np.lib.format.open_memmap(tmp / FEATURES_FILE, 'w+', np.float32, shape)
+        flipped = (np.lib.format.open_memmap(tmp / FLIPPED_FILE, 'w+', np.float32, shape)
+                   if self.flip else None)
+
+        was_training = self.model.training
+        self.model.eval().to(self.device)
+        loader = DataLoader(self.dataset, batch_size=self.batch_size,
+                            num_workers=self.num_workers, shuffle=False)
+        t0 = time.perf_counter()
+        start = 0
+        for images, _ in loader:
+            images = images.to(self.device)
+            end = start + len(images)
+            features[start:end] = self.model.features(images).cpu().numpy()
+            if flipped is not None:
+                flipped[start:end] = self.model.features(images.flip(3)).cpu().numpy()
+            start = end
+        self.build_time = time.perf_counter() - t0
+        self.model.train(was_training)
+
+        features.flush()
+        if flipped is not None:
+            flipped.flush()
+        del features, flipped
+        with open(tmp / META_FILE, 'w') as f:
+            json.dump(dict(self.spec, rows=n, feature_dim=self.model.feature_dim,
+                           build_s=self.build_time), f, indent=2)
+        try:
+            os.rename(tmp, self.path)
+        except OSError:
+            #built concurrently by another process, keep theirs
+            shutil.rmtree(tmp, ignore_errors=True)
+        print(f"cached {n} x {self.model.feature_dim} features in {self.build_time:.1f}s "
+              f"({n / self.build_time if self.build_time else 0:.0f} frames/s)")
+
+    def targets(self) -> np.ndarray:
+        """N x len(OUTPUTS) labels, read fresh from the sessions (not cached)"""
+        from ..data.columnar import MultiSessionDataset
+
+        index = MultiSessionDataset(self.dataset.session_paths)
+        return np.stack([index.column(name) for name in OUTPUTS], axis=1).astype(np.float32)
+
+
+def prune_caches(root: Optional[Union[str, Path]] = None, keep: int = 2) -> int:
+    """
+    delete all but the `keep` most recently used caches of each backbone,
+    and temporary directories of builds whose process is gone. returns the
+    number of directories removed (deleting FEATURE_DIR by hand is also safe)
+    """
+    if root is None:
+        from ..utils.config import FEATURE_DIR
+        root = FEATURE_DIR
+    root = Path(root)
+    if not root.is_dir():
+        return 0
+
+    removed = []
+    caches = {}
+    for path in root.iterdir():
+        name, _, tmp_pid = path.name.partition('.tmp')
+        if tmp_pid:
+            if tmp_pid.isdigit() and not pid_alive(int(tmp_pid)):
+                removed.append(path)
+        elif (path / META_FILE).exists():
+            backbone = name.rsplit('_', 1)[0]
+            caches.setdefault(backbone, []).append(path)
+    for paths in caches.values():
+        paths.sort(key=lambda p: (p / META_FILE).stat().st_mtime, reverse=True)
+        removed += paths[keep:]
+
+    for path in removed:
+        shutil.rmtree(path, ignore_errors=True)
+    if removed:
+        print(f"pruned {len(removed)} stale feature caches from {root}")
+    return len(removed)
+
+
+def train_head(model: SteeringModel,
+               cache: FeatureCache,
+               train_indices: Sequence[int],
+               val_indices: Sequence[int] = (),
+               epochs: int = 40,
+               learning_rate: float = 1e-3,
+               weight_decay: float = 1e-4,
+               batch_size: int = 64,
+               horizontal_flip: float = 0.0,
+               seed: int = 0) -> Dict[str, list]:
+    """
+    train only model.head on cached features (backbone frozen)
+
+    features live in ram as one tensor, an epoch is a few matrix multiplies.
+    horizontal_flip picks the mirrored frame's features for that share of
+    each batch and negates its steering
+    """
+    if horizontal_flip and cache.flipped is None:
+        raise ValueError("horizontal_flip needs a cache built with flip=True")
+    model.freeze_backbone()
+    head = model.head
+    device = next(head.parameters()).device
+    features = torch.from_numpy(np.array(cache.features)).to(device)
+    flipped = (torch.from_numpy(np.array(cache.flipped)).to(device)
+               if cache.flipped is not None else None)
+    targets = torch.from_numpy(cache.targets()).to(device)
+    train_indices = torch.as_tensor(np.asarray(train_indices, dtype=np.int64), device=device)
+    val_indices = torch.as_tensor(np.asarray(val_indices, dtype=np.int64), device=device)
+
+    optimizer = torch.optim.Adam(head.parameters(), lr=learning_rate, weight_decay=weight_decay)
+    loss_fn = torch.nn.MSELoss()
+    generator = torch.Generator().manual_seed(seed)
+    steer = OUTPUTS.index('steering')
+    history = {'train_loss': [], 'val_loss': [], 'val_steering_mae': []}
+
+    t0 = time.perf_counter()
+    for epoch in range(epochs):
+        head.train()
+        total = 0.0
+        order = train_indices[torch.randperm(len(train_indices), generator=generator).to(device)]
+        for batch in order.split(batch_size):
+            x = features[batch]
+            y = targets[batch]
+            if horizontal_flip:
+                mask = (torch.rand(len(batch), generator=generator) < horizontal_flip).to(device)
+                x = torch.where(mask[:, None], flipped[batch], x)
+                y = y.clone()
+                y[mask, steer] = -y[mask, steer]
+            optimizer.zero_grad()
+            loss = loss_fn(head(x), y)
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(batch)
+        history['train_loss'].append(total / max(1, len(train_indices)))
+
+        if len(val_indices):
+            head.eval()
+            with torch.no_grad():
+                pred = head(features[val_indices])
+                y = targets[val_indices]
+                history['val_loss'].append(loss_fn(pred, y).item())
+                history['val_steering_mae'].append((pred[:, steer] - y[:, steer]).abs().mean().item())
+
+    elapsed = time.perf_counter() - t0
+    line = f"head trained: {epochs} epochs in {elapsed:.2f}s, loss {history['train_loss'][-1]:.4f}"
+    if history['val_steering_mae']:
+        line += f", val steering mae {history['val_steering_mae'][-1]:.4f}"
+    print(line)
+    history['seconds'] = elapsed
+    return history
+
+
+def _session_rows(dataset: SessionDataset, sessions: Sequence[int]) -> np.ndarray:
+    #global indices of every row in the given sessions
+    ranges = [np.arange(dataset.offsets[s], dataset.offsets[s + 1]) for s in sessions]
+    return np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+
+
+def train_cached(root: Optional[Union[str, Path]] = None,
+                 config: Optional[Dict[str, Any]] = None,
+                 model: Optional[SteeringModel] = None,
+                 cache_root: Optional[Union[str, Path]] = None,
+                 target_size: Optional[Sequence[int]] = None,
+                 seed: int = 0,
+                 checkpoint: Optional[Union[str, Path]] = None) -> SteeringModel:
+    """
+    head-only training from training_config.yaml: build/load the feature
+    cache for the sessions under root, split by session, train the head,
+    and save it to `checkpoint` (models.networks.save_checkpoint) if given
+    """
+    if config is None:
+        from ..utils.config import load_training_config
+        config = load_training_config()
+    data = config.get('data', {})
+    training = config.get('training', {})
+    augmentation = config.get('augmentation', {})
+    if target_size is None:
+        from ..utils.config import load_hardware_config
+        target_size = load_hardware_config().get('camera', {}).get('target_size', (224, 224))
+
+    model = model or SteeringModel.from_config(config)
+    flip = augmentation.get('enabled', True) and augmentation.get('horizontal_flip', 0.0)
+    dataset = SessionDataset.from_root(root, target_size=target_size, cache_bytes=0)
+    cache = FeatureCache(model, dataset, cache_root, flip=bool(flip),
+                         num_workers=data.get('num_workers', 0),
+                         device=training.get('device', 'cpu')).load()
+    prune_caches(cache.root)
+
+    train, val = split_sessions(len(dataset.session_paths), data.get('train_split', 0.8), seed)
+    train_head(model, cache, _session_rows(dataset, train), _session_rows(dataset, val),
+               epochs=training.get('epochs', 40),
+               learning_rate=training.get('learning_rate', 1e-4),
+               weight_decay=training.get('weight_decay', 1e-4),
+               batch_size=data.get('batch_size', 16),
+               horizontal_flip=flip or 0.0,
+               seed=seed)
+
+    model.target_size = tuple(target_size)
+    if checkpoint is not None:
+        save_checkpoint(model, checkpoint)
+        print(f"checkpoint saved to {checkpoint}")
+    return model
+
+
+if __name__ == "__main__":
+    train_cached()
@@ -0,0 +1,41 @@
+#src/autonomous_racecar/utils/config.py
+#yaml config loading from the repo config/ directory
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+#src/autonomous_racecar/utils/config.py -> repo root
+CONFIG_DIR = Path(os.environ.get(
+    'RACECAR_CONFIG_DIR',
+    Path(__file__).resolve().parents[3] / 'config'))
+
+#recorded driving sessions
+DATA_DIR = Path(os.environ.get(
+    'RACECAR_DATA_DIR',
+    Path(__file__).resolve().parents[3] / 'data' / 'sessions'))
+
+#frozen-backbone feature caches (training.feature_cache)
+FEATURE_DIR = Path(os.environ.get('RACECAR_FEATURE_DIR', DATA_DIR.parent / 'features'))
+
+#checkpoints and exported models (models.export)
+MODEL_DIR = Path(os.environ.get('RACECAR_MODEL_DIR', DATA_DIR.parent / 'models'))
+
+
+def load_config(name: str, path: Optional[str] = None) -> Dict[str, Any]:
+    """load config/<name>.yaml, or an explicit path"""
+    import yaml
+
+    config_path = Path(path) if path else CONFIG_DIR / f"{name}.yaml"
+    with open(config_path) as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_hardware_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """load config/hardware_config.yaml"""
+    return load_config('hardware_config', path)
+
+
+def load_training_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """load config/training_config.yaml"""
+    return load_config('training_config', path)
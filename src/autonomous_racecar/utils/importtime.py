@@ -0,0 +1,91 @@
+#src/autonomous_racecar/utils/importtime.py
+#import-time benchmark for the package using python -X importtime
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+#modules that must never load as a side effect of importing the package
+HEAVY_MODULES = ('torch', 'torchvision', 'cv2', 'jetcam', 'smbus', 'numpy')
+
+#src/ directory containing the package
+SRC_DIR = Path(__file__).resolve().parents[2]
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """parse -X importtime output into (module, self_us, cumulative_us)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue
+        entries.append((parts[2].strip(), self_us, cumulative_us))
+    return entries
+
+
+def measure_import_time(statement: str = 'import autonomous_racecar',
+                        repeat: int = 5) -> Dict[str, object]:
+    """
+    run `statement` in fresh interpreters under -X importtime
+
+    reports the best (lowest) cumulative cost of the autonomous_racecar
+    entry, the slowest modules of the best run and any heavy dependency
+    that was pulled in
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        p for p in (str(SRC_DIR), env.get('PYTHONPATH')) if p)
+
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                                capture_output=True, text=True, env=env)
+        if result.returncode != 0:
+            raise RuntimeError(f"import failed: {result.stderr.strip().splitlines()[-1]}")
+
+        entries = parse_importtime(result.stderr)
+        package = [e for e in entries if e[0] == 'autonomous_racecar']
+        total_us = package[-1][2] if package else sum(e[1] for e in entries)
+        if best is None or total_us < best[0]:
+            best = (total_us, entries)
+
+    total_us, entries = best
+    loaded = {e[0] for e in entries}
+    return {
+        'statement': statement,
+        'total_ms': total_us / 1000,
+        'slowest': sorted(((e[0], e[1] / 1000) for e in entries),
+                          key=lambda e: e[1], reverse=True)[:10],
+        'heavy_modules': [m for m in HEAVY_MODULES if m in loaded],
+    }
+
+
+def check_import_time(budget_ms: float = 50.0,
+                      statement: str = 'import autonomous_racecar') -> bool:
+    """fail if the import exceeds the budget or pulls in heavy deps"""
+    report = measure_import_time(statement)
+
+    print(f"{report['statement']}: {report['total_ms']:.1f}ms (budget {budget_ms}ms)")
+    for module, ms in report['slowest'][:5]:
+        print(f"  {module}: {ms:.2f}ms self")
+
+    ok = report['total_ms'] <= budget_ms
+    if report['heavy_modules']:
+        print(f"heavy modules imported: {', '.join(report['heavy_modules'])}")
+        ok = False
+    print("import time ok" if ok else "import time regression")
+    return ok
+
+
+if __name__ == '__main__':
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    sys.exit(0 if check_import_time(budget) else 1)
@@ -0,0 +1,16 @@
+#src/autonomous_racecar/utils/process.py
+#small process helpers shared by the shared-memory and cache code
+
+import os
+
+
+def pid_alive(pid: int) -> bool:
+    """true if a process with this pid exists (on this host)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        #exists, owned by another user
+        return True
+    return True
@@ -0,0 +1,31 @@
+#src/autonomous_racecar/utils/stats.py
+#small dependency-free statistics helpers for benchmarks
+
+from typing import Dict, Sequence
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """linear-interpolated percentile (q in 0-100) of a sequence"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return float(ordered[0])
+    pos = (len(ordered) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    frac = pos - lower
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * frac
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """count, mean, p50, p99 and max of a sequence"""
+    if not values:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p99': 0.0, 'max': 0.0}
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'p50': percentile(values, 50),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }